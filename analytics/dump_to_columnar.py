@@ -0,0 +1,172 @@
+"""
+把 original_data/filmdb.sql 单遍流式转换成列式文件，分析时不用再把 7 万多条 INSERT 回放进数据库。
+- npz: {OUTPUT_DIR}/{表名}/part-00000.npz，每个分块最多 CHUNK_ROWS 行 (内存占用有上限)
+- parquet (需要 pyarrow): {OUTPUT_DIR}/{表名}.parquet，每个分块一个 row group
+列类型取自 dump 里的 CREATE TABLE：整数列 int64，NULL 另存布尔掩码 {列名}__null；字符串列是定长 unicode 数组。
+{OUTPUT_DIR}/schema.json 记录格式、列定义和行数。查询见 analytics/queries.py。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.filmdb_dump import iter_dump_tables
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- 配置区 ---
+DUMP_FILE = '../original_data/filmdb.sql'
+OUTPUT_DIR = '../cache/columnar'
+FORMAT = 'auto'                 # 'npz' / 'parquet' / 'auto' (装了 pyarrow 就用 parquet)
+CHUNK_ROWS = 50000              # 每个分块 (npz 文件 / parquet row group) 的行数
+
+SCHEMA_FILE = 'schema.json'
+NULL_SUFFIX = '__null'
+INT_TYPES = ('int', 'integer', 'smallint', 'bigint')
+FLOAT_TYPES = ('real', 'float', 'double', 'numeric', 'decimal')
+
+
+def column_kind(sql_type):
+    """SQL 类型 -> 'int' / 'float' / 'str'"""
+    base = sql_type.split('(')[0]
+    if base in INT_TYPES:
+        return 'int'
+    if base in FLOAT_TYPES:
+        return 'float'
+    return 'str'
+
+
+def to_numpy(values, kind):
+    """一列 Python 值 -> (numpy 数组, NULL 掩码或 None)"""
+    mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    if kind == 'int':
+        array = np.array([0 if v is None else v for v in values], dtype=np.int64)
+    elif kind == 'float':
+        array = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    else:
+        array = np.array(['' if v is None else v for v in values], dtype=str)
+    return array, (mask if mask.any() else None)
+
+
+class NpzTableWriter:
+    def __init__(self, out_dir, table, columns):
+        self.dir = os.path.join(out_dir, table)
+        os.makedirs(self.dir, exist_ok=True)
+        self.columns = columns
+        self.parts = 0
+
+    def write(self, values):
+        arrays = {}
+        for (name, _, kind), column in zip(self.columns, values):
+            arrays[name], mask = to_numpy(column, kind)
+            if mask is not None:
+                arrays[name + NULL_SUFFIX] = mask
+        np.savez_compressed(os.path.join(self.dir, f"part-{self.parts:05d}.npz"), **arrays)
+        self.parts += 1
+
+    def close(self):
+        pass
+
+
+class ParquetTableWriter:
+    def __init__(self, out_dir, table, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+        self.writer = pq.ParquetWriter(os.path.join(out_dir, f"{table}.parquet"), self.schema)
+
+    def write(self, values):
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(column, type=field.type) for column, field in zip(values, self.schema)],
+            schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def resolve_format(fmt):
+    if fmt == 'auto':
+        try:
+            import pyarrow.parquet  # noqa: F401
+            return 'parquet'
+        except ImportError:
+            return 'npz'
+    return fmt
+
+
+def convert(dump_path, out_dir, fmt='npz', chunk_rows=CHUNK_ROWS):
+    """
+    单遍转换整个 dump，返回 {表名: 行数}。
+    每张表只缓冲一个分块 (按列存 Python 值)，攒满 chunk_rows 行就写出去。
+    """
+    writer_cls = {'npz': NpzTableWriter, 'parquet': ParquetTableWriter}[fmt]
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+
+    tables, buffers, writers, skipped = {}, {}, {}, 0
+
+    def flush(table):
+        if buffers[table][0]:
+            writers[table].write(buffers[table])
+            buffers[table] = [[] for _ in buffers[table]]
+
+    for table, columns, row in iter_dump_tables(dump_path):
+        if table not in tables:
+            if columns is None:
+                # 没有 CREATE TABLE 的表按第一行的值推断列类型
+                columns = [(f"col{i}", 'int' if isinstance(v, int) else 'text') for i, v in enumerate(row)]
+            columns = [(name, sql_type, column_kind(sql_type)) for name, sql_type in columns]
+            tables[table] = {"columns": columns, "rows": 0}
+            buffers[table] = [[] for _ in columns]
+            writers[table] = writer_cls(out_dir, table, columns)
+        if len(row) != len(tables[table]["columns"]):
+            skipped += 1
+            continue
+        for column, value in zip(buffers[table], row):
+            column.append(value)
+        tables[table]["rows"] += 1
+        if len(buffers[table][0]) >= chunk_rows:
+            flush(table)
+
+    for table in tables:
+        flush(table)
+        writers[table].close()
+
+    with open(os.path.join(out_dir, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"format": fmt, "source": os.path.basename(dump_path), "tables": tables},
+                  f, ensure_ascii=False, indent=1)
+    if skipped:
+        print(f"⚠️ {skipped} 行的列数和表定义对不上，已跳过")
+    return {table: info["rows"] for table, info in tables.items()}
+
+
+def main():
+    if np is None:
+        print("❌ 列式转换需要 numpy (pip install numpy)，Parquet 格式另外需要 pyarrow")
+        return
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    dump_path = os.path.normpath(os.path.join(current_dir, DUMP_FILE))
+    out_dir = os.path.normpath(os.path.join(current_dir, OUTPUT_DIR))
+    if not os.path.exists(dump_path):
+        print(f"❌ 未找到 {DUMP_FILE}")
+        return
+
+    fmt = resolve_format(FORMAT)
+    print(f"🚀 正在把 {os.path.basename(dump_path)} 转换为 {fmt} 列式文件...")
+    start = time.monotonic()
+    counts = convert(dump_path, out_dir, fmt)
+    for table, rows in counts.items():
+        print(f"  {table:<24}{rows:>8} 行")
+    print(f"✅ 转换完毕 ({time.monotonic() - start:.1f}s): {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+列式数据上的向量化查询 (先运行 analytics/dump_to_columnar.py 生成数据)。
+  python analytics/queries.py
+load_table 把一张表读成 {列名: numpy 数组}；带 NULL 的列是 np.ma.MaskedArray。
+"""
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from analytics.dump_to_columnar import OUTPUT_DIR, SCHEMA_FILE, NULL_SUFFIX
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- 配置区 ---
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), OUTPUT_DIR))
+TOP_N = 10
+
+
+def load_schema(data_dir=DATA_DIR):
+    with open(os.path.join(data_dir, SCHEMA_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _load_npz(data_dir, table, names):
+    table_dir = os.path.join(data_dir, table)
+    parts = [np.load(os.path.join(table_dir, part)) for part in sorted(os.listdir(table_dir))]
+    result = {}
+    for name in names:
+        values = np.concatenate([part[name] for part in parts])
+        masks = [part[name + NULL_SUFFIX] if name + NULL_SUFFIX in part.files else np.zeros(len(part[name]), bool)
+                 for part in parts]
+        mask = np.concatenate(masks)
+        result[name] = np.ma.masked_array(values, mask) if mask.any() else values
+    return result
+
+
+def _load_parquet(data_dir, table, names):
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    arrow = pq.read_table(os.path.join(data_dir, f"{table}.parquet"), columns=names)
+    result = {}
+    for name in names:
+        column = arrow.column(name)
+        if column.null_count:
+            fill = "" if column.type == "string" else 0
+            values = pc.fill_null(column, fill).to_numpy()
+            result[name] = np.ma.masked_array(values, pc.is_null(column).to_numpy())
+        else:
+            result[name] = column.to_numpy()
+        if column.type == "string":
+            result[name] = result[name].astype(str)
+    return result
+
+
+def load_table(table, columns=None, data_dir=DATA_DIR):
+    """读一张表 (可以只读部分列)，返回 {列名: numpy 数组}"""
+    schema = load_schema(data_dir)
+    if table not in schema["tables"]:
+        raise KeyError(f"列式数据里没有表 {table}")
+    names = columns or [name for name, _, _ in schema["tables"][table]["columns"]]
+    loader = _load_parquet if schema["format"] == "parquet" else _load_npz
+    return loader(data_dir, table, names)
+
+
+def credit_counts(credited_as=None, data_dir=DATA_DIR):
+    """每个人的署名次数，按次数降序：(peopleid 数组, 次数数组)；credited_as 可以是 'A' / 'D'"""
+    credits = load_table("credits", ["peopleid", "credited_as"], data_dir)
+    pids = credits["peopleid"]
+    if credited_as is not None:
+        pids = pids[credits["credited_as"] == credited_as]
+    ids, counts = np.unique(pids, return_counts=True)
+    order = np.argsort(-counts, kind='stable')
+    return ids[order], counts[order]
+
+
+def movies_per_country(data_dir=DATA_DIR):
+    """每个国家的电影数，按数量降序：(国家代码数组, 次数数组)"""
+    countries = load_table("movies", ["country"], data_dir)["country"]
+    codes, counts = np.unique(countries, return_counts=True)
+    order = np.argsort(-counts, kind='stable')
+    return codes[order], counts[order]
+
+
+def lookup(table, key, ids, value_columns, data_dir=DATA_DIR):
+    """按主键批量查其他列 (排序 + searchsorted)，返回 Python 值的元组列表；NULL 是 None，查不到的整行是 None"""
+    data = load_table(table, [key] + list(value_columns), data_dir)
+    keys = np.asarray(data[key])
+    if not len(keys):
+        return [None] * len(ids)
+    order = np.argsort(keys, kind='stable')
+    pos = np.clip(np.searchsorted(keys, ids, sorter=order), 0, len(keys) - 1)
+    rows = order[pos]
+    found = keys[rows] == ids
+    # MaskedArray.tolist() 会把被掩掉的 NULL 变成 None
+    values = [data[col][rows].tolist() for col in value_columns]
+    return [tuple(v[i] for v in values) if ok else None for i, ok in enumerate(found)]
+
+
+def main():
+    if np is None:
+        print("❌ 查询需要 numpy (pip install numpy)")
+        return
+    if not os.path.exists(os.path.join(DATA_DIR, SCHEMA_FILE)):
+        print("❌ 还没有列式数据，请先运行 analytics/dump_to_columnar.py")
+        return
+
+    start = time.perf_counter()
+    ids, counts = credit_counts()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"🎬 署名最多的人 ({elapsed:.1f}ms):")
+    names = lookup("people", "peopleid", ids[:TOP_N], ["first_name", "surname"])
+    for pid, count, name in zip(ids[:TOP_N], counts[:TOP_N], names):
+        print(f"  {pid:>6}  {' '.join(str(n) for n in name if n) if name else '?':<30}{count:>6}")
+
+    start = time.perf_counter()
+    codes, counts = movies_per_country()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"🌍 各国电影数 ({elapsed:.1f}ms):")
+    names = lookup("countries", "country_code", codes[:TOP_N], ["country_name"])
+    for code, count, name in zip(codes[:TOP_N], counts[:TOP_N], names):
+        print(f"  {code:<4}{name[0] if name else '?':<30}{count:>6}")
+
+
+if __name__ == "__main__":
+    main()
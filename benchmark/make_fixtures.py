@@ -0,0 +1,55 @@
+"""
+生成合成的 raw_movies_data_{year}.jsonl (或旧版 .json 数组)，给 enricher / sql_generator 做离线基准。
+记录先用 getter.clean_data 清洗，和真实抓取的结果格式完全一致。
+  python benchmark/make_fixtures.py --scale 10 --out benchmark/work/x10/raw_data
+--full-credits 时保留全部演员和全部幕后职位 (getter 的 MAX_CAST / CREW_JOBS)，记录量大约放大 10 倍。
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from benchmark.synthetic import FULL_CREDIT_ROLES, movie_ids, movie_record
+from common.config import configure
+from common.movie_stream import JSONL_PATTERN, LEGACY_PATTERN, write_json_lines
+from data_getter import getter
+
+DEFAULT_YEARS = range(2019, 2026)
+
+
+def write_fixtures(out_dir, scale=1, years=DEFAULT_YEARS, legacy=False, full_credits=False):
+    """每年写一个文件，返回写入的电影总数"""
+    if full_credits:
+        configure(getter, MAX_CAST=None, CREW_JOBS=tuple(FULL_CREDIT_ROLES))
+    os.makedirs(out_dir, exist_ok=True)
+    total = 0
+    for year in years:
+        records = (getter.clean_data(movie_record(mid, scale)) for mid in movie_ids(year, scale))
+        if legacy:
+            movies = list(records)
+            with open(os.path.join(out_dir, LEGACY_PATTERN.format(year)), 'w', encoding='utf-8') as f:
+                json.dump(movies, f, ensure_ascii=False, indent=2)
+            total += len(movies)
+        else:
+            total += write_json_lines(os.path.join(out_dir, JSONL_PATTERN.format(year)), records)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成的原始电影数据")
+    parser.add_argument("--scale", type=int, default=1, help="规模倍数 (1× = 每年 250 部)")
+    parser.add_argument("--out", required=True, help="输出目录")
+    parser.add_argument("--start-year", type=int, default=DEFAULT_YEARS.start)
+    parser.add_argument("--end-year", type=int, default=DEFAULT_YEARS.stop - 1)
+    parser.add_argument("--legacy", action="store_true", help="写旧版的 JSON 数组格式")
+    parser.add_argument("--full-credits", action="store_true", help="保留全部演员和幕后职位")
+    args = parser.parse_args()
+
+    total = write_fixtures(args.out, args.scale, range(args.start_year, args.end_year + 1), args.legacy,
+                           args.full_credits)
+    print(f"✅ 已生成 {total} 部电影 -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
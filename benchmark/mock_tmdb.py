@@ -0,0 +1,149 @@
+"""
+本地 mock TMDB 服务器 (只用标准库)，数据来自 benchmark/synthetic.py。
+  python benchmark/mock_tmdb.py --port 8765 --latency 20 --jitter 10 --rate-429 0.02 --rate-5xx 0.01
+然后让脚本指向它: TMDB_API_KEY=x python cli.py fetch --base-url http://127.0.0.1:8765
+支持 /discover/movie、/movie/{id}、/person/{id}；GET /__stats 返回按状态码统计的请求数。
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import collections
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from benchmark.synthetic import movie_record, person_record, movie_ids
+
+
+class MockState:
+    """服务器配置 + 统计 (多线程共用)"""
+
+    def __init__(self, latency=0.02, jitter=0.01, rate_429=0.0, limit_rps=0, retry_after=1.0, scale=1, seed=0,
+                 rate_5xx=0.0, script=()):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.script = collections.deque(script)
+        self.limit_rps = limit_rps
+        self.retry_after = retry_after
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = collections.Counter()
+        self.window = collections.deque()
+
+    def throttled(self):
+        """随机注入 429，另外超过 limit_rps (滑动 1 秒窗口) 也返回 429，模拟真实的限额"""
+        with self.lock:
+            if self.rng.random() < self.rate_429:
+                return True
+            if self.limit_rps:
+                now = time.monotonic()
+                while self.window and now - self.window[0] > 1.0:
+                    self.window.popleft()
+                if len(self.window) >= self.limit_rps:
+                    return True
+                self.window.append(now)
+            return False
+
+    def injected(self):
+        """先按 script 依次返回给定的状态码 (测试里用来精确控制 429 / 5xx 序列)，之后按 rate_5xx 随机返回 503"""
+        with self.lock:
+            if self.script:
+                return self.script.popleft()
+            if self.rate_5xx and self.rng.random() < self.rate_5xx:
+                return 503
+            return None
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive，和真实 API 一样能复用连接
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, body=None, headers=()):
+            raw = json.dumps(body).encode('utf-8') if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for key, value in headers:
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(raw)
+            with state.lock:
+                state.stats[status] += 1
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if url.path == "/__stats":
+                with state.lock:
+                    stats = {str(k): v for k, v in state.stats.items()}
+                return self.send_json(200, stats)
+
+            time.sleep(state.delay())
+            status = state.injected() or (429 if state.throttled() else None)
+            if status == 429:
+                return self.send_json(429, {"status_code": 25}, [("Retry-After", str(state.retry_after))])
+            if status:
+                return self.send_json(status, {"status_code": 11})
+
+            query = parse_qs(url.query)
+            if parts[-2:] == ["discover", "movie"]:
+                year = int(query.get("primary_release_year", ["2019"])[0])
+                page = int(query.get("page", ["1"])[0])
+                ids = movie_ids(year, state.scale)
+                results = [{"id": mid} for mid in ids[(page - 1) * 20:page * 20]]
+                return self.send_json(200, {"page": page, "results": results,
+                                            "total_pages": (len(ids) + 19) // 20, "total_results": len(ids)})
+            if len(parts) >= 2 and parts[-2] == "movie" and parts[-1].isdigit():
+                return self.send_json(200, movie_record(int(parts[-1]), state.scale))
+            if len(parts) >= 2 and parts[-2] == "person" and parts[-1].isdigit():
+                return self.send_json(200, person_record(int(parts[-1])))
+            return self.send_json(404, {"status_code": 34})
+
+    return Handler
+
+
+def serve(port, state):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 mock TMDB 服务器")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=20, help="平均延迟 (毫秒)")
+    parser.add_argument("--jitter", type=float, default=10, help="延迟抖动 (毫秒，均匀分布)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="随机返回 429 的比例")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="随机返回 503 的比例")
+    parser.add_argument("--limit-rps", type=int, default=0, help="每秒超过这么多请求就返回 429 (0 = 不限)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 响应里的 Retry-After 秒数")
+    parser.add_argument("--scale", type=int, default=1, help="数据规模 (每年电影数 / 人员池按倍数放大)")
+    args = parser.parse_args()
+
+    state = MockState(args.latency / 1000, args.jitter / 1000, args.rate_429, args.limit_rps,
+                      args.retry_after, args.scale, rate_5xx=args.rate_5xx)
+    server = serve(args.port, state)
+    print(f"🧪 mock TMDB 已启动: http://127.0.0.1:{args.port} (延迟 {args.latency}±{args.jitter}ms, "
+          f"429 比例 {args.rate_429}, 5xx 比例 {args.rate_5xx}, 限额 {args.limit_rps or '无'} rps, 规模 {args.scale}×)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
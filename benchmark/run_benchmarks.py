@@ -0,0 +1,141 @@
+"""
+端到端基准：合成数据 + 本地 mock TMDB，依次跑 fetch (getter) / enrich (people_info_enricher) / generate (sql_generator)，
+记录吞吐、关键操作的 p95 延迟和峰值内存，结果写到 benchmark/results/。
+  python benchmark/run_benchmarks.py --scales 1 10 --latency 20 --rate-429 0.02
+  python benchmark/run_benchmarks.py --scales 1 4 --scenarios generate --full-credits
+fetch 场景抓到的数据只用来计时；enrich / generate 用 make_fixtures 生成的同规模数据，互不影响。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import subprocess
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+from benchmark.make_fixtures import write_fixtures
+from benchmark.scenario import SCENARIOS
+
+WORK_DIR = os.path.join(BENCH_DIR, 'work')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# 每个场景：(吞吐按哪个计数算, 看哪个直方图的 p95)
+SCENARIO_METRICS = {
+    "fetch": (("fetch.movies",), "http.movie.{id}.latency"),
+    "enrich": (("enrich.ok", "enrich.missing", "enrich.dump_hits"), "http.person.{id}.latency"),
+    "generate": (("generate.new_movies", "generate.skipped_movies", "generate.unmapped_country_movies"),
+                 "generate.dedup.person"),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args, scale):
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "mock_tmdb.py"), "--port", str(port),
+                             "--latency", str(args.latency), "--jitter", str(args.jitter),
+                             "--rate-429", str(args.rate_429), "--limit-rps", str(args.limit_rps),
+                             "--retry-after", str(args.retry_after), "--scale", str(scale)],
+                            stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"{base_url}/__stats", timeout=1).read()
+            return proc, base_url
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("mock TMDB 启动失败")
+
+
+def run_scenario(name, workdir, scale, base_url, args):
+    """在子进程里跑场景，返回 (耗时秒数, 峰值 RSS MB, 运行报告)"""
+    cmd = [sys.executable, os.path.join(BENCH_DIR, "scenario.py"), name, "--workdir", workdir,
+           "--scale", str(scale), "--start-year", str(args.start_year), "--end-year", str(args.end_year),
+           "--base-url", base_url, "--rate", str(args.rate)] + (["--full-credits"] if args.full_credits else [])
+    log_path = os.path.join(workdir, f"{name}.log")
+    start = time.monotonic()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 拿到的是这一个子进程自己的资源统计 (ru_maxrss 在 Linux 上是 KB)
+        _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.monotonic() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"场景 {name} 失败，日志见 {log_path}")
+    with open(os.path.join(workdir, "reports", f"{name}.json"), 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    return elapsed, usage.ru_maxrss / 1024, report
+
+
+def summarize(name, scale, elapsed, rss_mb, report):
+    count_keys, latency_key = SCENARIO_METRICS[name]
+    items = sum(report["counters"].get(key, 0) for key in count_keys)
+    latency = report["histograms"].get(latency_key, {})
+    return {"scenario": name, "scale": scale, "items": items, "seconds": round(elapsed, 3),
+            "throughput": round(items / elapsed, 1) if elapsed else 0.0,
+            "p95_ms": round(latency.get("p95", 0.0) * 1000, 3), "p95_metric": latency_key,
+            "peak_rss_mb": round(rss_mb, 1),
+            "http_429": sum(v for k, v in report["counters"].items() if k.endswith(".status.429"))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端基准测试")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1], help="规模倍数，例如 1 10 100")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--start-year", type=int, default=2019)
+    parser.add_argument("--end-year", type=int, default=2025)
+    parser.add_argument("--latency", type=float, default=20, help="mock 平均延迟 (毫秒)")
+    parser.add_argument("--jitter", type=float, default=10, help="mock 延迟抖动 (毫秒)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="mock 随机返回 429 的比例")
+    parser.add_argument("--limit-rps", type=int, default=0, help="mock 的每秒请求限额 (0 = 不限)")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=1000, help="客户端令牌桶速率 (req/s)")
+    parser.add_argument("--full-credits", action="store_true",
+                        help="全部演员 + 全部幕后职位 (记录量约 10 倍，看内存和耗时是否线性增长)")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        workdir = os.path.join(WORK_DIR, f"x{scale}")
+        shutil.rmtree(workdir, ignore_errors=True)
+        print(f"📦 [{scale}×] 生成合成数据...")
+        write_fixtures(os.path.join(workdir, "raw_data"), scale, range(args.start_year, args.end_year + 1),
+                       full_credits=args.full_credits)
+
+        mock, base_url = start_mock(args, scale)
+        try:
+            for name in args.scenarios:
+                print(f"⏱️ [{scale}×] {name} ...", flush=True)
+                row = summarize(name, scale, *run_scenario(name, workdir, scale, base_url, args))
+                results.append(row)
+                print(f"    {row['items']} 条, {row['seconds']}s, {row['throughput']}/s, "
+                      f"p95 {row['p95_ms']}ms, 峰值内存 {row['peak_rss_mb']}MB, 429 {row['http_429']} 次")
+        finally:
+            mock.terminate()
+            mock.wait()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, time.strftime("bench_%Y%m%d_%H%M%S.json"))
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=1)
+
+    print("\n" + "=" * 78)
+    print(f"{'场景':<10}{'规模':>6}{'条数':>10}{'秒':>10}{'吞吐/s':>10}{'p95 ms':>10}{'内存 MB':>10}{'429':>8}")
+    print("-" * 78)
+    for r in results:
+        print(f"{r['scenario']:<10}{r['scale']:>6}{r['items']:>10}{r['seconds']:>10}{r['throughput']:>10}"
+              f"{r['p95_ms']:>10}{r['peak_rss_mb']:>10}{r['http_429']:>8}")
+    print("=" * 78)
+    print(f"📄 结果已保存: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+在独立进程里跑一个基准场景 (由 run_benchmarks.py 调用，方便单独统计峰值内存)。
+把对应脚本的配置常量改到工作目录里，然后直接调用它的 main()，运行报告写到 {workdir}/reports/。
+  python benchmark/scenario.py fetch --workdir benchmark/work/x1 --scale 1 --base-url http://127.0.0.1:8765
+"""
+import os
+import sys
+import json
+import argparse
+
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from common.config import configure
+from common import credit_depth
+from benchmark.synthetic import FULL_CREDIT_ROLES
+
+SCENARIOS = ("fetch", "enrich", "generate")
+
+
+def run(name, workdir, scale, years, rate, full_credits=False):
+    raw_dir = os.path.join(workdir, "raw_data")
+    if full_credits:
+        # 导入范围是共用的，抓取 / 补全 / 生成都跟着变
+        configure(credit_depth, MAX_CAST=None, CREW_ROLES=FULL_CREDIT_ROLES)
+    if name == "fetch":
+        from data_getter import getter
+        from benchmark.synthetic import MOVIES_PER_YEAR
+        fetched = os.path.join(workdir, "fetched")
+        configure(getter, START_YEAR=years.start, END_YEAR=years.stop - 1,
+                  MOVIES_PER_YEAR=MOVIES_PER_YEAR * scale, REQUESTS_PER_SECOND=rate, USE_CACHE=False,
+                  RAW_DATA_DIR=fetched, CHECKPOINT_DIR=os.path.join(fetched, ".checkpoints"))
+        getter.main()
+    elif name == "enrich":
+        from people_info_enricher import people_info_enricher as enricher
+        configure(enricher, START_YEAR=years.start, END_YEAR=years.stop - 1, RAW_DATA_DIR=raw_dir,
+                  STORE_FILE=os.path.join(workdir, "people_details.sqlite"),
+                  OUTPUT_FILE=os.path.join(workdir, "people_details_map.json"),
+                  REQUESTS_PER_SECOND=rate, USE_CACHE=False)
+        enricher.main()
+    elif name == "generate":
+        from sql_generator import sql_generator
+        out_dir = os.path.join(workdir, "clean_sql")
+        os.makedirs(out_dir, exist_ok=True)
+        if full_credits:
+            # 全量演职员用多行 INSERT 输出，credits 按批写出
+            configure(sql_generator, OUTPUT_MODE="batch")
+        configure(sql_generator, START_YEAR=years.start, END_YEAR=years.stop - 1, RAW_DATA_DIR=raw_dir,
+                  PEOPLE_STORE=os.path.join(workdir, "people_details.sqlite"),
+                  PEOPLE_FILE=os.path.join(workdir, "people_details_map.json"),
+                  OUTPUT_SQL=os.path.join(out_dir, "update_filmdb_final.sql"),
+                  MANIFEST_FILE=os.path.join(out_dir, "update_filmdb_final.manifest.json"),
+                  UNMAPPED_COUNTRY_REPORT=os.path.join(out_dir, "unmapped_countries.json"),
+                  VALIDATION_REPORT=os.path.join(out_dir, "validation_report.json"),
+                  REGISTRY_FILE=os.path.join(out_dir, "id_registry.sqlite"), DELTA_MODE=False)
+        # 上一次运行留下的输出不能当成这一次的结果
+        for path in (sql_generator.OUTPUT_SQL, sql_generator.VALIDATION_REPORT):
+            if os.path.exists(path):
+                os.remove(path)
+        sql_generator.main()
+        check_generated(sql_generator.OUTPUT_SQL, sql_generator.VALIDATION_REPORT)
+    else:
+        raise ValueError(f"未知场景: {name}")
+
+
+def check_generated(output_path, report_path):
+    """生成失败 (没有输出文件，或者校验有 error) 时以非 0 退出，不要把失败的运行当成基准结果"""
+    if not os.path.exists(output_path):
+        sys.exit(f"❌ 没有生成 {output_path}")
+    if os.path.exists(report_path):
+        with open(report_path, 'r', encoding='utf-8') as f:
+            errors = [p for p in json.load(f) if p["severity"] == "error"]
+        if errors:
+            sys.exit(f"❌ 输出校验有 {len(errors)} 类错误，详见 {report_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行单个基准场景")
+    parser.add_argument("name", choices=SCENARIOS)
+    parser.add_argument("--workdir", required=True)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--start-year", type=int, default=2019)
+    parser.add_argument("--end-year", type=int, default=2025)
+    parser.add_argument("--base-url", default=None, help="mock TMDB 地址")
+    parser.add_argument("--rate", type=float, default=1000, help="客户端令牌桶速率 (req/s)")
+    parser.add_argument("--full-credits", action="store_true", help="全部演员 + 全部幕后职位")
+    args = parser.parse_args()
+
+    # 各脚本建 client 时才读 TMDB_BASE_URL / TMDB_API_KEY
+    if args.base_url:
+        os.environ["TMDB_BASE_URL"] = args.base_url
+    os.environ.setdefault("TMDB_API_KEY", "benchmark")
+
+    from common import metrics
+    workdir = os.path.abspath(args.workdir)
+    run(args.name, workdir, args.scale, range(args.start_year, args.end_year + 1), args.rate, args.full_credits)
+    metrics.write_report(args.name, report_dir=os.path.join(workdir, "reports"), scale=args.scale)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+合成的 TMDB 数据：给 mock 服务器和离线 fixture 共用。
+所有内容都由 ID 决定 (random.Random(id))，同一个 ID 每次生成的结果完全一样。
+"""
+import random
+
+# 1× 规模 = 每年 250 部 (和 getter 的 MOVIES_PER_YEAR 一致)
+MOVIES_PER_YEAR = 250
+# 人员池大小 (按规模放大)；演员按幂律抽取，少数热门演员出现在很多电影里
+PEOPLE_PER_SCALE = 3000
+PERSON_ID_BASE = 1000000
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "José", "Zoë", "Renée", "Søren", "François", "Chloé", "Jürgen", "Ana María", "Li", "Hiroshi",
+    "Priya", "Mohammed", "Olga", "Lars", "Giulia", "Pedro", "Yuki", "Min-jun", "Amélie", "Björn",
+]
+SURNAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "O'Brien", "Müller", "Dubois", "Rossi", "Nakamura", "Kim", "Wang", "Singh", "Ivanova", "Larsen",
+    "De la Cruz", "Van der Berg", "García Márquez", "Nguyen", "Kowalski", "Novak", "Silva", "Costa", "Yilmaz", "Haddad",
+    "Fischer", "Schneider", "Lefebvre", "Moreau", "Bianchi", "Romano", "Tanaka", "Suzuki", "Park", "Chen",
+    "Kumar", "Patel", "Petrov", "Hansen", "Johansson", "Lindqvist", "Ferreira", "Santos", "Öztürk", "Cohen",
+]
+TITLE_WORDS = [
+    "Night", "Summer", "Last", "Silent", "Broken", "Golden", "Dark", "City", "River", "Dream",
+    "House", "Garden", "Secret", "Storm", "Winter", "Road", "Light", "Shadow", "Heart", "Island",
+    "Return", "Edge", "Fire", "Glass", "Ocean", "Kingdom", "Promise", "Memory", "Echo", "Horizon",
+]
+# 出品国家按出现频率加权；ES 走别名表，PS 在 countries 表里没有 (会进未映射报告)
+COUNTRIES = ["US"] * 40 + ["GB"] * 8 + ["FR"] * 7 + ["DE"] * 5 + ["JP"] * 5 + ["KR"] * 4 + ["IN"] * 5 \
+    + ["ES"] * 4 + ["IT"] * 4 + ["CA"] * 3 + ["CN"] * 4 + ["BR"] * 2 + ["MX"] * 2 + ["SE", "DK", "NO", "AU", "PS"]
+CREW_JOBS = ["Director", "Writer", "Screenplay", "Producer", "Executive Producer",
+             "Director of Photography", "Editor", "Original Music Composer", "Casting", "Production Design"]
+# --full-credits 基准：导演以外的全部职位 -> credited_as
+FULL_CREDIT_ROLES = {"Writer": "W", "Screenplay": "W", "Producer": "P", "Executive Producer": "P",
+                     "Director of Photography": "C", "Editor": "E", "Original Music Composer": "M",
+                     "Casting": "S", "Production Design": "R"}
+
+
+def movie_ids(year, scale=1):
+    """某一年按人气排好的电影 ID"""
+    return [year * 100000 + rank for rank in range(MOVIES_PER_YEAR * scale)]
+
+
+def person_name(pid):
+    rng = random.Random(pid)
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+
+
+def _pick_person(rng, pool):
+    # 幂律：小 ID 的人被抽中的概率高得多
+    return PERSON_ID_BASE + int(pool * rng.random() ** 3)
+
+
+def movie_record(mid, scale=1):
+    """/movie/{id}?append_to_response=credits 的响应 (字段只保留下游用到的)"""
+    rng = random.Random(mid)
+    year = mid // 100000
+    pool = PEOPLE_PER_SCALE * scale
+
+    cast_ids = list(dict.fromkeys(_pick_person(rng, pool) for _ in range(rng.randint(15, 60))))
+    cast = [{"id": pid, "name": person_name(pid), "gender": random.Random(pid).choice((0, 1, 2)),
+             "character": f"Role {order}", "order": order} for order, pid in enumerate(cast_ids)]
+    crew = []
+    for job in CREW_JOBS:
+        for _ in range(rng.choice((1, 1, 1, 2, 3)) if job != "Director" else rng.choice((1, 1, 1, 2))):
+            pid = _pick_person(rng, pool)
+            crew.append({"id": pid, "name": person_name(pid), "gender": random.Random(pid).choice((0, 1, 2)),
+                         "job": job, "department": "Directing" if job == "Director" else "Crew"})
+
+    title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+    if rng.random() < 0.3:
+        title += f" {rng.randint(2, 5)}"
+    # 词表很小，不加编号时同一年同一国家必然重名 (违反 movies 的唯一约束)；年内排名唯一，加上它就不会重复
+    title += f" #{mid % 100000}"
+    return {
+        "id": mid,
+        "title": title,
+        "original_title": title,
+        "release_date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "runtime": rng.randint(70, 180),
+        "origin_country": [rng.choice(COUNTRIES)],
+        "credits": {"cast": cast, "crew": crew},
+    }
+
+
+def person_record(pid):
+    """/person/{id} 的响应：大约 85% 有生日，5% 已去世"""
+    rng = random.Random(pid)
+    born = rng.randint(1930, 2005)
+    birthday = f"{born}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if rng.random() < 0.85 else None
+    deathday = f"{rng.randint(born + 20, 2025)}-01-01" if birthday and born < 1990 and rng.random() < 0.05 else None
+    return {"id": pid, "name": person_name(pid), "birthday": birthday, "deathday": deathday}
@@ -0,0 +1,193 @@
+"""
+统一的命令行入口，不用再改源码里的配置区：
+  python cli.py fetch --start-year 2024 --end-year 2024      抓取 TMDB 电影 (data_getter/getter.py)
+  python cli.py enrich                                       补全人员生卒年 (people_info_enricher)
+  python cli.py check-countries                              检查国家代码映射 (country_checking)
+  python cli.py generate --mode batch --output out.sql       生成 SQL / 直接入库 (sql_generator)
+  python cli.py run-all --config nightly.json                一次扫描跑完 国家检查 -> 人员补全 -> 生成 SQL
+配置优先级：--set > 命令行参数 > --config 配置文件 > 各脚本配置区里的默认值。
+导入哪些演职员是各阶段共用的一份配置 (common/credit_depth.py)：--set credits.MAX_CAST=10 或配置文件里的 "credits" 分组。
+脚本只在对应子命令真正执行时才导入，generate / check-countries 不会加载 requests / dotenv。
+"""
+import os
+import sys
+import argparse
+import importlib
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT_DIR)
+from common.config import configure, load_config, parse_setting
+
+# 子命令 -> (脚本模块, 运行报告名)
+STAGES = {
+    "fetch": ("data_getter.getter", "getter"),
+    "enrich": ("people_info_enricher.people_info_enricher", "people_info_enricher"),
+    "check-countries": ("country_checking.check_countries", "check_countries"),
+    "generate": ("sql_generator.sql_generator", "sql_generator"),
+    "run-all": ("run_pipeline", "pipeline"),
+}
+# run-all 会用到的各阶段 (命令行参数、配置文件和 --set 都可以落到这些阶段的脚本上)
+RUN_ALL_STAGES = ("run-all", "check-countries", "enrich", "generate")
+# 所有子命令共用的配置模块，在各阶段之前配置
+SHARED_SETTINGS = {"credits": "common.credit_depth"}
+
+# 命令行参数 -> 各脚本配置区的常量 (值为 None 表示没有指定，保留原来的配置)
+YEAR_FLAGS = {"start_year": "START_YEAR", "end_year": "END_YEAR"}
+FLAG_SETTINGS = {
+    "fetch": {**YEAR_FLAGS, "raw_dir": "RAW_DATA_DIR", "workers": "MAX_WORKERS", "rate": "REQUESTS_PER_SECOND",
+              "per_year": "MOVIES_PER_YEAR", "base_url": "BASE_URL", "cache": "USE_CACHE"},
+    "enrich": {**YEAR_FLAGS, "raw_dir": "RAW_DATA_DIR", "workers": "MAX_WORKERS", "rate": "REQUESTS_PER_SECOND",
+               "base_url": "BASE_URL", "cache": "USE_CACHE", "people_dump": "PEOPLE_DUMP_FILE"},
+    "check-countries": {"raw_dir": "RAW_DATA_DIR"},
+    "generate": {**YEAR_FLAGS, "raw_dir": "RAW_DATA_DIR", "output": "OUTPUT_SQL", "mode": "OUTPUT_MODE",
+                 "dialect": "SQL_DIALECT", "processes": "PARALLEL_WORKERS", "delta": "DELTA_MODE",
+                 "validate": "VALIDATE_OUTPUT"},
+    "run-all": {**YEAR_FLAGS, "raw_dir": "RAW_DATA_DIR", "countries": "CHECK_COUNTRIES",
+                "enrich": "ENRICH_PEOPLE", "generate": "GENERATE_SQL"},
+}
+# 路径参数按当前工作目录解析 (脚本里的默认路径是相对脚本自己的目录)
+PATH_FLAGS = {"raw_dir", "output", "people_dump"}
+
+
+def add_year_args(p):
+    p.add_argument("--start-year", type=int, help="起始年份")
+    p.add_argument("--end-year", type=int, help="结束年份 (含)")
+    p.add_argument("--raw-dir", help="原始电影数据目录")
+
+
+def add_tmdb_args(p, workers_help):
+    p.add_argument("--workers", type=int, help=workers_help)
+    p.add_argument("--rate", type=float, help="每秒请求数上限 (令牌桶)")
+    p.add_argument("--base-url", help="TMDB API 地址 (例如本地 mock)")
+    p.add_argument("--no-cache", dest="cache", action="store_const", const=False, help="不使用本地响应缓存")
+
+
+def add_enrich_args(p):
+    p.add_argument("--people-dump", help="人员 dump 文件，先用它批量补全")
+
+
+def add_generate_args(p):
+    p.add_argument("--output", help="输出的 SQL 文件 (批次清单写在同目录)")
+    p.add_argument("--mode", choices=("insert", "batch", "copy", "prepared"), help="输出格式")
+    p.add_argument("--dialect", choices=("postgres", "sqlite"), help="SQL 方言")
+    p.add_argument("--load", choices=("postgres", "sqlite"), help="不写文件，直接导入数据库")
+    p.add_argument("--delta", action="store_const", const=True, help="增量模式 (对照 ID 登记表)")
+    p.add_argument("--no-validate", dest="validate", action="store_const", const=False, help="跳过输出校验")
+    p.add_argument("--processes", type=int, help="渲染 SQL 的进程数 (去重和分配 ID 仍是串行的)")
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="JSON 配置文件")
+    common.add_argument("--set", dest="settings", action="append", default=[], metavar="[STAGE.]NAME=VALUE",
+                        help="直接覆盖脚本配置区的常量，例如 --set BATCH_SIZE=500 或 --set generate.OUTPUT_MODE=copy")
+    common.add_argument("--no-report", dest="report", action="store_false", help="不写运行报告")
+
+    parser = argparse.ArgumentParser(description="FilmDB 数据流水线")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("fetch", parents=[common], help="抓取每年的 Top N 电影")
+    add_year_args(p)
+    add_tmdb_args(p, "并发请求数")
+    p.add_argument("--per-year", type=int, help="每年抓取的电影数")
+
+    p = sub.add_parser("enrich", parents=[common], help="补全导演和主演的生卒年")
+    add_year_args(p)
+    add_tmdb_args(p, "最大并发请求数")
+    add_enrich_args(p)
+
+    p = sub.add_parser("check-countries", parents=[common], help="检查国家代码能否映射到 countries 表")
+    add_year_args(p)
+
+    p = sub.add_parser("generate", parents=[common], help="生成 SQL 或直接入库")
+    add_year_args(p)
+    add_generate_args(p)
+
+    p = sub.add_parser("run-all", parents=[common], help="一次扫描跑完 国家检查 -> 人员补全 -> 生成 SQL")
+    add_year_args(p)
+    add_tmdb_args(p, "人员补全的最大并发请求数")
+    add_enrich_args(p)
+    add_generate_args(p)
+    p.add_argument("--no-countries", dest="countries", action="store_const", const=False, help="跳过国家检查")
+    p.add_argument("--no-enrich", dest="enrich", action="store_const", const=False, help="跳过人员补全")
+    p.add_argument("--no-generate", dest="generate", action="store_const", const=False, help="跳过 SQL 生成")
+    return parser
+
+
+def parse_args(parser, argv=None):
+    args = parser.parse_args(argv)
+
+    # 配置文件里小写的顶层键是命令行参数的默认值，命令行上写了的优先
+    args.sections = {}
+    if args.config:
+        options, args.sections = load_config(args.config)
+        for key, value in options.items():
+            if not hasattr(args, key):
+                parser.error(f"配置文件里的 {key} 不是 {args.command} 的参数")
+            if getattr(args, key) is None:
+                setattr(args, key, value)
+
+    stages = RUN_ALL_STAGES if args.command == "run-all" else (args.command,)
+    overrides = {stage: {} for stage in stages + tuple(SHARED_SETTINGS)}
+    for text in args.settings:
+        try:
+            name, value = parse_setting(text)
+        except ValueError as e:
+            parser.error(f"--set {e}")
+        stage, _, rest = name.partition(".")
+        if not rest:
+            stage, rest = args.command, name
+        if stage not in overrides:
+            parser.error(f"--set {text}: {args.command} 不会运行 {stage}")
+        overrides[stage][rest] = value
+    args.overrides = overrides
+    return args
+
+
+def stage_settings(stage, module, args):
+    """某个阶段最终要改的常量：配置文件分组 < 命令行参数 < --set"""
+    settings = dict(args.sections.get(stage, {}))
+    for flag, name in FLAG_SETTINGS.get(stage, {}).items():
+        value = getattr(args, flag, None)
+        if value is None:
+            continue
+        settings[name] = os.path.abspath(value) if flag in PATH_FLAGS else value
+
+    if stage == "check-countries" and (args.start_year or args.end_year):
+        # check_countries 用的是年份区间 YEARS
+        years = module.YEARS
+        settings["YEARS"] = range(args.start_year or years.start, (args.end_year or years.stop - 1) + 1)
+    if stage == "generate":
+        if args.output:
+            settings["MANIFEST_FILE"] = os.path.splitext(settings["OUTPUT_SQL"])[0] + ".manifest.json"
+        if args.load:
+            # 直接入库按批提交，要靠持久化的 ID 登记表才能安全重跑
+            settings["LOAD_TO_DB"] = True
+            settings["LOAD_TARGET"] = args.load
+            settings["DELTA_MODE"] = True
+    settings.update(args.overrides.get(stage, {}))
+    return settings
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parse_args(parser, argv)
+    stages = RUN_ALL_STAGES if args.command == "run-all" else (args.command,)
+
+    # 到这里才导入对应的脚本 (连同它们的依赖)；--set / 配置文件里写错的常量名和未知阶段一样按用法错误报告
+    for stage in tuple(SHARED_SETTINGS) + stages:
+        module = importlib.import_module(SHARED_SETTINGS.get(stage) or STAGES[stage][0])
+        try:
+            configure(module, **stage_settings(stage, module, args))
+        except AttributeError as e:
+            parser.error(f"{stage}: {e}")
+    module = importlib.import_module(STAGES[args.command][0])
+    module.main()
+
+    if args.report:
+        from common import metrics
+        metrics.write_report(STAGES[args.command][1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""各个脚本共用的工具模块 (HTTP 客户端、数据读写等)。"""
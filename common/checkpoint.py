@@ -0,0 +1,90 @@
+import os
+import json
+
+
+class CheckpointJournal:
+    """
+    只追加的 JSON Lines 断点日志：每完成一条记录就写一行。
+    - 打开时扫一遍所有完整的行；崩溃时写了一半的最后一行会被截掉
+    - 内存里只记已完成的 key 和它在文件里的偏移，记录本身用 records() 从文件流式读回
+      (全量演职员时一条记录就有几十 KB，整年留在内存里会随数据量线性涨)
+    - 每 fsync_every 条 fsync 一次，断电最多丢这么多条
+    """
+
+    def __init__(self, path, key='id', fsync_every=20):
+        self.path = path
+        self.key = key
+        self.fsync_every = fsync_every
+        self.offsets = {}               # key -> 这一行在文件里的字节偏移
+        self.size = 0
+        self.pending = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._recover()
+        self.file = open(path, 'ab')
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # 写到一半的行
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.offsets[record[self.key]] = good_offset
+                good_offset += len(line)
+        if good_offset != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+        self.size = good_offset
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def records(self, keys):
+        """按 keys 的顺序从文件里逐条读回记录 (没完成的 key 跳过)；日志关闭之后也能读"""
+        if not self.file.closed:
+            self.file.flush()
+        with open(self.path, 'rb') as f:
+            for key in keys:
+                offset = self.offsets.get(key)
+                if offset is not None:
+                    f.seek(offset)
+                    yield json.loads(f.readline())
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        self.file.write(line)
+        self.offsets[record[self.key]] = self.size
+        self.size += len(line)
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def remove(self):
+        """最终结果落盘后，日志就没用了"""
+        self.close()
+        os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
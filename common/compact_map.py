@@ -0,0 +1,80 @@
+import bisect
+import hashlib
+from array import array
+
+
+def stable_hash(key):
+    """key 的 64 位哈希 (blake2b)：和内置 hash 不同，不随进程变化"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+class CompactKeyMap:
+    """
+    字符串 key -> 整数 ID 的紧凑映射：按 key 的 64 位哈希排序的 array('q') 二分查找，
+    key 本身以 UTF-8 首尾相接存在一个 bytes 里 (offsets 记边界)，每条约 24 字节加 key 的长度
+    (普通 dict 加上 key 字符串 / 元组要 150~250 字节)。
+    - 哈希命中后还要比较 key：哈希相同的不同 key (碰撞) 在数组里相邻，各自保留，不会被当成同一个人
+    - 建表时的 add 先追加到列表末尾，第一次查询时一次性排序去重 (同一个 key 保留最先 add 的 ID)
+    - 排序之后再 add 的 (生成过程中新建的人员) 放进一个小 dict，不用每次重排
+    """
+
+    def __init__(self):
+        self.hashes = array('q')
+        self.values = array('q')
+        self.keys = []              # 建表阶段的 key，排序后换成下面的 blob
+        self.blob = b''             # 排序后的 key (UTF-8)，第 i 个是 blob[offsets[i]:offsets[i + 1]]
+        self.offsets = array('q', [0])
+        self.frozen = False         # 第一次查询时排好序，之后不再改动数组
+        self.overlay = {}           # 排序之后新加的: key -> ID
+
+    def _sort(self):
+        # sorted 是稳定排序，相同 key 里排在前面的就是最先 add 的
+        order = sorted(range(len(self.hashes)), key=lambda i: (self.hashes[i], self.keys[i]))
+        hashes, values, offsets, parts = array('q'), array('q'), array('q', [0]), []
+        last = None
+        for i in order:
+            key = self.keys[i].encode('utf-8')
+            if key != last:
+                hashes.append(self.hashes[i])
+                values.append(self.values[i])
+                parts.append(key)
+                offsets.append(offsets[-1] + len(key))
+                last = key
+        self.hashes, self.values, self.offsets = hashes, values, offsets
+        self.blob = b''.join(parts)
+        self.keys = []
+        self.frozen = True
+
+    def _find(self, key):
+        if not self.frozen:
+            self._sort()
+        h = stable_hash(key)
+        i = bisect.bisect_left(self.hashes, h)
+        if i < len(self.hashes) and self.hashes[i] == h:
+            encoded = key.encode('utf-8')
+            while i < len(self.hashes) and self.hashes[i] == h:
+                if self.blob[self.offsets[i]:self.offsets[i + 1]] == encoded:
+                    return self.values[i]
+                i += 1
+        return self.overlay.get(key)
+
+    def add(self, key, value):
+        """key 已存在时保持原来的 ID (同 dict.setdefault)"""
+        if not self.frozen:
+            self.hashes.append(stable_hash(key))
+            self.values.append(value)
+            self.keys.append(key)
+        elif self._find(key) is None:
+            self.overlay[key] = value
+
+    def get(self, key, default=None):
+        value = self._find(key)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __len__(self):
+        if not self.frozen:
+            self._sort()
+        return len(self.hashes) + len(self.overlay)
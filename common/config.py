@@ -0,0 +1,36 @@
+import json
+
+
+def configure(module, **settings):
+    """把配置写进脚本模块的常量 (和直接改它配置区里的值一样)；名字写错直接报错，不会被静默忽略"""
+    for name, value in settings.items():
+        if not hasattr(module, name):
+            raise AttributeError(f"{module.__name__} 没有配置项 {name}")
+        setattr(module, name, value)
+
+
+def load_config(path):
+    """
+    读 JSON 配置文件，返回 (options, sections)：
+      {"start_year": 2019, "end_year": 2025,         <- 小写的顶层键：和命令行参数同名，作为它们的默认值
+       "generate": {"OUTPUT_MODE": "batch"}}          <- 按子命令分组：直接写进对应脚本配置区的常量
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"配置文件顶层必须是对象: {path}")
+    options = {key: value for key, value in data.items() if not isinstance(value, dict)}
+    sections = {key: value for key, value in data.items() if isinstance(value, dict)}
+    return options, sections
+
+
+def parse_setting(text):
+    """'NAME=VALUE' -> (NAME, VALUE)；VALUE 按 JSON 解析 (数字 / true / null / 列表)，解析不了就当字符串"""
+    name, sep, raw = text.partition("=")
+    if not sep or not name.strip():
+        raise ValueError(f"配置项的格式应为 NAME=VALUE: {text}")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return name.strip(), value
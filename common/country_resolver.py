@@ -0,0 +1,93 @@
+import os
+import functools
+import collections
+
+from common.filmdb_dump import DEFAULT_DUMP_PATH, open_index
+
+# --- 配置区 ---
+# TMDB (ISO 3166-1) 代码和 filmdb countries 表不一致的地方。
+# 表里绝大多数是 ISO 代码的小写，这里只登记例外和历史代码；目标代码不在表里的别名会被忽略。
+COUNTRY_ALIASES = {
+    "ES": "sp",     # Spain
+    "UK": "gb",     # 非标准写法
+    "SU": "ru",     # Soviet Union
+    "XC": "cz",     # Czechoslovakia
+    "CS": "rs",     # Serbia and Montenegro
+    "YU": "rs",     # Yugoslavia
+    "XG": "de",     # East Germany
+    "DD": "de",     # East Germany (旧 ISO)
+    "BU": "mm",     # Burma
+    "ZR": "cd",     # Zaire
+}
+
+# 原始数据里没有出品国家时用的代码 (和以前的行为一致)
+DEFAULT_COUNTRY = 'us'
+
+
+def compile_country_map(db_codes, aliases=COUNTRY_ALIASES):
+    """数据库里的国家代码 + 别名 -> {TMDB 大写代码: 数据库代码} 查找表"""
+    lookup = {code.upper(): code for code in db_codes}
+    for iso, target in aliases.items():
+        if target in db_codes:
+            lookup[iso] = target
+    return lookup
+
+
+class CountryResolver:
+    """
+    TMDB 国家代码 -> filmdb countries 表里的代码。
+    查不到的代码返回 None 并记进 unmapped (次数 + 示例标题)，由调用方决定怎么处理、最后统一报告，
+    不再默认成小写或 'us' 导致导入时外键失败。
+    lookup 为 None (没有 dump) 时退回旧行为：别名优先，其余直接转小写。
+    """
+
+    def __init__(self, lookup=None, names=None):
+        self.lookup = lookup
+        self.names = names or {}
+        self.unmapped = collections.Counter()
+        self.examples = {}
+
+    def resolve(self, iso_code, example=None):
+        if not iso_code:
+            return DEFAULT_COUNTRY
+        code = iso_code.upper()
+        if self.lookup is None:
+            return COUNTRY_ALIASES.get(code, code.lower())
+        if code in self.lookup:
+            return self.lookup[code]
+        self.unmapped[code] += 1
+        if example is not None:
+            self.examples.setdefault(code, example)
+        return None
+
+    def kind(self, iso_code):
+        """'exact' (小写即可) / 'alias' (走别名表) / None (没有对应)"""
+        code = iso_code.upper()
+        target = (self.lookup or {}).get(code)
+        if target is None:
+            return None
+        return 'exact' if target == code.lower() else 'alias'
+
+    def report(self):
+        """未映射代码的报告: [(代码, 次数, 示例标题)]，按次数从多到少"""
+        return [(code, n, self.examples.get(code)) for code, n in self.unmapped.most_common()]
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled(dump_path):
+    conn = open_index(dump_path)
+    names = dict(conn.execute("SELECT country_code, country_name FROM countries"))
+    conn.close()
+    return compile_country_map(set(names)), names
+
+
+def load_country_resolver(dump_path=DEFAULT_DUMP_PATH):
+    """
+    从 filmdb 索引的 countries 表编译查找表 (同一进程里只编译一次)，每次返回新的 resolver (各自统计未映射代码)。
+    dump 不存在时返回退回旧行为的 resolver。
+    """
+    dump_path = os.path.normpath(dump_path)
+    if not os.path.exists(dump_path):
+        return CountryResolver()
+    lookup, names = _compiled(dump_path)
+    return CountryResolver(lookup, names)
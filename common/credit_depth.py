@@ -0,0 +1,31 @@
+"""
+每部电影导入哪些演职员。人员补全和 SQL 生成都读这里，补全的人正好就是要导入的人；
+抓取阶段在它自己的配置之外至少保留这么多，原始数据总能覆盖到。
+用 configure(credit_depth, ...) 或 cli.py 的 --set credits.NAME=VALUE 修改。
+"""
+
+# --- 配置区 ---
+MAX_CAST = 4                    # 前几位演员 ('A')，None = 全部；导演 ('D') 总是全部导入
+CREW_ROLES = {}                 # 幕后职位 -> credited_as (一个字符)，例如 {"Writer": "W", "Screenplay": "W", "Producer": "P"}
+
+
+def crew_role(job):
+    """幕后职位对应的 credited_as，不导入的职位 (包括单独处理的导演) 返回 None"""
+    return CREW_ROLES.get(job) if job != 'Director' else None
+
+
+def harvest_depth(max_cast, crew_jobs):
+    """抓取时实际保留的范围：脚本自己的配置和导入范围取并集，返回 (演员数, 幕后职位集合)"""
+    if max_cast is not None and MAX_CAST is not None:
+        max_cast = max(max_cast, MAX_CAST)
+    else:
+        max_cast = None
+    return max_cast, set(crew_jobs) | set(CREW_ROLES)
+
+
+def describe():
+    """当前导入范围的一句话说明，给各脚本的开场提示用，例如 '[导演] [前4位主演] [Writer/Screenplay]'"""
+    parts = ["[导演]", "[全部演员]" if MAX_CAST is None else f"[前{MAX_CAST}位主演]"]
+    if CREW_ROLES:
+        parts.append("[" + "/".join(sorted(CREW_ROLES)) + "]")
+    return " ".join(parts)
@@ -0,0 +1,220 @@
+import io
+import os
+import time
+import sqlite3
+
+from common.sql_format import TABLE_COLUMNS, TABLE_ORDER, copy_line, insert_sql, placeholders
+from common.filmdb_dump import sqlite_script
+from common import metrics
+
+# --- 配置区 ---
+DEFAULT_BATCH_SIZE = 5000
+# 目标库里已经用掉的最大 ID (新 ID 要从它后面开始分配)
+MAX_ID_SQL = "SELECT (SELECT COALESCE(MAX(movieid), 0) FROM movies), (SELECT COALESCE(MAX(peopleid), 0) FROM people)"
+
+
+class BufferedLoader:
+    """
+    直接导入数据库的后端的公共部分，接口和 SqlWriter 一样 (comment / statement / add / end_movie / close)，可以直接替换。
+    行按表攒在缓冲区，只在电影边界检查批次大小，落库时先执行 UPDATE / DELETE，再按外键顺序写三张表。
+    子类实现 _write(statements, buffers) 和 max_ids()。
+    on_commit: 数据真正提交以后调用 (比如把 ID 登记表存盘)，保证登记表和库里已经提交的行一致。
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, on_commit=None):
+        self.batch_size = batch_size
+        self.on_commit = on_commit
+        self.buffers = {table: [] for table in TABLE_ORDER}
+        self.statements = []
+        self.loaded = {table: 0 for table in TABLE_ORDER}
+        self.batches = 0
+        self.started_at = time.monotonic()
+
+    def comment(self, text):
+        pass
+
+    def statement(self, sql):
+        # 增量模式下的 UPDATE / DELETE，在下一批插入之前执行
+        self.statements.append(sql)
+
+    def add(self, table, row):
+        self.buffers[table].append(row)
+
+    def end_movie(self):
+        # 和 SqlWriter 一样只在电影边界落库，保证外键完整
+        if any(len(rows) >= self.batch_size for rows in self.buffers.values()):
+            self.flush()
+
+    def end_year(self):
+        # 按批次大小落库就够了，年份边界不需要额外处理
+        pass
+
+    def flush(self):
+        if not any(self.buffers.values()) and not self.statements:
+            return
+        with metrics.timer("load.flush"):
+            self._write(self.statements, self.buffers)
+
+        for table in TABLE_ORDER:
+            self.loaded[table] += len(self.buffers[table])
+            metrics.incr(f"load.{table}", len(self.buffers[table]))
+            self.buffers[table] = []
+        self.statements = []
+        self.batches += 1
+        self._report()
+
+    def _write(self, statements, buffers):
+        raise NotImplementedError
+
+    def max_ids(self):
+        """目标库里现有的 (最大 movieid, 最大 peopleid)"""
+        raise NotImplementedError
+
+    def _committed(self):
+        if self.on_commit is not None:
+            self.on_commit()
+
+    def _report(self):
+        total = sum(self.loaded.values())
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        detail = ", ".join(f"{t} {n}" for t, n in self.loaded.items())
+        print(f"  🚚 第 {self.batches} 批已写入: {detail} (共 {total} 行, {total / elapsed:.0f} 行/秒)")
+
+    def close(self):
+        self.flush()
+
+    def abort(self):
+        """生成过程出错时调用：丢掉还没落库的行 (可能只有半部电影)，不再写入"""
+        self.buffers = {table: [] for table in TABLE_ORDER}
+        self.statements = []
+
+
+class DbLoader(BufferedLoader):
+    """
+    直接把 movies / people / credits 导入 PostgreSQL/openGauss，每批落库后 commit 一次，并打印进度和速率。
+    - method='copy': 用 COPY FROM STDIN (最快)
+    - method='executemany': 参数化 INSERT，给不支持 COPY 的环境用
+    - method='prepared': 每个连接 PREPARE 一次 INSERT，再用 execute_batch 批量 EXECUTE (省掉每行的解析和规划)
+    已经提交的批次撤不回；每批提交后调用 on_commit，调用方据此保存 ID 登记表，重跑时不会重复分配这些 ID。
+    批次是一批接一批串行落库的，所以整个导入只用一个长连接 (连接池在这里帮不上忙)，预处理语句也只需要准备一次。
+    """
+
+    METHODS = ('copy', 'executemany', 'prepared')
+
+    def __init__(self, dsn, batch_size=DEFAULT_BATCH_SIZE, method='copy', on_commit=None):
+        if method not in self.METHODS:
+            raise ValueError(f"未知的导入方式: {method}")
+        try:
+            import psycopg2
+            import psycopg2.extras
+        except ImportError:
+            raise RuntimeError("直接入库需要 psycopg2 (pip install psycopg2-binary)")
+
+        super().__init__(batch_size, on_commit)
+        self.conn = psycopg2.connect(dsn)
+        self.extras = psycopg2.extras
+        self.method = method
+        self.prepared = set()       # 已经 PREPARE 过的表
+
+    def _copy(self, cur, table, rows):
+        buf = io.StringIO("".join(copy_line(row) for row in rows))
+        cur.copy_expert(f"COPY {table} ({', '.join(TABLE_COLUMNS[table])}) FROM STDIN", buf)
+
+    def _executemany(self, cur, table, rows):
+        cur.executemany(insert_sql(table, "format"), rows)
+
+    def _prepared(self, cur, table, rows):
+        if table not in self.prepared:
+            cur.execute(f"PREPARE load_{table} AS {insert_sql(table, 'numeric')}")
+            self.prepared.add(table)
+        sql = f"EXECUTE load_{table} ({placeholders(len(TABLE_COLUMNS[table]), 'format')})"
+        self.extras.execute_batch(cur, sql, rows, page_size=1000)
+
+    def _write(self, statements, buffers):
+        try:
+            with self.conn.cursor() as cur:
+                for sql in statements:
+                    cur.execute(sql)
+                for table in TABLE_ORDER:
+                    rows = buffers[table]
+                    if not rows: continue
+                    getattr(self, f"_{self.method}")(cur, table, rows)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._committed()
+
+    def max_ids(self):
+        with self.conn.cursor() as cur:
+            cur.execute(MAX_ID_SQL)
+            row = cur.fetchone()
+        self.conn.commit()
+        return row
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+    def abort(self):
+        super().abort()
+        # 每批都在 _write 里提交或回滚；关闭连接会回滚任何还开着的事务
+        self.conn.close()
+
+
+class SqliteLoader(BufferedLoader):
+    """
+    导入本地 SQLite 库：库文件不存在时先执行 filmdb.sql (本身就是 SQLite 的 dump) 建好原库，
+    然后打开外键约束，整次导入在同一个事务里用 executemany 批量插入，close() 时才 commit，出错整体回滚。
+    不需要数据库服务器就能本地跑完整的端到端导入 (包括主键 / 唯一 / 外键约束检查)。
+    """
+
+    def __init__(self, path, dump_path=None, batch_size=DEFAULT_BATCH_SIZE, on_commit=None):
+        super().__init__(batch_size, on_commit)
+        if not os.path.exists(path) and dump_path:
+            self._initialize(path, dump_path)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("BEGIN")
+
+    @staticmethod
+    def _initialize(path, dump_path):
+        """执行 dump 建库 (先写临时文件，成功了再换上去)"""
+        print(f"🔨 正在用 {os.path.basename(dump_path)} 初始化 {os.path.basename(path)} ...")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        conn.executescript(sqlite_script(dump_path))
+        conn.close()
+        os.replace(tmp_path, path)
+
+    def _write(self, statements, buffers):
+        for sql in statements:
+            self.conn.execute(sql)
+        for table in TABLE_ORDER:
+            if buffers[table]:
+                self.conn.executemany(insert_sql(table, "qmark"), buffers[table])
+
+    def max_ids(self):
+        return self.conn.execute(MAX_ID_SQL).fetchone()
+
+    def close(self):
+        try:
+            self.flush()
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.abort()
+            raise
+        self.conn.close()
+        self._committed()
+
+    def abort(self):
+        super().abort()
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
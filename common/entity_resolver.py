@@ -0,0 +1,226 @@
+import re
+import math
+import unicodedata
+import collections
+from array import array
+
+from common.compact_map import CompactKeyMap
+
+# --- 配置区 ---
+DEFAULT_THRESHOLD = 0.8         # 三元组 Jaccard 相似度阈值
+MIN_FUZZY_LENGTH = 6            # 太短的名字模糊匹配误伤太大，只做精确匹配
+
+PUNCT_RE = re.compile(r"[^\w\s]|_")
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """去重音、统一大小写、标点换成空格、合并空白：'Zoë  O'Brien' -> 'zoe o brien'"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKD', text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = PUNCT_RE.sub(" ", text.casefold())
+    return SPACE_RE.sub(" ", text).strip()
+
+
+def person_key(first, surname):
+    """按全名归一化：名/姓怎么拆分 (复姓、单名) 都得到同一个 key"""
+    return normalize(f"{first or ''} {surname or ''}")
+
+
+def movie_key(title_key, year):
+    return f"{year}|{title_key}"
+
+
+def trigrams(key):
+    """
+    三元组多重集：同一个三元组第 k 次出现记成 '三元组 + k'，
+    否则 'a0 b2020200' 和 'a0 b2020000' 这种只差重复片段的 key 会得到同一个集合。
+    """
+    padded = f"  {key} "
+    seen = collections.Counter()
+    grams = set()
+    for i in range(len(padded) - 2):
+        gram = padded[i:i + 3]
+        grams.add(f"{gram}{seen[gram]}")
+        seen[gram] += 1
+    return grams
+
+
+class TrigramIndex:
+    """
+    三元组倒排索引 + 前缀过滤：
+    Jaccard >= t 的候选一定和查询串最稀有的 |A| - ceil(t*|A|) + 1 个三元组中至少一个重合，
+    所以只需要查这几个 (最短的) 倒排表，不用扫全表。
+    存储是紧凑的：三元组编号成整数，每个 key 的三元组连续存在 grams 数组里 (offsets 记边界)，
+    倒排表是槽位号的 array('i')。不再给每个 key 常驻一个字符串集合 (那是整个解析器里最占内存的部分)。
+    同一个 key 重复 add 只是多占一个槽位，打分完全一样，不影响匹配结果。
+    group 用来分块 (人员按出生年份)：所有分块共用一套三元组编号和倒排表，只和同一 group 的 key 比较。
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.gram_ids = {}          # 三元组 -> 编号
+        self.postings = []          # 编号 -> 含有它的槽位 array('i')
+        self.keys = []              # 槽位 -> entity key
+        self.grams = array('i')     # 所有 key 的三元组编号，首尾相接
+        self.offsets = array('i', [0])  # 槽位 i 的三元组是 grams[offsets[i]:offsets[i + 1]]
+        self.groups = array('i')    # 槽位 -> group
+
+    def add(self, key, group=0):
+        slot = len(self.keys)
+        self.keys.append(key)
+        self.groups.append(group)
+        for g in trigrams(key):
+            gid = self.gram_ids.get(g)
+            if gid is None:
+                gid = self.gram_ids[g] = len(self.postings)
+                self.postings.append(array('i'))
+            self.postings[gid].append(slot)
+            self.grams.append(gid)
+        self.offsets.append(len(self.grams))
+
+    def best_match(self, key, accept=None, group=0):
+        """返回 (相似度, 匹配到的 key)，没有达到阈值的返回 (0, None)"""
+        grams = trigrams(key)
+        size = len(grams)
+        # 索引里没有的三元组倒排表为空，排在最前面，也算在前缀里
+        known = [self.gram_ids.get(g) for g in grams]
+        ordered = sorted(known, key=lambda gid: 0 if gid is None else len(self.postings[gid]))
+        prefix = size - math.ceil(self.threshold * size) + 1
+
+        candidates = set()
+        for gid in ordered[:prefix]:
+            if gid is not None:
+                candidates.update(self.postings[gid])
+
+        query = {gid for gid in known if gid is not None}
+        # 长度过滤：Jaccard >= t 要求 t*|A| <= |B| <= |A|/t
+        low, high = self.threshold * size, size / self.threshold
+        best = (0.0, None)
+        for slot in candidates:
+            start, end = self.offsets[slot], self.offsets[slot + 1]
+            if self.groups[slot] != group or not low <= end - start <= high:
+                continue
+            overlap = len(query.intersection(self.grams[start:end]))
+            score = overlap / (size + end - start - overlap)
+            cand = self.keys[slot]
+            if score >= self.threshold and score > best[0] and (accept is None or accept(cand)):
+                best = (score, cand)
+        return best
+
+
+class PeopleResolver:
+    """
+    人员实体解析：
+    1. 归一化全名精确匹配 (解决重音、大小写、标点、复姓拆分差异)
+    2. 三元组模糊匹配 (默认关闭)：只在双方出生年份都已知且相同时才接受，
+       所有模糊匹配都记在 fuzzy_matches 里，供人工复核
+    merge_people 里的 (id -> should_be_id) 作为已知别名，返回时统一换成规范 ID。
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, fuzzy=False):
+        self.by_key = CompactKeyMap()   # 归一化全名 -> peopleid
+        self.born = {}              # peopleid -> 出生年份
+        self.aliases = {}           # peopleid -> 规范 peopleid
+        self.fuzzy = fuzzy
+        self.index = TrigramIndex(threshold)     # 只收出生年份已知的人，以出生年份为 group
+        self.stats = collections.Counter()
+        self.fuzzy_matches = []     # [(查询的 key, 匹配到的 key, 相似度, peopleid)]
+
+    def canonical(self, pid):
+        seen = set()
+        while pid in self.aliases and pid not in seen:
+            seen.add(pid)
+            pid = self.aliases[pid]
+        return pid
+
+    def add_alias(self, pid, canonical_id):
+        self.aliases[pid] = canonical_id
+
+    def add(self, pid, first, surname, born=None):
+        key = person_key(first, surname)
+        if not key:
+            return
+        self.by_key.add(key, pid)
+        if born:
+            self.born.setdefault(pid, born)
+        if self.fuzzy and born and len(key) >= MIN_FUZZY_LENGTH:
+            self.index.add(key, born)
+
+    def resolve(self, first, surname, born=None):
+        key = person_key(first, surname)
+        if not key:
+            return None
+        pid = self.by_key.get(key)
+        if pid is not None:
+            self.stats["exact"] += 1
+            return self.canonical(pid)
+        # 生日未知时同名不同人太常见 (jerry lewis / jerry lee lewis)，不做模糊匹配
+        if not self.fuzzy or not born or len(key) < MIN_FUZZY_LENGTH:
+            return None
+
+        def born_ok(cand):
+            # 同一个 key 可能先被另一个生日的人占了
+            return self.born.get(self.by_key.get(cand)) == born
+
+        score, match = self.index.best_match(key, born_ok, group=born)
+        if match is None:
+            return None
+        self.stats["fuzzy"] += 1
+        pid = self.canonical(self.by_key.get(match))
+        self.fuzzy_matches.append((key, match, round(score, 3), pid))
+        return pid
+
+    def __len__(self):
+        return len(self.by_key)
+
+
+class MovieResolver:
+    """
+    电影实体解析：同一年内按归一化标题精确匹配。
+    不做模糊匹配：同一年里标题相近的不同电影并不少见 (My Best Friend's Girl / ...Girlfriend)，
+    误判会让新电影被当成已存在而整部丢掉。
+    """
+
+    def __init__(self):
+        self.by_key = CompactKeyMap()   # '年份|归一化标题' -> movieid
+        self.stats = collections.Counter()
+
+    def add(self, mid, title, year):
+        key = normalize(title)
+        if not key:
+            return
+        self.by_key.add(movie_key(key, year), mid)
+
+    def resolve(self, title, year):
+        key = normalize(title)
+        if not key:
+            return None
+        mid = self.by_key.get(movie_key(key, year))
+        if mid is not None:
+            self.stats["exact"] += 1
+        return mid
+
+    def __contains__(self, title_year):
+        return self.resolve(*title_year) is not None
+
+    def __len__(self):
+        return len(self.by_key)
+
+
+def build_resolvers(conn, threshold=DEFAULT_THRESHOLD, fuzzy=False):
+    """从 filmdb 索引 (common.filmdb_dump.open_index) 构建人员 / 电影解析器"""
+    people = PeopleResolver(threshold, fuzzy)
+    for pid, should_be_id in conn.execute("SELECT id, should_be_id FROM merge_people"):
+        people.add_alias(pid, should_be_id)
+    # 按 ID 顺序加入：同名时保留最小的 ID (和数据库 unique(surname, first_name) 一致)
+    for pid, first, surname, born in conn.execute(
+            "SELECT peopleid, first_name, surname, born FROM people ORDER BY peopleid"):
+        people.add(pid, first, surname, born)
+
+    movies = MovieResolver()
+    for mid, title, year in conn.execute("SELECT movieid, title, year_released FROM movies ORDER BY movieid"):
+        movies.add(mid, title, year or 0)
+    return people, movies
@@ -0,0 +1,196 @@
+import os
+import re
+import sqlite3
+
+# --- 配置区 ---
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DEFAULT_DUMP_PATH = os.path.join(ROOT_DIR, 'original_data', 'filmdb.sql')
+DEFAULT_INDEX_PATH = os.path.join(ROOT_DIR, 'cache', 'filmdb_index.sqlite')
+
+# 索引里保存的表和列 (顺序和 dump 里的 VALUES 一致)
+INDEX_TABLES = {
+    "countries": ("country_code", "country_name", "continent"),
+    "movies": ("movieid", "title", "country", "year_released", "runtime"),
+    "people": ("peopleid", "first_name", "surname", "born", "died", "gender"),
+    "credits": ("movieid", "peopleid", "credited_as"),
+    "merge_people": ("id", "should_be_id"),
+}
+INDEX_DDL = (
+    "CREATE INDEX idx_movies_title_year ON movies(title, year_released)",
+    "CREATE INDEX idx_people_name ON people(first_name, surname)",
+    "CREATE INDEX idx_credits_people ON credits(peopleid)",
+)
+# dump 格式或索引结构变化时改这个数字，旧索引会自动重建
+INDEX_VERSION = 1
+
+INSERT_RE = re.compile(r"^INSERT INTO (\w+) VALUES\((.*)\);$")
+# E'...' 里反斜杠是转义符 (\' 不结束字符串)，普通字符串里反斜杠就是它自己
+VALUE_RE = re.compile(r"E'((?:[^'\\]|''|\\.)*)'|'((?:[^']|'')*)'|(NULL)|(-?\d+\.\d+)|(-?\d+)")
+CREATE_RE = re.compile(r"^CREATE TABLE (\w+)\s*\((.*)\);$", re.S)
+# CREATE TABLE 里这些开头的不是列定义
+TABLE_CONSTRAINTS = {"primary", "unique", "foreign", "constraint", "check"}
+COLUMN_RE = re.compile(r"(\w+)\s*([\w()]+)?")
+# dump 里少数字符串是 PostgreSQL 的 E'...' 转义写法 (SQLite 不认识)
+ESCAPE_STRING_RE = re.compile(r"(?<=[(,])E'((?:[^'\\]|''|\\.)*)'")
+BACKSLASH_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "''"}
+BACKSLASH_RE = re.compile(r"\\(.)", re.S)
+
+
+def unescape_e_string(body):
+    """E'...' 的内容 -> 普通 SQL 字符串的内容 (反斜杠转义展开，单引号仍是 '' 的写法)"""
+    return BACKSLASH_RE.sub(lambda e: BACKSLASH_ESCAPES.get(e.group(1), e.group(1)), body)
+
+
+def parse_values(text):
+    """解析 VALUES(...) 括号里的内容：字符串 (含 E'...') / NULL / 整数 / 小数"""
+    values = []
+    for escaped, s, null, real, integer in VALUE_RE.findall(text):
+        if escaped:
+            values.append(unescape_e_string(escaped).replace("''", "'"))
+        elif null:
+            values.append(None)
+        elif integer:
+            values.append(int(integer))
+        elif real:
+            values.append(float(real))
+        else:
+            values.append(s.replace("''", "'"))
+    return values
+
+
+def iter_dump_rows(path=DEFAULT_DUMP_PATH, tables=None):
+    """流式读取 dump，逐条产出 (表名, 行)；tables 为 None 时产出所有表"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith("INSERT INTO "):
+                continue
+            m = INSERT_RE.match(line.rstrip('\n'))
+            if not m:
+                continue
+            table = m.group(1)
+            if tables is not None and table not in tables:
+                continue
+            yield table, parse_values(m.group(2))
+
+
+def split_top_level(text):
+    """按顶层逗号切分 (括号和引号里的逗号不算)"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def parse_create_table(statement):
+    """'CREATE TABLE t(a int not null, b varchar(30), primary key(a))' -> ('t', [('a', 'int'), ('b', 'varchar(30)')])"""
+    m = CREATE_RE.match(statement)
+    if not m:
+        return None, []
+    columns = []
+    for part in split_top_level(m.group(2)):
+        words = COLUMN_RE.match(part).groups()
+        if words[0].lower() in TABLE_CONSTRAINTS:
+            continue
+        columns.append((words[0], (words[1] or "").lower()))
+    return m.group(1), columns
+
+
+def iter_dump_tables(path=DEFAULT_DUMP_PATH):
+    """
+    单遍流式读取 dump，逐条产出 (表名, 列定义, 行)。
+    列定义 [(列名, 类型), ...] 来自前面的 CREATE TABLE (可能跨多行)，找不到时是 None。
+    """
+    schemas, pending = {}, None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if pending is not None or line.startswith("CREATE TABLE "):
+                pending = (pending or "") + line
+                if pending.rstrip().endswith(");"):
+                    table, columns = parse_create_table(" ".join(pending.split()))
+                    if table:
+                        schemas[table] = columns
+                    pending = None
+                continue
+            if not line.startswith("INSERT INTO "):
+                continue
+            m = INSERT_RE.match(line.rstrip('\n'))
+            if m:
+                yield m.group(1), schemas.get(m.group(1)), parse_values(m.group(2))
+
+
+def sqlite_script(path=DEFAULT_DUMP_PATH):
+    """读出整个 dump，把 E'...' 转义字符串改写成普通字符串，得到 SQLite 能直接 executescript 的脚本"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return ESCAPE_STRING_RE.sub(lambda m: f"'{unescape_e_string(m.group(1))}'", f.read())
+
+
+def _dump_signature(dump_path):
+    st = os.stat(dump_path)
+    return f"{INDEX_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def build_index(dump_path=DEFAULT_DUMP_PATH, index_path=DEFAULT_INDEX_PATH):
+    """解析一次 dump，写出 SQLite 索引 (先写临时文件再替换)"""
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp_path = index_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    for table, cols in INDEX_TABLES.items():
+        conn.execute(f"CREATE TABLE {table} ({', '.join(cols)})")
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    batches = {table: [] for table in INDEX_TABLES}
+    def flush(table):
+        cols = INDEX_TABLES[table]
+        conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(cols))})", batches[table])
+        batches[table] = []
+
+    for table, row in iter_dump_rows(dump_path, INDEX_TABLES):
+        batches[table].append(row)
+        if len(batches[table]) >= 10000:
+            flush(table)
+    for table in INDEX_TABLES:
+        flush(table)
+
+    for ddl in INDEX_DDL:
+        conn.execute(ddl)
+    conn.execute("INSERT INTO meta VALUES ('signature', ?)", (_dump_signature(dump_path),))
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, index_path)
+
+
+def _index_is_fresh(dump_path, index_path):
+    if not os.path.exists(index_path):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        conn.close()
+    except sqlite3.Error:
+        return False
+    return row is not None and row[0] == _dump_signature(dump_path)
+
+
+def open_index(dump_path=DEFAULT_DUMP_PATH, index_path=DEFAULT_INDEX_PATH):
+    """打开 (必要时先构建) dump 的 SQLite 索引，返回只读连接"""
+    if not _index_is_fresh(dump_path, index_path):
+        print(f"🔨 正在解析 {os.path.basename(dump_path)} 并构建索引 (只需一次)...")
+        build_index(dump_path, index_path)
+    conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA mmap_size = 268435456")
+    return conn
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+from common import metrics
+
+# --- 配置区 ---
+CACHE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache'))
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, 'tmdb_http_cache.sqlite')
+
+DEFAULT_TTL = 30 * 24 * 3600            # 详情类数据 30 天内认为有效
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024   # 缓存总大小上限 (压缩后)，超出按最久未访问淘汰
+# 命中时的访问时间先记在内存里，攒够这么多条 (或者遇到写入 / 淘汰 / close) 才一起写回并提交
+TOUCH_FLUSH_EVERY = 1000
+
+# 这些参数不影响响应内容，不参与计算 key
+IGNORED_PARAMS = {"api_key"}
+
+
+def make_cache_key(url, params=None):
+    """
+    按完整 URL (scheme + host + 路径) + 排序后的参数算一个内容地址 (sha256)。
+    host 要算进去：同一个缓存文件可能先后对着 mock 服务器和正式 API 用，同一路径的响应不能串。
+    """
+    parts = urlsplit(url)
+    url = f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}" if parts.netloc else url
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k not in IGNORED_PARAMS)
+    raw = json.dumps([url, items], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    基于 SQLite 的 HTTP 响应缓存，多线程共用一个连接 (加锁)。
+    响应体用 zlib 压缩后存储；读时检查 TTL，写时检查总大小并淘汰最久未访问的条目。
+    读命中不单独提交：访问时间攒在 touched 里，跟着下一次写入或 close() 一起落盘。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.touched = {}               # key -> 还没写回的访问时间
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, path TEXT NOT NULL, body BLOB NOT NULL,"
+            " size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url, params=None, ttl=None):
+        """url 是完整地址 (base_url + path)；命中返回解析好的 JSON，未命中或过期返回 None"""
+        key = make_cache_key(url, params)
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with metrics.timer("cache.get"), self.lock:
+            row = self.conn.execute("SELECT body, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > ttl:
+                self.misses += 1
+                metrics.incr("cache.miss")
+                return None
+            self.touched[key] = now
+            if len(self.touched) >= TOUCH_FLUSH_EVERY:
+                self._flush_touched()
+                self.conn.commit()
+            self.hits += 1
+            metrics.incr("cache.hit")
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def put(self, url, params, data):
+        key = make_cache_key(url, params)
+        body = zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        now = time.time()
+        with metrics.timer("cache.put"), self.lock:
+            self._flush_touched()
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, path, body, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url, body, len(body), now, now)
+            )
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def _flush_touched(self):
+        """把攒下的访问时间写回 (不提交，和调用方的写入一起提交)；淘汰前必须先写回，否则顺序不准"""
+        if self.touched:
+            self.conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                  [(at, key) for key, at in self.touched.items()])
+            metrics.incr("cache.touch_flush")
+            self.touched = {}
+
+    def _evict(self):
+        """淘汰最久未访问的条目，直到总大小降到上限的 90%"""
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+        doomed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            doomed.append((key,))
+            self.total_bytes -= size
+        metrics.incr("cache.evicted", len(doomed))
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def purge_expired(self):
+        """删掉所有过期条目，返回删除的条数"""
+        with self.lock:
+            self._flush_touched()
+            cur = self.conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self.conn.commit()
+            return cur.rowcount
+
+    def close(self):
+        with self.lock:
+            self._flush_touched()
+            self.conn.commit()
+            self.conn.close()
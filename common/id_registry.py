@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+
+def content_hash(values):
+    """对一条记录的内容算哈希，用来判断两次运行之间是否有变化"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class IdRegistry:
+    """
+    TMDB ID -> 数据库 ID 的持久化映射，外加新 ID 的高水位线。
+    - movies / people 表: tmdb_id -> (db_id, content_hash, origin)
+      origin='new' 表示是我们插入的，origin='dump' 表示复用的原库记录 (不会去 UPDATE)
+    - 我们插入的人还记下姓名键 (first, surname, born)：原库索引里没有他们，
+      下次运行要靠它把同名的新 TMDB 人员解析到同一个 peopleid (people 表上有姓名唯一约束)
+    - 启动时整表读进字典，save() 时在一个事务里把本次改动写回；
+      同一次运行可以多次 save (直接入库时每批提交后都存一次)，用的是同一个 run_id
+    path=None 时只存在内存里 (非增量模式)。
+    """
+
+    def __init__(self, path=None, next_movie_id=1, next_people_id=1):
+        self.path = path
+        self.movies = {}
+        self.people = {}
+        self.person_keys = {}           # tmdb_id -> (first, surname, born)，只有 origin='new' 的人
+        self.dirty_movies = set()
+        self.dirty_people = set()
+        self.next_movie_id = next_movie_id
+        self.next_people_id = next_people_id
+        self.last_run = 0
+        self.run_id = None
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        for table in ("movies", "people"):
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " tmdb_id INTEGER PRIMARY KEY, db_id INTEGER NOT NULL,"
+                " content_hash TEXT, origin TEXT NOT NULL, run_id INTEGER NOT NULL)"
+            )
+        # 旧版登记表没有 name_key 列
+        if "name_key" not in {row[1] for row in conn.execute("PRAGMA table_info(people)")}:
+            conn.execute("ALTER TABLE people ADD COLUMN name_key TEXT")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, created_at REAL, note TEXT)")
+        return conn
+
+    def _load(self):
+        conn = self._connect()
+        for table, target in (("movies", self.movies), ("people", self.people)):
+            for tmdb_id, db_id, h, origin in conn.execute(f"SELECT tmdb_id, db_id, content_hash, origin FROM {table}"):
+                target[tmdb_id] = (db_id, h, origin)
+        for tmdb_id, key in conn.execute("SELECT tmdb_id, name_key FROM people WHERE name_key IS NOT NULL"):
+            self.person_keys[tmdb_id] = tuple(json.loads(key))
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        conn.close()
+        # 高水位只升不降：配置里的起点更大时以配置为准
+        self.next_movie_id = max(self.next_movie_id, meta.get("next_movie_id", 0))
+        self.next_people_id = max(self.next_people_id, meta.get("next_people_id", 0))
+        self.last_run = meta.get("last_run", 0)
+
+    def reserve(self, max_movie_id, max_people_id):
+        """目标库里已经用到的最大 ID：高水位至少要在它们后面，返回是否被抬高了"""
+        raised = max_movie_id >= self.next_movie_id or max_people_id >= self.next_people_id
+        self.next_movie_id = max(self.next_movie_id, max_movie_id + 1)
+        self.next_people_id = max(self.next_people_id, max_people_id + 1)
+        return raised
+
+    # --- 电影 ---
+    def movie(self, tmdb_id):
+        """返回 (db_id, content_hash, origin) 或 None"""
+        return self.movies.get(tmdb_id)
+
+    def allocate_movie(self):
+        mid = self.next_movie_id
+        self.next_movie_id += 1
+        return mid
+
+    def set_movie(self, tmdb_id, db_id, h, origin='new'):
+        self.movies[tmdb_id] = (db_id, h, origin)
+        self.dirty_movies.add(tmdb_id)
+
+    # --- 人员 ---
+    def person(self, tmdb_id):
+        return self.people.get(tmdb_id)
+
+    def allocate_person(self):
+        pid = self.next_people_id
+        self.next_people_id += 1
+        return pid
+
+    def set_person(self, tmdb_id, db_id, h, origin='new', key=None):
+        """key: 我们插入的人的 (first, surname, born)"""
+        self.people[tmdb_id] = (db_id, h, origin)
+        if key is not None:
+            self.person_keys[tmdb_id] = tuple(key)
+        self.dirty_people.add(tmdb_id)
+
+    def inserted_people(self):
+        """以前的运行插入过的人: [(db_id, first, surname, born)]，用来补进姓名解析器"""
+        return [(self.people[tmdb_id][0], *key) for tmdb_id, key in self.person_keys.items()]
+
+    def _key_json(self, tmdb_id):
+        key = self.person_keys.get(tmdb_id)
+        return json.dumps(key, ensure_ascii=False) if key is not None else None
+
+    def save(self, note=""):
+        """把本次运行的改动写回磁盘 (一个事务)，返回本次的 run_id"""
+        if not self.path:
+            return None
+        if self.run_id is None:
+            self.run_id = self.last_run + 1
+        run_id = self.run_id
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO movies (tmdb_id, db_id, content_hash, origin, run_id) VALUES (?, ?, ?, ?, ?)",
+                [(k, *self.movies[k], run_id) for k in self.dirty_movies]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO people (tmdb_id, db_id, content_hash, origin, run_id, name_key) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(k, *self.people[k], run_id, self._key_json(k)) for k in self.dirty_people]
+            )
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ("next_movie_id", self.next_movie_id),
+                ("next_people_id", self.next_people_id),
+                ("last_run", run_id),
+            ])
+            conn.execute("INSERT OR REPLACE INTO runs (run_id, created_at, note) VALUES (?, ?, ?)",
+                         (run_id, time.time(), note))
+        conn.close()
+        self.dirty_movies.clear()
+        self.dirty_people.clear()
+        return run_id
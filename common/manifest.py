@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import hashlib
+
+from common.id_registry import content_hash
+
+MANIFEST_VERSION = 1
+
+
+class BatchManifest:
+    """
+    记录输出 SQL 里每个批次 (一条多行 INSERT / 一个 COPY 块 / 逐行模式下一年的某张表) 的内容哈希。
+    每行先算 content_hash，批次哈希是本批所有行哈希的 sha1，所以内容和顺序都一样时哈希就一样：
+    下游导入时可以跳过哈希没变的批次，CI 比较两次运行也只需要比清单。
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.open = {}              # table -> [行数, sha1, 第一行主键, 最后一行主键]
+
+    def add(self, table, row):
+        """往 table 当前未结束的批次里加一行"""
+        entry = self.open.get(table)
+        if entry is None:
+            entry = self.open[table] = [0, hashlib.sha1(), row[0], None]
+        entry[0] += 1
+        entry[1].update(content_hash(row).encode('ascii'))
+        entry[3] = row[0]
+
+    def close_batch(self, table):
+        entry = self.open.pop(table, None)
+        if entry is None:
+            return
+        rows, h, first, last = entry
+        self.batches.append({"table": table, "rows": rows, "first": first, "last": last, "hash": h.hexdigest()})
+
+    def close_all(self):
+        for table in list(self.open):
+            self.close_batch(table)
+
+    def add_batch(self, table, rows):
+        """一次写出的整批行 (batch / copy 模式)"""
+        for row in rows:
+            self.add(table, row)
+        self.close_batch(table)
+
+    def digest(self):
+        """整份输出的哈希"""
+        h = hashlib.sha1()
+        for batch in self.batches:
+            h.update(batch["hash"].encode('ascii'))
+        return h.hexdigest()
+
+
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(path, manifest, **meta):
+    """写出清单 (原子替换)，返回写出的内容"""
+    data = dict(meta, version=MANIFEST_VERSION, digest=manifest.digest(),
+                batches=[dict(batch, seq=i) for i, batch in enumerate(manifest.batches)])
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    return data
+
+
+def diff_manifests(old, new):
+    """比较两份清单，返回 {"unchanged": n, "changed": [新清单里变化的批次], "removed": n}"""
+    old_hashes = {(b["table"], b["hash"]) for b in old.get("batches", [])}
+    new_hashes = {(b["table"], b["hash"]) for b in new.get("batches", [])}
+    return {
+        "unchanged": len(old_hashes & new_hashes),
+        "changed": [b for b in new.get("batches", []) if (b["table"], b["hash"]) not in old_hashes],
+        "removed": len(old_hashes - new_hashes),
+    }
+
+
+if __name__ == "__main__":
+    # python -m common.manifest old.manifest.json new.manifest.json
+    old, new = load_manifest(sys.argv[1]), load_manifest(sys.argv[2])
+    if old.get("digest") == new.get("digest"):
+        print("✅ 两次输出完全一致")
+        sys.exit(0)
+    diff = diff_manifests(old, new)
+    print(f"未变批次 {diff['unchanged']}, 新增/变化 {len(diff['changed'])}, 消失 {diff['removed']}")
+    for b in diff["changed"]:
+        print(f"  #{b['seq']} {b['table']}: {b['rows']} 行 ({b['first']} .. {b['last']})")
+    sys.exit(1)
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import random
+import threading
+import contextlib
+
+# --- 配置区 ---
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DEFAULT_REPORT_DIR = os.path.join(ROOT_DIR, 'cache', 'reports')
+MAX_SAMPLES = 10000             # 每个直方图最多保留的样本数 (水库抽样，分位数是近似值)
+
+
+class Histogram:
+    """耗时 / 数值分布：精确的次数、总和、最大值 + 水库抽样估计分位数"""
+
+    def __init__(self, rng):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+        self.rng = rng
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            i = self.rng.randrange(self.count)
+            if i < MAX_SAMPLES:
+                self.samples[i] = value
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+        return {"count": self.count, "total": round(self.total, 6),
+                "mean": round(self.total / self.count, 6) if self.count else 0.0,
+                "p50": round(pct(0.50), 6), "p95": round(pct(0.95), 6), "p99": round(pct(0.99), 6),
+                "max": round(self.max, 6)}
+
+
+class Metrics:
+    """
+    进程内的计数器 + 直方图，多线程共用 (加锁)。
+    名字用点分隔，例如 'http.movie.latency'、'generate.dedup'；
+    timer() 记录的是秒，报告里每个直方图给出 count / total / mean / p50 / p95 / p99 / max。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rng = random.Random(0)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started_at = time.time()
+            self.started = time.monotonic()
+
+    def incr(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        with self.lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram(self.rng)
+            hist.observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def report(self, **meta):
+        with self.lock:
+            return dict(meta,
+                        started_at=self.started_at,
+                        elapsed=round(time.monotonic() - self.started, 3),
+                        counters=dict(sorted(self.counters.items())),
+                        histograms={k: h.summary() for k, h in sorted(self.histograms.items())})
+
+    def write_report(self, name, report_dir=DEFAULT_REPORT_DIR, **meta):
+        """写出 JSON 运行报告 {report_dir}/{name}.json (原子替换)，返回路径"""
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"{name}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(name=name, **meta), f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        print(f"📈 运行报告 -> {path}")
+        return path
+
+
+# 默认的全局实例，各模块直接用下面这几个函数
+METRICS = Metrics()
+incr = METRICS.incr
+observe = METRICS.observe
+timer = METRICS.timer
+report = METRICS.report
+write_report = METRICS.write_report
+reset = METRICS.reset
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+
+from common import metrics
+
+# 新格式是 JSON Lines (一行一部电影)；旧的 JSON 数组文件仍然可以读
+JSONL_PATTERN = 'raw_movies_data_{}.jsonl'
+LEGACY_PATTERN = 'raw_movies_data_{}.json'
+
+CHUNK_SIZE = 64 * 1024
+
+
+def find_movie_file(raw_dir, year):
+    """返回某一年的原始数据文件路径 (优先 .jsonl)，都不存在返回 None"""
+    for pattern in (JSONL_PATTERN, LEGACY_PATTERN):
+        path = os.path.join(raw_dir, pattern.format(year))
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """增量解析 [ {...}, {...} ] 格式的文件，一次只在内存里保留一个分块"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # 跳过空白、逗号和开头的 '['
+        while pos < len(buf) and buf[pos] in ' \t\r\n,[':
+            if buf[pos] == '[':
+                if started:
+                    break
+                started = True
+            pos += 1
+
+        if pos < len(buf) and buf[pos] == ']':
+            return
+
+        if pos < len(buf):
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                obj, end = None, None
+            # 解析成功且后面还有内容，才能确定这个对象是完整的
+            if end is not None and (end < len(buf) or eof):
+                yield obj
+                pos = end
+                continue
+            if eof:
+                raise ValueError(f"JSON 数组在第 {pos} 个字符附近损坏")
+
+        if eof:
+            # 和 json.load 一样：没有结尾的 ']' 说明文件被截断了，不能当成读完
+            raise ValueError("JSON 数组没有结束 (文件被截断?)")
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def iter_json_lines(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_movies(path):
+    """逐条产出一个文件里的电影记录，自动识别 JSON Lines / JSON 数组"""
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == '[':
+            yield from iter_json_array(f)
+        else:
+            yield from iter_json_lines(f)
+
+
+def iter_movies_by_year(raw_dir, years):
+    """按年份顺序逐条产出 (year, movie)，缺失的年份直接跳过 (每条的读取解析耗时记在 scan.parse)"""
+    for year in years:
+        path = find_movie_file(raw_dir, year)
+        if path is None:
+            continue
+        movies = iter_movies(path)
+        while True:
+            start = time.perf_counter()
+            movie = next(movies, None)
+            if movie is None:
+                break
+            metrics.observe("scan.parse", time.perf_counter() - start)
+            yield year, movie
+
+
+def write_json_lines(path, records):
+    """原子写出 JSON Lines 文件 (先写临时文件再替换)，返回写入的条数"""
+    count = 0
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return count
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import sqlite3
+
+# 状态：ok = 查到了 (born/died 可能为 NULL，表示 TMDB 上没有记录)
+#       missing = TMDB 上没有这个人 (404)
+#       failed = 重试用尽仍然失败，下次运行会重新查
+DONE_STATUSES = ('ok', 'missing')
+
+
+class PeopleStore:
+    """
+    SQLite 版的人员详情库 (替代整份重写的 people_details_map JSON)。
+    - 写入先攒在当前事务里，commit() 只提交新增的行，代价和新记录数成正比
+    - WAL + 事务提交是原子的，进程在任何时刻崩溃都不会损坏已提交的数据
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS people ("
+            " tmdb_id INTEGER PRIMARY KEY, born INTEGER, died INTEGER,"
+            " status TEXT NOT NULL, detail TEXT, updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.pending = 0
+
+    def __len__(self):
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM people WHERE status IN {DONE_STATUSES}").fetchone()[0]
+
+    def is_empty(self):
+        """库里一条记录都没有 (包括 failed)"""
+        return self.conn.execute("SELECT 1 FROM people LIMIT 1").fetchone() is None
+
+    def done_ids(self):
+        """已经有结论的 ID (ok / missing)，断点续传时跳过"""
+        return {row[0] for row in self.conn.execute(
+            f"SELECT tmdb_id FROM people WHERE status IN {DONE_STATUSES}")}
+
+    def failed(self):
+        return dict(self.conn.execute("SELECT tmdb_id, detail FROM people WHERE status = 'failed'"))
+
+    def put(self, pid, result, status='ok'):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO people (tmdb_id, born, died, status, detail, updated_at) VALUES (?, ?, ?, ?, NULL, ?)",
+            (int(pid), result.get('born'), result.get('died'), status, time.time())
+        )
+        self.pending += 1
+
+    def put_failed(self, pid, reason):
+        # 已经有结论的不要被失败覆盖
+        self.conn.execute(
+            "INSERT INTO people (tmdb_id, born, died, status, detail, updated_at) VALUES (?, NULL, NULL, 'failed', ?, ?) "
+            "ON CONFLICT(tmdb_id) DO UPDATE SET detail = excluded.detail, updated_at = excluded.updated_at "
+            f"WHERE status NOT IN {DONE_STATUSES}",
+            (int(pid), reason, time.time())
+        )
+        self.pending += 1
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def load_map(self):
+        """返回和旧 JSON 一样的结构: {"tmdb_id": {"born": ..., "died": ...}}"""
+        return {str(pid): {"born": born, "died": died} for pid, born, died in self.conn.execute(
+            f"SELECT tmdb_id, born, died FROM people WHERE status IN {DONE_STATUSES}")}
+
+    def import_json(self, json_path):
+        """
+        把旧的 people_details_map JSON 导进来 (只在库为空时做一次)，返回 (ok 条数, failed 条数)。
+        旧 JSON 里请求失败和 "TMDB 上没有记录" 都写成 born/died 为 null，分不出来：
+        这些记成 failed，下次运行重新查一遍，查到了就变成 ok。
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+        retry = 0
+        for pid, result in legacy.items():
+            if not result or (result.get('born') is None and result.get('died') is None):
+                self.put_failed(pid, "legacy: born/died 均为空")
+                retry += 1
+            else:
+                self.put(pid, result, 'ok')
+        self.commit()
+        return len(legacy) - retry, retry
+
+    def export_json(self, json_path):
+        """导出成旧格式 JSON (原子替换)，给还在读 JSON 的工具用"""
+        tmp_path = json_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.load_map(), f)
+        os.replace(tmp_path, json_path)
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
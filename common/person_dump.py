@@ -0,0 +1,40 @@
+import re
+import gzip
+import json
+
+ID_RE = re.compile(rb'"id"\s*:\s*(\d+)')
+
+
+def person_years(data):
+    """TMDB /person 响应 -> {"born": 年份, "died": 年份} (没有记录就是 None)"""
+    b_day = data.get('birthday')
+    d_day = data.get('deathday')
+    born = int(b_day[:4]) if b_day else None
+    died = int(d_day[:4]) if d_day else None
+    return {"born": born, "died": died}
+
+
+def open_dump(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def scan_person_dump(path, target_ids):
+    """
+    顺序扫描一份人员 dump (JSON Lines，可以是 .gz)，逐条产出 (tmdb_id, {"born", "died"})。
+    每行是一个 /person 响应 (至少包含 id / birthday / deathday)。
+    先用正则取 id，不在 target_ids 里的行不做 JSON 解析。
+    没有 birthday 字段的行 (例如 TMDB 官方每日导出的 person_ids 文件只有 id 和 name)
+    不算命中，留给逐个查询。
+    """
+    with open_dump(path) as f:
+        for line in f:
+            m = ID_RE.search(line)
+            if not m or int(m.group(1)) not in target_ids:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            if 'birthday' not in data:
+                continue
+            yield data['id'], person_years(data)
@@ -0,0 +1,31 @@
+import time
+
+from common.movie_stream import iter_movies_by_year
+
+
+class MovieScan:
+    """
+    对原始电影数据只做一次流式扫描，每条记录依次交给所有注册的消费者。
+    消费者是 callable(year, movie)，比如国家统计、人员 ID 收集、SQL 精简记录收集，
+    这样几个阶段共享同一次 JSON 解析，不用各自重新读一遍文件。
+    """
+
+    def __init__(self, raw_dir, years):
+        self.raw_dir = raw_dir
+        self.years = years
+        self.consumers = []
+
+    def register(self, consumer):
+        self.consumers.append(consumer)
+        return consumer
+
+    def run(self):
+        """扫描一遍，返回处理的电影条数"""
+        started = time.monotonic()
+        count = 0
+        for year, m in iter_movies_by_year(self.raw_dir, self.years):
+            for consumer in self.consumers:
+                consumer(year, m)
+            count += 1
+        print(f"🔎 共享扫描完成: {count} 部电影, {len(self.consumers)} 个阶段, 用时 {time.monotonic() - started:.1f}s")
+        return count
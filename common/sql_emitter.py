@@ -0,0 +1,104 @@
+from common.sql_format import DIALECTS, TABLE_COLUMNS, TABLE_ORDER, sql_literal, copy_line, values_tuple, insert_sql
+from common.manifest import BatchManifest
+from common import metrics
+
+# 每种方言支持的输出格式：
+# 'insert':   一行一条 INSERT
+# 'batch':    多行 VALUES，每条语句最多 batch_size 行
+# 'copy':     COPY ... FROM STDIN 数据块 (PostgreSQL/openGauss 导入最快)
+# 'prepared': 每年开头 PREPARE 一次参数化的 INSERT，之后每行 EXECUTE (只解析一次语句)
+OUTPUT_MODES = {
+    "postgres": ("insert", "batch", "copy", "prepared"),
+    "sqlite": ("insert", "batch"),
+}
+
+
+class SqlWriter:
+    """
+    按输出格式把三张表的行写成 SQL 脚本。
+    batch / copy 模式下先攒在缓冲区，只在一部电影写完时检查是否需要落盘，
+    落盘时按外键顺序写，保证 credits 不会先于它引用的电影/人出现。
+    """
+
+    def __init__(self, f, mode="insert", batch_size=1000, manifest=None, dialect="postgres"):
+        if dialect not in DIALECTS:
+            raise ValueError(f"未知的 SQL 方言: {dialect}")
+        if mode not in OUTPUT_MODES[dialect]:
+            raise ValueError(f"{dialect} 不支持输出格式 {mode} (可选: {', '.join(OUTPUT_MODES[dialect])})")
+        self.f = f
+        self.mode = mode
+        self.dialect = dialect
+        self.batch_size = batch_size
+        self.buffers = {table: [] for table in TABLE_ORDER}
+        self.prepared = set()
+        self.manifest = manifest if manifest is not None else BatchManifest()
+
+    def comment(self, text):
+        # 注释只在逐行模式下有意义
+        if self.mode in ("insert", "prepared"):
+            self.f.write(f"-- {text}\n")
+
+    def statement(self, sql):
+        # UPDATE / DELETE 直接写出：它们只涉及以前运行插入的行，和缓冲区里的新行没有先后依赖
+        self.f.write(f"{sql};\n")
+        self.manifest.add("statements", (sql,))
+
+    def add(self, table, row):
+        if self.mode == "insert":
+            with metrics.timer("generate.write"):
+                self.manifest.add(table, row)
+                cols = ", ".join(TABLE_COLUMNS[table])
+                values = ", ".join(sql_literal(v, self.dialect) for v in row)
+                self.f.write(f"INSERT INTO {table} ({cols}) VALUES ({values});\n")
+        elif self.mode == "prepared":
+            with metrics.timer("generate.write"):
+                if table not in self.prepared:
+                    self.f.write(f"PREPARE ins_{table} AS {insert_sql(table, 'numeric')};\n")
+                    self.prepared.add(table)
+                self.manifest.add(table, row)
+                self.f.write(f"EXECUTE ins_{table} {values_tuple(row, self.dialect)};\n")
+        else:
+            self.buffers[table].append(row)
+
+    def end_movie(self):
+        if self.mode in ("insert", "prepared"):
+            self.f.write("\n")
+        elif any(len(rows) >= self.batch_size for rows in self.buffers.values()):
+            self.flush()
+
+    def end_year(self):
+        # 年份边界也落盘，这样按年份分片渲染和串行输出完全一样
+        if self.mode in ("batch", "copy"):
+            self.flush()
+        # 预处理语句也按年份释放，每年的片段都能单独执行
+        for table in sorted(self.prepared):
+            self.f.write(f"DEALLOCATE ins_{table};\n")
+        self.prepared.clear()
+        self.manifest.close_all()
+
+    def flush(self):
+        with metrics.timer("generate.write"):
+            self._flush()
+
+    def _flush(self):
+        for table in TABLE_ORDER:
+            rows = self.buffers[table]
+            if not rows: continue
+            cols = ", ".join(TABLE_COLUMNS[table])
+            if self.mode == "copy":
+                self.f.write(f"COPY {table} ({cols}) FROM STDIN;\n")
+                for row in rows:
+                    self.f.write(copy_line(row))
+                self.f.write("\\.\n\n")
+                self.manifest.add_batch(table, rows)
+            else:
+                for start in range(0, len(rows), self.batch_size):
+                    chunk = rows[start:start + self.batch_size]
+                    values = ",\n".join(values_tuple(row, self.dialect) for row in chunk)
+                    self.f.write(f"INSERT INTO {table} ({cols}) VALUES\n{values};\n\n")
+                    self.manifest.add_batch(table, chunk)
+            self.buffers[table] = []
+
+    def close(self):
+        self.end_year()
+
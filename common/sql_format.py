@@ -0,0 +1,64 @@
+# --- filmdb 中本项目会写入的表 ---
+TABLE_COLUMNS = {
+    "movies": ("movieid", "title", "country", "year_released", "runtime"),
+    "people": ("peopleid", "first_name", "surname", "born", "died", "gender"),
+    "credits": ("movieid", "peopleid", "credited_as"),
+}
+# 外键顺序：先电影和人，再 credits
+TABLE_ORDER = ("movies", "people", "credits")
+
+# 支持的 SQL 方言：PostgreSQL/openGauss 和 SQLite (filmdb.sql 本身就是 SQLite 风格的 dump)
+DIALECTS = ("postgres", "sqlite")
+# 参数占位符风格 (DB-API paramstyle)：psycopg2 用 format，sqlite3 用 qmark，PREPARE 语句用 numeric
+PARAM_STYLES = {"format": "%s", "qmark": "?"}
+
+
+# 所有字面量转义都在这里：生成的 SQL 文件、COPY 数据和各个导入后端共用
+def safe_str(text):
+    if text is None: return "NULL"
+    # 单引号加倍；PostgreSQL 的 text 不能包含 NUL，SQLite 遇到 NUL 会截断，统一去掉
+    clean = str(text).replace("\x00", "").replace("'", "''")
+    return f"'{clean}'"
+
+def sql_literal(value, dialect="postgres"):
+    """Python 值 -> SQL 字面量"""
+    if value is None: return "NULL"
+    if isinstance(value, bool):
+        if dialect == "sqlite": return "1" if value else "0"
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int): return str(value)
+    if isinstance(value, float): return repr(value)
+    return safe_str(value)
+
+def copy_field(value):
+    """Python 值 -> COPY text 格式的字段 (\\N 表示 NULL)"""
+    if value is None: return "\\N"
+    text = str(value).replace("\x00", "")
+    return (text.replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+
+def copy_line(row):
+    return "\t".join(copy_field(v) for v in row) + "\n"
+
+def values_tuple(row, dialect="postgres"):
+    return "(" + ", ".join(sql_literal(v, dialect) for v in row) + ")"
+
+def placeholders(count, style):
+    """参数占位符：format -> %s, %s；qmark -> ?, ?；numeric -> $1, $2"""
+    if style == "numeric":
+        return ", ".join(f"${i}" for i in range(1, count + 1))
+    return ", ".join([PARAM_STYLES[style]] * count)
+
+def insert_sql(table, style):
+    """参数化的单行 INSERT"""
+    cols = TABLE_COLUMNS[table]
+    return f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders(len(cols), style)})"
+
+def update_sql(table, row, dialect="postgres"):
+    """按主键 (第一列) 更新整行"""
+    cols = TABLE_COLUMNS[table]
+    sets = ", ".join(f"{c} = {sql_literal(v, dialect)}" for c, v in zip(cols[1:], row[1:]))
+    return f"UPDATE {table} SET {sets} WHERE {cols[0]} = {sql_literal(row[0], dialect)}"
+
+def delete_sql(table, column, value, dialect="postgres"):
+    return f"DELETE FROM {table} WHERE {column} = {sql_literal(value, dialect)}"
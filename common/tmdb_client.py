@@ -0,0 +1,214 @@
+import os
+import re
+import time
+import threading
+
+from common import metrics
+
+# --- 配置区 ---
+# 可以通过环境变量指向本地的 stub 服务器做测试
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+
+# TMDB 目前的限额大约是 ~50 req/s，这里留一点余量
+DEFAULT_RATE = 40.0             # 每秒放行的请求数
+DEFAULT_BURST = 20              # 令牌桶容量 (允许的瞬时突发)
+DEFAULT_POOL_SIZE = 16          # 连接池大小 (= 最大并发数)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 10
+
+ID_SEGMENT_RE = re.compile(r"/\d+")
+
+
+def load_tmdb_env():
+    """
+    读 .env，返回 (api_key, base_url)。只在真正要访问 TMDB 时调用：
+    dotenv / requests 都推迟到这时才导入，generate 这类离线命令启动时完全不碰 HTTP 相关的包。
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("TMDB_API_KEY"), os.getenv("TMDB_BASE_URL", TMDB_BASE_URL)
+
+
+def endpoint_name(path):
+    """'/movie/123/credits' -> 'movie.{id}.credits'，用作指标名 (按 endpoint 统计，不按具体 ID)"""
+    return ID_SEGMENT_RE.sub("/{id}", path).strip("/").replace("/", ".")
+
+
+class TokenBucket:
+    """线程安全的令牌桶：平均每秒放行 rate 个请求，最多攒 capacity 个"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """拿到一个令牌才返回，返回值是为此等待的秒数"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                    self.tokens = 0.0
+                    self.updated_at = self.blocked_until
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """收到 429 后让所有线程一起让出 seconds 秒 (多个线程同时 429 不会叠加)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class AimdLimiter:
+    """
+    AIMD 自适应并发上限：成功一次加 1/limit (大约每轮 +1)，被 429 时减半。
+    同一轮里连续的 429 只减半一次 (cooldown 内不重复惩罚)。
+    """
+
+    def __init__(self, initial, minimum=1, maximum=None, cooldown=1.0):
+        self.value = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.cooldown = cooldown
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def limit(self):
+        return max(self.minimum, int(self.value))
+
+    def on_success(self):
+        with self.lock:
+            self.value = min(self.maximum, self.value + 1.0 / max(self.value, 1.0))
+
+    def on_throttle(self):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_decrease >= self.cooldown:
+                self.value = max(self.minimum, self.value / 2)
+                self.last_decrease = now
+
+
+class TMDBResponse:
+    """单次请求的结果 (status=None 表示连接层面的错误)"""
+
+    def __init__(self, status, data=None, retry_after=None):
+        self.status = status
+        self.data = data
+        self.retry_after = retry_after
+
+    @property
+    def ok(self):
+        return self.status == 200
+
+
+def parse_retry_after(value, default=1.0):
+    """Retry-After 头可能是秒数，也可能缺失；解析不了就用默认值"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class TMDBClient:
+    """
+    带连接池 + 令牌桶限流的 TMDB 客户端，可以被多个线程同时使用。
+    - fetch(): 只发一次请求，把状态码原样交给调用方
+    - get_json(): 自动处理 429 (按 Retry-After 等待) / 5xx / 网络错误 的重试
+    传入 cache (ResponseCache) 时，成功的响应会落盘，命中缓存的请求不消耗令牌。
+    """
+
+    def __init__(self, api_key, base_url=TMDB_BASE_URL, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES, timeout=DEFAULT_TIMEOUT,
+                 cache=None):
+        self.api_key = api_key
+        self.cache = cache
+        self.base_url = base_url.rstrip('/')
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.request_error = requests.RequestException
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, path, params=None, ttl=None):
+        endpoint = endpoint_name(path)
+        url = f"{self.base_url}{path}"
+        if self.cache is not None:
+            cached = self.cache.get(url, params, ttl)
+            if cached is not None:
+                metrics.incr(f"http.{endpoint}.cache_hit")
+                return TMDBResponse(200, cached)
+
+        query = {"api_key": self.api_key}
+        if params:
+            query.update(params)
+
+        # 限流等待和真正的网络耗时分开记
+        metrics.observe("http.rate_wait", self.bucket.acquire())
+        start = time.perf_counter()
+        try:
+            res = self.session.get(url, params=query, timeout=self.timeout)
+        except self.request_error:
+            metrics.incr(f"http.{endpoint}.error")
+            return TMDBResponse(None)
+        finally:
+            metrics.observe(f"http.{endpoint}.latency", time.perf_counter() - start)
+        metrics.incr(f"http.{endpoint}.status.{res.status_code}")
+
+        if res.status_code == 200:
+            try:
+                data = res.json()
+            except ValueError:
+                return TMDBResponse(None)
+            if self.cache is not None:
+                self.cache.put(url, params, data)
+            return TMDBResponse(200, data)
+        if res.status_code == 429:
+            return TMDBResponse(429, retry_after=parse_retry_after(res.headers.get("Retry-After")))
+        return TMDBResponse(res.status_code)
+
+    def get_json(self, path, params=None, ttl=None):
+        """成功返回解析后的 JSON，404 或重试用尽返回 None；ttl 覆盖缓存默认有效期"""
+        for attempt in range(self.max_retries + 1):
+            res = self.fetch(path, params, ttl)
+            if res.ok:
+                return res.data
+            if res.status == 429:
+                # 整个桶一起暂停，而不是每个线程各睡各的
+                self.bucket.pause(res.retry_after)
+                continue
+            if res.status is not None and res.status < 500:
+                return None  # 404 之类，重试也没用
+            delay = min(2 ** attempt * 0.5, 10)
+            metrics.observe("http.backoff", delay)
+            time.sleep(delay)
+        return None
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
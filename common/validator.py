@@ -0,0 +1,155 @@
+import operator
+import itertools
+import collections
+
+from common.sql_format import TABLE_COLUMNS, TABLE_ORDER
+
+# --- 配置区 ---
+MAX_EXAMPLES = 5                # 每类问题在报告里最多列几行
+
+# filmdb.sql 的 CREATE TABLE 里的约束 (本项目会写入的三张表)
+NOT_NULL = {
+    "movies": ("movieid", "title", "country", "year_released"),
+    "people": ("peopleid", "surname", "born", "gender"),
+    "credits": ("movieid", "peopleid", "credited_as"),
+}
+MAX_LENGTH = {
+    ("movies", "title"): 100,
+    ("movies", "country"): 2,
+    ("people", "first_name"): 30,
+    ("people", "surname"): 30,
+    ("people", "gender"): 1,
+    ("credits", "credited_as"): 1,
+}
+# 主键 / 唯一约束 (people 的 unique 里 first_name 为 NULL 的行不参与比较，和数据库一致)
+UNIQUE_KEYS = {
+    "movies": (("movieid",), ("title", "country", "year_released")),
+    "people": (("peopleid",), ("surname", "first_name")),
+    "credits": (("movieid", "peopleid", "credited_as"),),
+}
+
+
+def load_dump_state(conn):
+    """从 filmdb 索引 (common.filmdb_dump.open_index) 读出校验要用到的键集合 (键都是元组，和 UNIQUE_KEYS 对应)"""
+    def keys(sql):
+        return set(conn.execute(sql))
+
+    return {
+        "countries": {code for code, in conn.execute("SELECT country_code FROM countries")},
+        "movies": {
+            ("movieid",): keys("SELECT movieid FROM movies"),
+            ("title", "country", "year_released"): keys("SELECT title, country, year_released FROM movies"),
+        },
+        "people": {
+            ("peopleid",): keys("SELECT peopleid FROM people"),
+            ("surname", "first_name"): keys(
+                "SELECT surname, first_name FROM people WHERE first_name IS NOT NULL"),
+        },
+        "credits": {
+            ("movieid", "peopleid", "credited_as"): keys("SELECT movieid, peopleid, credited_as FROM credits"),
+        },
+    }
+
+
+class BatchValidator:
+    """
+    接口和 SqlWriter 一样，调用原样转给里面的 writer，同时把插入的行按表、按列收集起来。
+    生成完以后 check() 用整列的集合运算对照 filmdb.sql 的状态检查整批数据：
+    NOT NULL、长度、主键 / 唯一约束 (批内重复和与原库冲突)、到 countries / movies / people 的外键，
+    再加上 born = 0 这类数据质量问题。所有问题一次报告出来，不用等 psql 执行到一半才失败。
+    """
+
+    def __init__(self, writer=None):
+        self.writer = writer
+        self.columns = {table: {col: [] for col in TABLE_COLUMNS[table]} for table in TABLE_ORDER}
+
+    def attach(self, writer):
+        self.writer = writer
+        return self
+
+    def comment(self, text):
+        self.writer.comment(text)
+
+    def statement(self, sql):
+        # UPDATE / DELETE 只涉及已有的行，不在这里校验
+        self.writer.statement(sql)
+
+    def add(self, table, row):
+        for column, value in zip(self.columns[table].values(), row):
+            column.append(value)
+        self.writer.add(table, row)
+
+    def end_movie(self):
+        self.writer.end_movie()
+
+    def end_year(self):
+        self.writer.end_year()
+
+    def close(self):
+        self.writer.close()
+
+    def keys(self, table, names):
+        return list(zip(*(self.columns[table][name] for name in names)))
+
+    def check(self, state, known_movie_ids=(), known_people_ids=()):
+        """
+        state: load_dump_state 的结果。known_*_ids: 以前的运行已经插入过的 ID (增量模式)，只用来满足外键。
+        返回问题列表 [{"check", "table", "severity", "count", "examples"}]，severity 为 error 的会让导入失败。
+        """
+        problems = []
+
+        def report(check, table, mask, severity="error"):
+            # 只按下标取出有问题的行 (全量演职员时 credits 有几十万行，不为整表拼元组)
+            columns = list(self.columns[table].values())
+            bad = list(itertools.compress(range(len(columns[0])), mask))
+            if bad:
+                examples = [tuple(column[i] for column in columns) for i in bad[:MAX_EXAMPLES]]
+                problems.append({"check": check, "table": table, "severity": severity,
+                                 "count": len(bad), "examples": examples})
+
+        def member_mask(values, allowed):
+            return map(allowed.__contains__, values)
+
+        for table, names in NOT_NULL.items():
+            for name in names:
+                column = self.columns[table][name]
+                if column.count(None):
+                    report(f"{name} not null", table, map(operator.is_, column, itertools.repeat(None)))
+
+        for (table, name), limit in MAX_LENGTH.items():
+            column = self.columns[table][name]
+            report(f"length({name}) <= {limit}", table,
+                   [value is not None and len(str(value)) > limit for value in column])
+
+        for table, constraints in UNIQUE_KEYS.items():
+            for names in constraints:
+                keys = self.keys(table, names)
+                label = ", ".join(names)
+                counts = collections.Counter(keys)
+                dupes = {key for key, n in counts.items() if n > 1 and None not in key}
+                if dupes:
+                    report(f"unique({label}) 批内重复", table, member_mask(keys, dupes))
+                existing = set(counts) & state[table].get(names, set())
+                if existing:
+                    report(f"unique({label}) 原库已存在", table, member_mask(keys, existing))
+
+        country = self.columns["movies"]["country"]
+        missing = set(country) - state["countries"] - {None}
+        if missing:
+            report("country -> countries", "movies", member_mask(country, missing))
+
+        for name, table in (("movieid", "movies"), ("peopleid", "people")):
+            refs = self.columns["credits"][name]
+            targets = {key for key, in state[table][(name,)]} | set(self.columns[table][name])
+            targets |= set(known_movie_ids if table == "movies" else known_people_ids)
+            missing = set(refs) - targets - {None}
+            if missing:
+                report(f"{name} -> {table}", "credits", member_mask(refs, missing))
+
+        born = self.columns["people"]["born"]
+        if born.count(0):
+            report("born = 0 (生日未知)", "people", map(operator.eq, born, itertools.repeat(0)), "warning")
+        died = self.columns["people"]["died"]
+        report("died < born", "people",
+               [b is not None and d is not None and 0 < d < b for b, d in zip(born, died)], "warning")
+        return problems
@@ -1,77 +1,91 @@
-import requests
-import json
-import time
 import os
+import sys
 import math
-from dotenv import load_dotenv
+import itertools
+import concurrent.futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.tmdb_client import TMDBClient, load_tmdb_env
+from common.http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from common.checkpoint import CheckpointJournal
+from common.movie_stream import JSONL_PATTERN, write_json_lines
+from common import credit_depth, metrics
 
 # --- 配置区 ---
-load_dotenv()
-API_KEY = os.getenv("TMDB_API_KEY")
+API_KEY = None                  # None 时读环境变量 / .env 里的 TMDB_API_KEY
+BASE_URL = None                 # None 时读环境变量 TMDB_BASE_URL，默认官方地址
 START_YEAR = 2019               # 起始年份
 END_YEAR = 2019                 # 结束年份
 MOVIES_PER_YEAR = 250           # 每年目标抓取数量 (Top 250)
 
+# 演职员深度：全量时原始文件和人员数量会放大 10-50 倍，下游都是逐部电影流式处理的
+# 这里是在导入范围 (common/credit_depth.py) 之外多留的部分，实际保留两者的并集
+MAX_CAST = 10                   # 保留前几位演员，None = 全部
+CREW_JOBS = ()                  # 导演总是保留；另外要保留的幕后职位，例如 ('Writer', 'Screenplay', 'Producer')
+
+# 限流 & 并发 (令牌桶保证不超过 TMDB 的限额，不再需要手动 sleep)
+REQUESTS_PER_SECOND = 40
+MAX_WORKERS = 16
+MAX_IN_FLIGHT = None            # 每年最多同时提交的详情请求，None = MAX_WORKERS * 2；一次全提交的话，没来得及写进日志的响应会堆在内存里
+
+# 分年份输出：True 时每年单独写一个 raw_movies_data_{year}.jsonl，多个年份同时抓
+# False 时沿用旧行为，所有年份写进以 END_YEAR 命名的一个文件
+PER_YEAR_SHARDS = True
+YEAR_WORKERS = 4                # 同时处理的年份数 (总速率仍受令牌桶限制)
+
+# 本地响应缓存 (和 people_info_enricher 共用)；重跑时已下载过的详情直接读本地
+USE_CACHE = True
+CACHE_PATH = DEFAULT_CACHE_PATH
+DISCOVER_CACHE_TTL = 24 * 3600  # 排行榜每天都在变，只缓存一天
+
 # 获取路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_FILE = os.path.join(current_dir, '..', 'raw_data', f'raw_movies_data_{END_YEAR}.json')
-OUTPUT_FILE = os.path.normpath(OUTPUT_FILE)
+RAW_DATA_DIR = os.path.normpath(os.path.join(current_dir, '..', 'raw_data'))
+SHARD_PATTERN = JSONL_PATTERN      # JSON Lines：一行一部电影，下游可以流式读取
+OUTPUT_FILE = None                 # PER_YEAR_SHARDS = False 时的输出；None 表示 RAW_DATA_DIR 下以 END_YEAR 命名的文件
 
-def get_movies_by_year_paginated(year, target_count):
-    movie_ids = []
+# 断点日志：每抓完一部就追加一行 JSON，崩溃后重跑只补抓缺的 ID
+CHECKPOINT_DIR = None              # None 表示 RAW_DATA_DIR/.checkpoints
+
+def make_client():
+    api_key, base_url = load_tmdb_env()
+    cache = ResponseCache(CACHE_PATH) if USE_CACHE else None
+    return TMDBClient(API_KEY or api_key, base_url=BASE_URL or base_url, rate=REQUESTS_PER_SECOND, pool_size=MAX_WORKERS, cache=cache)
+
+def get_movies_by_year_paginated(client, executor, year, target_count):
     max_pages = math.ceil(target_count / 20)
     
     print(f"  - 正在获取 {year} 年的 ID 列表，需扫描 {max_pages} 页...")
     
-    base_url = "https://api.themoviedb.org/3/discover/movie"
-    
-    for page in range(1, max_pages + 1):
+    def fetch_page(page):
         params = {
-            "api_key": API_KEY,
             "primary_release_year": year,
             "sort_by": "popularity.desc",
             "page": page
         }
-        try:
-            res = requests.get(base_url, params=params, timeout=10)
-            if res.status_code == 200:
-                new_ids = [m['id'] for m in res.json().get('results', [])]
-                movie_ids.extend(new_ids)
-                # 如果已经凑够了，就提前退出
-                if len(movie_ids) >= target_count:
-                    break
-            else:
-                print(f"    ! 第 {page} 页获取失败 (Code: {res.status_code})")
-            
-            # 翻页稍微停顿一下
-            time.sleep(0.2)
-            
-        except Exception as e:
-            print(f"    ! 连接错误: {e}")
+        data = client.get_json("/discover/movie", params, ttl=DISCOVER_CACHE_TTL)
+        if data is None:
+            print(f"    ! 第 {page} 页获取失败")
+            return []
+        return [m['id'] for m in data.get('results', [])]
+    
+    # 所有页一起发出去，executor.map 按页码顺序返回，排名不会乱
+    movie_ids = []
+    for new_ids in executor.map(fetch_page, range(1, max_pages + 1)):
+        movie_ids.extend(new_ids)
             
     # 截取前 target_count 个
     return movie_ids[:target_count]
 
-def get_full_details(movie_id):
-    """获取详情 + 演职员表"""
-    url = f"https://api.themoviedb.org/3/movie/{movie_id}"
-    params = {"api_key": API_KEY, "append_to_response": "credits"}
-    try:
-        res = requests.get(url, params=params, timeout=10)
-        if res.status_code == 200:
-            return res.json()
-        elif res.status_code == 429: # 触发限流
-            print("    ! 触发限流 (429)，暂停 3 秒...")
-            time.sleep(3)
-            return get_full_details(movie_id) # 重试
-    except Exception:
-        pass
-    return None
+def get_full_details(client, movie_id):
+    """获取详情 + 演职员表 (429 / 网络错误的重试交给 client)"""
+    return client.get_json(f"/movie/{movie_id}", {"append_to_response": "credits"})
 
 def clean_data(raw):
     if not raw: return None
     
     credits = raw.get("credits", {})
+    max_cast, crew_jobs = credit_depth.harvest_depth(MAX_CAST, CREW_JOBS)
     
     # --- 辅助函数：给人员信息“抽脂” ---
     def minify_person(p):
@@ -81,17 +95,21 @@ def clean_data(raw):
             "gender": p.get("gender") # 1=女, 2=男
         }
 
-    # --- 1. 处理 Cast (前10) ---
+    # --- 1. 处理 Cast (前 max_cast 位) ---
     raw_cast = credits.get("cast", [])
-    # 只取前10，并且只保留关键字段
-    clean_cast = [minify_person(p) for p in raw_cast[:10]]
+    # TMDB 的 cast 已经按 order 排好，只保留关键字段
+    clean_cast = [minify_person(p) for p in raw_cast[:max_cast]]
     
-    # --- 2. 处理 Crew (只找导演) ---
+    # --- 2. 处理 Crew (导演单独放，其他职位按 crew_jobs 保留) ---
     raw_crew = credits.get("crew", [])
-    # 找到所有导演
-    directors = [p for p in raw_crew if p.get('job') == 'Director']
-    # 清洗字段
-    clean_directors = [minify_person(p) for p in directors]
+    clean_directors = []
+    clean_crew = []
+    for p in raw_crew:
+        job = p.get('job')
+        if job == 'Director':
+            clean_directors.append(minify_person(p))
+        elif job in crew_jobs:
+            clean_crew.append({**minify_person(p), "job": job})
     
     # --- 3. 处理国家 ---
     countries = raw.get("origin_country", [])
@@ -99,6 +117,12 @@ def clean_data(raw):
         countries = [c["iso_3166_1"] for c in raw["production_countries"]]
 
     # --- 4. 组装最终结果 ---
+    clean_credits = {
+        "cast": clean_cast,       # 已经是瘦身版
+        "directors": clean_directors # 这里直接叫 directors 更清晰
+    }
+    if clean_crew:
+        clean_credits["crew"] = clean_crew
     return {
         "id": raw.get("id"),
         "title": raw.get("title"),
@@ -106,59 +130,95 @@ def clean_data(raw):
         "release_date": raw.get("release_date"),
         "runtime": raw.get("runtime"),
         "origin_country": countries, 
-        "credits": {
-            "cast": clean_cast,       # 已经是瘦身版
-            "directors": clean_directors # 这里直接叫 directors 更清晰
-        }
+        "credits": clean_credits
     }
 
-def main():
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(current_dir, OUTPUT_FILE)
+def harvest_year(client, executor, year):
+    """
+    抓取一年的数据，返回 (按人气排名依次读出电影的生成器, 断点日志)。
+    断点日志里已经有的 ID 不会再请求；生成器要在 journal.remove() 之前读完。
+    """
+    # 1. 先把这一年的 ID 全拿到
+    with metrics.timer("fetch.discover"):
+        ids = get_movies_by_year_paginated(client, executor, year, MOVIES_PER_YEAR)
     
-    total_years = END_YEAR - START_YEAR + 1
-    total_movies_saved = 0
+    checkpoint_dir = CHECKPOINT_DIR or os.path.join(RAW_DATA_DIR, '.checkpoints')
+    journal = CheckpointJournal(os.path.join(checkpoint_dir, f'raw_movies_data_{year}.jsonl'))
+    with journal:
+        todo = [m_id for m_id in ids if m_id not in journal]
+        print(f"  > [{year}] 找到 {len(ids)} 部电影 (断点日志已有 {len(ids) - len(todo)} 部)，开始并发下载剩余详情...")
+        
+        # 2. 并发下载详情，谁先完成谁先写进日志；最多 MAX_IN_FLIGHT 个在路上，
+        #    写完日志的 future 随即丢掉，内存里不会攒下整年的原始响应
+        metrics.incr("fetch.resumed", len(ids) - len(todo))
+        with metrics.timer("fetch.details"):
+            pending = iter(todo)
+            limit = MAX_IN_FLIGHT or MAX_WORKERS * 2
+            in_flight = set()
+            finished = 0
+            while True:
+                for m_id in itertools.islice(pending, limit - len(in_flight)):
+                    in_flight.add(executor.submit(get_full_details, client, m_id))
+                if not in_flight:
+                    break
+                done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    finished += 1
+                    if finished % 50 == 0 or finished == len(todo):
+                        print(f"    [{year}] {finished}/{len(todo)} ...")
+                    
+                    clean = clean_data(future.result())
+                    if clean:
+                        journal.append(clean)
+                        metrics.incr("fetch.movies")
+                    else:
+                        metrics.incr("fetch.failed")
+    
+    # 3. 按排名顺序从日志里流式读回
+    return journal.records(ids), journal
+
+def harvest_year_shard(client, executor, year):
+    """抓取一年的数据，写入这一年自己的分片文件"""
+    path = os.path.join(RAW_DATA_DIR, SHARD_PATTERN.format(year))
+    movies, journal = harvest_year(client, executor, year)
+    count = write_json_lines(path, movies)
+    journal.remove()
+    print(f"  ✅ {year} 年完成: {count} 部 -> {path}")
+    return count
+
+def main():
+    years = range(START_YEAR, END_YEAR + 1)
+    output_file = OUTPUT_FILE or os.path.join(RAW_DATA_DIR, SHARD_PATTERN.format(END_YEAR))
+    os.makedirs(RAW_DATA_DIR, exist_ok=True)
     
     print(f"🚀 开始抓取 {START_YEAR}-{END_YEAR} 年间每年的 Top {MOVIES_PER_YEAR} 电影")
-    print(f"📁 结果将保存至: {output_path}")
+    if PER_YEAR_SHARDS:
+        print(f"📁 每年一个分片，保存至: {os.path.join(RAW_DATA_DIR, SHARD_PATTERN.format('{year}'))}")
+    else:
+        print(f"📁 结果将保存至: {output_file}")
     print("-" * 50)
     
-    # 'w' 模式打开文件，准备流式写入
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("[\n")
-        is_first_entry = True
-        
-        for year in range(START_YEAR, END_YEAR + 1):
-            print(f"\n📅 正在处理年份: {year}")
-            
-            # 1. 先把这一年的 ID 全拿到
-            ids = get_movies_by_year_paginated(year, MOVIES_PER_YEAR)
-            print(f"  > 找到 {len(ids)} 部电影，开始下载详情...")
-            
-            # 2. 逐个下载详情
-            for idx, m_id in enumerate(ids):
-                # 打印进度条
-                print(f"\r    [{idx+1}/{len(ids)}] Fetching ID: {m_id} ...   ", end="")
-                
-                full_data = get_full_details(m_id)
-                clean = clean_data(full_data)
-                
-                if clean:
-                    if not is_first_entry:
-                        f.write(",\n")
-                    json.dump(clean, f, ensure_ascii=False)
-                    is_first_entry = False
-                    total_movies_saved += 1
-                
-                # 稍微休息，防止过于频繁
-                time.sleep(0.1)
-                
-            print("") # 这一年结束后换行
-            
-        f.write("\n]")
+    client = make_client()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    
+    # 所有年份共用一个 client (同一个令牌桶)，总速率不会超过限额
+    with client, executor:
+        if PER_YEAR_SHARDS:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=YEAR_WORKERS) as year_pool:
+                counts = year_pool.map(lambda y: harvest_year_shard(client, executor, y), years)
+                total_movies_saved = sum(counts)
+        else:
+            results = [harvest_year(client, executor, y) for y in years]
+            movies = itertools.chain.from_iterable(m for m, _ in results)
+            total_movies_saved = write_json_lines(output_file, movies)
+            for _, journal in results:
+                journal.remove()
         
     print("-" * 50)
+    if client.cache is not None:
+        print(f"💾 缓存命中 {client.cache.hits} 次，未命中 {client.cache.misses} 次")
     print(f"\n✅ 任务完成！共保存 {total_movies_saved} 部电影。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    metrics.write_report("getter")
@@ -1,134 +1,246 @@
-import json
-import requests
 import time
 import os
-import concurrent.futures
-from dotenv import load_dotenv
+import sys
+import heapq
+import random
+import collections
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.tmdb_client import TMDBClient, AimdLimiter, load_tmdb_env
+from common.http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from common.movie_stream import iter_movies_by_year
+from common.people_store import PeopleStore
+from common.person_dump import person_years, scan_person_dump
+from common import credit_depth, metrics
 
 # --- 配置区 ---
-load_dotenv()
-API_KEY = os.getenv("TMDB_API_KEY")
+API_KEY = None                  # None 时读环境变量 / .env 里的 TMDB_API_KEY
+BASE_URL = None                 # None 时读环境变量 TMDB_BASE_URL，默认官方地址
 
-# 的 7 年数据文件名
-FILE_PATTERN = 'raw_movies_data_{}.json' 
+# 原始数据目录 (raw_movies_data_{year}.jsonl / 旧版 .json 都能读)
+RAW_DATA_DIR = '../raw_data'
 START_YEAR = 2019
 END_YEAR = 2019
-OUTPUT_FILE = '../raw_data/people_details_map_tst.json'
+# 人员详情库 (SQLite，增量提交，崩溃安全)
+STORE_FILE = '../raw_data/people_details.sqlite'
+# 旧版 JSON 结果：库为空时自动导入一次；EXPORT_JSON 为 True 时结束后再导出一份
+OUTPUT_FILE = '../raw_data/people_details_map.json'
+EXPORT_JSON = False
+CHECKPOINT_EVERY = 200          # 每多少条提交一次
 
-# 只留前 N 个主演
-MAX_CAST_ORDER = 4
+# 批量数据源：本地的人员 dump (JSON Lines，可以 gzip 压缩，每行一个 /person 响应)
+# 设置后先顺序扫描一遍 dump，只有 dump 里没有的人才逐个调用 API
+PEOPLE_DUMP_FILE = None         # 例如 '../raw_data/person_dump.jsonl.gz'
 
-# 并发数量 (TMDB 建议不要超过 20)
+# 并发数量上限 (TMDB 建议不要超过 20)；实际并发按 429 的情况自适应 (AIMD)
 MAX_WORKERS = 12
+MIN_WORKERS = 1
+REQUESTS_PER_SECOND = 40
+
+# 重试队列：限流 / 网络错误的 ID 按指数退避重新排队
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 0.5              # 第 n 次重试等待 BACKOFF_BASE * 2^n 秒 (带随机抖动)
+BACKOFF_MAX = 30
+
+# 本地响应缓存 (和 getter 共用同一个文件)
+USE_CACHE = True
+CACHE_PATH = DEFAULT_CACHE_PATH
 
-def get_person_details_safe(person_id):
+def make_client():
+    api_key, base_url = load_tmdb_env()
+    cache = ResponseCache(CACHE_PATH) if USE_CACHE else None
+    return TMDBClient(API_KEY or api_key, base_url=BASE_URL or base_url, rate=REQUESTS_PER_SECOND, pool_size=MAX_WORKERS,
+                      timeout=5, cache=cache)
+
+def get_person_details_safe(client, person_id):
     """
-    单个查询函数，增加了简单的重试逻辑
+    单个查询函数 (优先读本地缓存)，返回 (person_id, status, result)：
+    - 'ok':        查到了，result = {"born": ..., "died": ...} (没有生日记录就是 None)
+    - 'missing':   TMDB 上没有这个人 (404)，result 同样是空的 born/died
+    - 'throttled': 被限流 (429)，result 是建议等待的秒数
+    - 'error':     网络错误 / 5xx，result 为 None
     """
-    url = f"https://api.themoviedb.org/3/person/{person_id}"
-    params = {"api_key": API_KEY}
-    try:
-        res = requests.get(url, params=params, timeout=5)
-        if res.status_code == 200:
-            data = res.json()
-            b_day = data.get('birthday')
-            d_day = data.get('deathday')
-            born = int(b_day[:4]) if b_day else None
-            died = int(d_day[:4]) if d_day else None
-            return (person_id, {"born": born, "died": died}) # 返回元组
-            
-        elif res.status_code == 429:
-            # 如果被限流，稍微睡一下并返回 None (让主程序决定是否重试，这里简化为放弃)
-            time.sleep(1)
-            return (person_id, None) 
-            
-    except Exception:
-        pass
-    return (person_id, {"born": None, "died": None}) # 出错当做空处理
+    res = client.fetch(f"/person/{person_id}")
+    if res.ok:
+        return (person_id, 'ok', person_years(res.data))
+    if res.status == 404:
+        return (person_id, 'missing', {"born": None, "died": None})
+    if res.status == 429:
+        return (person_id, 'throttled', res.retry_after)
+    return (person_id, 'error', None)
 
-def main():
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(current_dir, OUTPUT_FILE)
+def backoff_delay(attempt, retry_after=0):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return max(retry_after, delay) * random.uniform(0.8, 1.2)
+
+def fetch_all(client, ids_to_fetch, on_result):
+    """
+    带重试队列和 AIMD 自适应并发的批量查询。
+    每个有结论的结果调用一次 on_result(pid, status, result)；返回 {pid: 最后一次失败的状态}。
+    """
+    limiter = AimdLimiter(MAX_WORKERS, minimum=MIN_WORKERS, maximum=MAX_WORKERS)
+    queue = collections.deque(ids_to_fetch)
+    retry_heap = []             # (可以重试的时间点, pid)
+    attempts = collections.Counter()
+    failed = {}
+    in_flight = {}
+    done_count = 0
+    total = len(ids_to_fetch)
+
+    import concurrent.futures       # 只有真的要查 API 时才用得到，run-all 之类的离线运行不导入
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while queue or retry_heap or in_flight:
+            # 1. 到点的重试放回队列
+            now = time.monotonic()
+            while retry_heap and retry_heap[0][0] <= now:
+                queue.append(heapq.heappop(retry_heap)[1])
+
+            # 2. 按当前并发上限补充任务
+            while queue and len(in_flight) < limiter.limit:
+                pid = queue.popleft()
+                in_flight[executor.submit(get_person_details_safe, client, pid)] = pid
+
+            if not in_flight:
+                time.sleep(max(0.0, retry_heap[0][0] - time.monotonic()))
+                continue
+
+            # 3. 收结果
+            finished, _ = concurrent.futures.wait(
+                in_flight, timeout=0.5, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                del in_flight[future]
+                pid, status, result = future.result()
+                metrics.incr(f"enrich.{status}")
+
+                if status in ('ok', 'missing'):
+                    limiter.on_success()
+                    failed.pop(pid, None)
+                    on_result(pid, status, result)
+                    done_count += 1
+                    if done_count % 10 == 0 or done_count == total:
+                        print(f"[{done_count}/{total}] 已处理... (并发 {limiter.limit}, "
+                              f"待重试 {len(retry_heap)}, 失败 {len(failed)})", end="\r")
+                    continue
+
+                retry_after = 0
+                if status == 'throttled':
+                    limiter.on_throttle()
+                    client.bucket.pause(result)
+                    retry_after = result
+
+                attempts[pid] += 1
+                if attempts[pid] >= MAX_ATTEMPTS:
+                    failed[pid] = status
+                else:
+                    metrics.incr("enrich.retry")
+                    heapq.heappush(retry_heap, (time.monotonic() + backoff_delay(attempts[pid], retry_after), pid))
+    return failed
+
+def collect_person_ids(m, target_person_ids):
+    """从一条电影记录里挑出要导入的人员 ID (范围见 common/credit_depth.py)，加进 target_person_ids"""
+    credits = m.get('credits', {})
     
-    # --- 阶段 1: 扫描文件，筛选核心 ID ---
-    print("扫描文件，筛选 [导演] 和 [前4位主演]...")
-    target_person_ids = set()
+    # 1. 筛选演员：只取列表里的前 n 个
+    # 注意：raw_data 里保留的演员可能比导入的多 (cast[:10])，这里按导入范围再切一次
+    current_cast = credits.get('cast', [])
+    for p in current_cast[:credit_depth.MAX_CAST]:
+        if p.get('id'): target_person_ids.add(p['id'])
     
-    for year in range(START_YEAR, END_YEAR + 1):
-        file_name = FILE_PATTERN.format(year)
-        file_path = os.path.join(current_dir, '../raw_data', file_name)
-        
-        if not os.path.exists(file_path): continue
-            
-        with open(file_path, 'r', encoding='utf-8') as f:
-            movies = json.load(f)
-            
-        for m in movies:
-            credits = m.get('credits', {})
-            
-            # 1. 筛选演员：只取列表里的前 n 个
-            # 注意：我们的 raw_data 已经是 cast[:10] 了，这里再切片一次 cast[:4]
-            current_cast = credits.get('cast', [])
-            for p in current_cast[:MAX_CAST_ORDER]:
-                if p.get('id'): target_person_ids.add(p['id'])
-            
-            # 2. 筛选导演：全部保留
-            # 兼容不同版本的 key ('directors' 或 'crew')
-            directors = credits.get('directors', []) or [x for x in credits.get('crew', []) if x.get('job') == 'Director']
-            for p in directors:
-                if p.get('id'): target_person_ids.add(p['id'])
+    # 2. 筛选导演：全部保留
+    # 兼容不同版本的 key ('directors' 或 'crew')
+    crew = credits.get('crew', [])
+    directors = credits.get('directors', []) or [x for x in crew if x.get('job') == 'Director']
+    for p in directors:
+        if p.get('id'): target_person_ids.add(p['id'])
+
+    # 3. 其他幕后职位
+    for p in crew:
+        if credit_depth.crew_role(p.get('job')) and p.get('id'): target_person_ids.add(p['id'])
+
+def enrich(target_person_ids):
+    """查询 target_person_ids 里还没有结论的人，结果写进 PeopleStore"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    output_path = os.path.join(current_dir, OUTPUT_FILE)
 
     total_people = len(target_person_ids)
     print(f"筛选完毕！目标人数 {total_people} 人。")
-    print(f"启动 {MAX_WORKERS} 线程并发查询")
+    print(f"启动最多 {MAX_WORKERS} 线程并发查询 (按限流情况自动调整)")
 
     # --- 阶段 2: 多线程并发查询 ---
-    people_db = {}
+    store = PeopleStore(os.path.join(current_dir, STORE_FILE))
     
-    # 如果有旧文件，先加载（断点续传）
-    if os.path.exists(output_path):
+    # 库是空的但有旧 JSON：导入一次
+    if store.is_empty() and os.path.exists(output_path):
         try:
-            with open(output_path, 'r', encoding='utf-8') as f:
-                people_db = json.load(f)
-            print(f"  📂 已加载 {len(people_db)} 条历史数据。")
-        except: pass
+            imported, retry = store.import_json(output_path)
+            print(f"  📂 从旧 JSON 导入 {imported} 条历史数据，{retry} 条生卒年都为空的记为失败、稍后重查。")
+        except ValueError:
+            print(f"  ⚠️ 旧 JSON 已损坏，跳过导入: {OUTPUT_FILE}")
 
-    # 找出还没查的 ID
-    ids_to_fetch = [pid for pid in target_person_ids if str(pid) not in people_db]
+    # 找出还没查的 ID (断点续传：只读 ID 列，几万人也是瞬间完成)
+    done_ids = store.done_ids()
+    print(f"  📂 已有 {len(done_ids)} 条历史数据。")
+    ids_to_fetch = [pid for pid in target_person_ids if pid not in done_ids]
+    
+    # 先用本地 dump 批量补全，剩下的才走 API
+    if ids_to_fetch and PEOPLE_DUMP_FILE:
+        dump_path = os.path.join(current_dir, PEOPLE_DUMP_FILE)
+        if os.path.exists(dump_path):
+            print(f"  📦 正在扫描人员 dump: {PEOPLE_DUMP_FILE} ...")
+            hits = set()
+            with metrics.timer("enrich.dump"):
+                for pid, result in scan_person_dump(dump_path, set(ids_to_fetch)):
+                    store.put(pid, result, 'ok')
+                    hits.add(pid)
+                store.commit()
+            metrics.incr("enrich.dump_hits", len(hits))
+            ids_to_fetch = [pid for pid in ids_to_fetch if pid not in hits]
+            print(f"  📦 dump 命中 {len(hits)} 人，剩余 {len(ids_to_fetch)} 人需要逐个查询。")
+        else:
+            print(f"  ⚠️ 未找到人员 dump: {PEOPLE_DUMP_FILE}，全部走 API")
     
     if not ids_to_fetch:
+        store.close()
         print("🎉 所有数据已存在，无需查询！")
         return
 
-    count = 0
-    total = len(ids_to_fetch)
+    def on_result(pid, status, result):
+        store.put(pid, result, status)
+        # 定期提交：只写新增的行
+        if store.pending >= CHECKPOINT_EVERY:
+            store.commit()
 
-    # 使用 ThreadPoolExecutor 进行并发
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        # 提交所有任务
-        future_to_id = {executor.submit(get_person_details_safe, pid): pid for pid in ids_to_fetch}
+    with store, make_client() as client, metrics.timer("enrich.fetch"):
+        failed = fetch_all(client, ids_to_fetch, on_result)
         
-        for future in concurrent.futures.as_completed(future_to_id):
-            pid, result = future.result()
-            count += 1
-            
-            if result:
-                people_db[str(pid)] = result
-            
-            # 打印进度 (每10个打印一次，防止刷屏太快)
-            if count % 10 == 0 or count == total:
-                print(f"[{count}/{total}] 已处理... (当前库大小: {len(people_db)})", end="\r")
-
-            # 定期保存 (每200个)
-            if count % 200 == 0:
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(people_db, f, indent=0)
-
-    # 最后保存
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(people_db, f)
+        # 失败的 ID 单独标记 (status='failed')，和 "没有生日记录" 区分开，下次运行会重新查
+        for pid, status in failed.items():
+            store.put_failed(pid, status)
+        store.commit()
         
-    print(f"\n\n完成！核心人员的 born/died 数据已保存至 {OUTPUT_FILE}")
+        if EXPORT_JSON:
+            store.export_json(output_path)
+        
+    print(f"\n\n完成！核心人员的 born/died 数据已保存至 {STORE_FILE}")
+    if failed:
+        print(f"⚠️ {len(failed)} 人重试 {MAX_ATTEMPTS} 次后仍失败，已标记为 failed，下次运行会重新查询")
+
+def main():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    # --- 阶段 1: 扫描文件，筛选核心 ID ---
+    print(f"扫描文件，筛选 {credit_depth.describe()}...")
+    target_person_ids = set()
+    
+    raw_dir = os.path.join(current_dir, RAW_DATA_DIR)
+    
+    # 逐条流式读取，不把整个文件读进内存
+    with metrics.timer("enrich.scan"):
+        for _, m in iter_movies_by_year(raw_dir, range(START_YEAR, END_YEAR + 1)):
+            collect_person_ids(m, target_person_ids)
+
+    enrich(target_person_ids)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    metrics.write_report("people_info_enricher")
@@ -0,0 +1,62 @@
+"""
+一次扫描跑完整条流水线：国家检查 -> 人员补全 -> 生成 SQL。
+原始数据只解析一遍，三个阶段各自注册成扫描的消费者：
+  - 国家统计 (country_checking)
+  - 核心人员 ID 收集 (people_info_enricher)
+  - SQL 精简记录收集 (sql_generator)，等人员详情补全之后再生成 SQL
+各阶段自己的配置 (输出路径等) 仍然在各自的脚本里；导入哪些演职员由 common/credit_depth.py 统一决定。
+"""
+import os
+import sys
+import collections
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT_DIR)
+from common.pipeline import MovieScan
+from common import metrics
+from country_checking import check_countries
+from people_info_enricher import people_info_enricher
+from sql_generator import sql_generator
+
+# --- 📁 配置区 ---
+RAW_DATA_DIR = 'raw_data'
+START_YEAR = 2019
+END_YEAR = 2025
+
+CHECK_COUNTRIES = True
+ENRICH_PEOPLE = True            # 需要 TMDB_API_KEY (或者已经全部查过 / 有人员 dump)
+GENERATE_SQL = True
+
+def main():
+    scan = MovieScan(os.path.join(ROOT_DIR, RAW_DATA_DIR), range(START_YEAR, END_YEAR + 1))
+
+    country_stats = collections.Counter()
+    country_examples = {}
+    if CHECK_COUNTRIES:
+        scan.register(lambda year, m: check_countries.tally_country(m, country_stats, country_examples))
+
+    target_person_ids = set()
+    if ENRICH_PEOPLE:
+        scan.register(lambda year, m: people_info_enricher.collect_person_ids(m, target_person_ids))
+
+    # SQL 依赖补全后的生日，所以扫描时只留精简记录，补全完再生成
+    plans = []
+    if GENERATE_SQL:
+        scan.register(lambda year, m: plans.append((year, sql_generator.movie_plan(m, year))))
+
+    with metrics.timer("pipeline.scan"):
+        scan.run()
+
+    if CHECK_COUNTRIES:
+        with metrics.timer("pipeline.check_countries"):
+            check_countries.report(country_stats, country_examples)
+    if ENRICH_PEOPLE:
+        with metrics.timer("pipeline.enrich"):
+            people_info_enricher.enrich(target_person_ids)
+    if GENERATE_SQL:
+        with metrics.timer("pipeline.generate"):
+            sql_generator.main(plans)
+
+if __name__ == "__main__":
+    main()
+    metrics.write_report("pipeline")
@@ -1,93 +1,100 @@
+import io
 import json
 import os
-import csv
+import sys
+import time
+import itertools
+import collections
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.movie_stream import iter_movies_by_year
+from common.filmdb_dump import open_index
+from common.entity_resolver import PeopleResolver, MovieResolver, build_resolvers
+from common.sql_format import update_sql, delete_sql
+from common.sql_emitter import SqlWriter
+from common.id_registry import IdRegistry, content_hash
+from common.people_store import PeopleStore
+from common.country_resolver import load_country_resolver
+from common.manifest import BatchManifest, load_manifest, write_manifest, diff_manifests
+from common.validator import BatchValidator, load_dump_state
+from common import credit_depth, metrics
 
 # --- 📁 配置区 ---
 # 1. 输入数据
-MOVIE_FILE_PATTERN = '../raw_data/raw_movies_data_{}.json' 
-PEOPLE_FILE = '../raw_data/people_details_map.json'
+RAW_DATA_DIR = '../raw_data'   # raw_movies_data_{year}.jsonl / 旧版 .json 都能读
+PEOPLE_STORE = '../raw_data/people_details.sqlite'   # people_info_enricher 的结果
+PEOPLE_FILE = '../raw_data/people_details_map.json'   # 旧版 JSON (没有 PEOPLE_STORE 时才读)
 START_YEAR = 2019
 END_YEAR = 2025
 
-# 2. "旧账"文件 (导出自数据库)
-EXISTING_PEOPLE_CSV = '../original_data/existing_people.csv'
-EXISTING_MOVIES_CSV = '../original_data/existing_movies.csv'
+# 2. "旧账"：原始数据库 dump (首次使用时自动解析成 SQLite 索引，之后直接查)
+DUMP_FILE = '../original_data/filmdb.sql'
 
 # 3. 输出 SQL
 OUTPUT_SQL = '../clean_sql/update_filmdb_final.sql'
+# 批次清单：每个批次的行数、主键范围和内容哈希，下游导入可以跳过没变的批次
+MANIFEST_FILE = '../clean_sql/update_filmdb_final.manifest.json'
+# 同一年内按 TMDB ID 排序再分配 ID (原始文件按热度排序，每次抓取都会变)，
+# 这样同样的输入总是得到逐字节相同的输出
+# 注意：不开 DELTA_MODE 时 ID 是按位置顺序分配的，上游多出一部电影，它后面所有的 movieid / peopleid 都会后移，
+# 清单比较会显示之后的批次几乎全变了；要让差异和实际改动成正比，需要 DELTA_MODE (登记表固定已发出的 ID)
+CANONICAL_ORDER = True
 
 # 4. ID 计数器起点 (用于新人/新电影)
 NEXT_MOVIE_ID_START = 9210
 NEXT_PEOPLE_ID_START = 16510
 
-# 5. 策略
-MAX_CAST_COUNT = 4
-COUNTRY_MAP = {
-    "US": "us",  # It Chapter Two
-    "FR": "fr",  # La troupe à Palmade s'amuse avec Isabelle Nanty
-    "DE": "de",  # Zerschunden - Ein Fall für Dr. Abel
-    "GB": "gb",  # A Shaun the Sheep Movie: Farmageddon
-    "IT": "it",  # Se c’è un aldilà sono fottuto - Vita e cinema di Claudio Caligari
-    "CA": "ca",  # Dragged Across Concrete
-    "ES": "sp",  # 缺失国家: Father There Is Only One
-    "JP": "jp",  # Fate/stay night: Heaven's Feel II. Lost Butterfly
-    "ID": "id",  # Horas Amang: Tiga Bulan untuk Selamanya
-    "BR": "br",  # M8 - When Death Rescues Life
-    "IN": "in",  # Article 15
-    "PH": "ph",  # S.O.N.S. (Sons Of Nanay Sabel)
-    "KR": "kr",  # The Legendary Lighter
-    "BE": "be",  # A Good Woman Is Hard to Find
-    "MX": "mx",  # The House of Flowers Presents: The Funeral
-    "CN": "cn",  # Ne Zha
-    "AU": "au",  # Dora and the Lost City of Gold
-    "PL": "pl",  # How I Became a Gangster
-    "AT": "at",  # How I Taught Myself to Be a Child
-    "SE": "se",  # A Piece of My Heart
-    "AR": "ar",  # Me, Myself and My Dead Wife
-    "NO": "no",  # Forgotten Christmas
-    "NL": "nl",  # Penoza: The Final Chapter
-    "PT": "pt",  # An Indian in War - Life and Work of António-Pedro Vasconcelos
-    "FI": "fi",  # Iron Sky: The Coming Race
-    "DK": "dk",  # Queen of Hearts
-    "TH": "th",  # Lost and Found: Billkin & PP Krit First Worldwide Digital Performance
-    "PE": "pe",  # Django: En el nombre del hijo
-    "CL": "cl",  # Nobody Knows I'm Here
-    "VN": "vn",  # The Third Wife
-    "CZ": "cz",  # Deadtown aneb Cesta tam a zase zpátky
-    "IR": "ir",  # Learning to Skateboard in a Warzone (If You're a Girl)
-    "RU": "ru",  # Horse Julius on the Throne and Three Heroes
-    "CH": "ch",  # Continental Drift (South)
-    "TR": "tr",  # Ela and Hilmi with Ali
-    "CO": "co",  # My Cousin the Sexologist 2
-    "DM": "dm",  # In the Arms of an Assassin
-    "EC": "ec",  # Dedicated to my ex
-    "IE": "ie",  # The Hole in the Ground
-    "IL": "il",  # 'Til Kingdom Come
-    "KZ": "kz",  # Bullets of Justice
-    "NZ": "nz",  # Shadow in the Cloud
-    "HN": "hn",  # Kelas Bintang - Mangga Muda
-    "BG": "bg",  # Working Class Goes to Hell
-    "EE": "ee",  # A Greyhound of a Girl
-    "HU": "hu",  # Rendszerhiba - A magyar film el nem mondott története
-    "RO": "ro",  # Do Not Expect Too Much from the End of the World
-    "HK": "hk",  # The Prosecutor
-    "LV": "lv",  # Flow
-    "DO": "do",  # Captain Avispa
-    "GR": "gr",  # The Return
-    "SA": "sa",  # The Fakenapping
-}
+# 增量模式：把 TMDB ID -> DB ID 的映射和 ID 高水位持久化，
+# 之后每次运行只输出新增 / 有变化的记录 (注意：生成的 SQL 要实际导入，否则登记表会和数据库不一致)
+DELTA_MODE = False
+REGISTRY_FILE = '../clean_sql/id_registry.sqlite'
 
-# --- 🛠️ 辅助函数 ---
-def safe_str(text):
-    if text is None: return "NULL"
-    clean = str(text).replace("'", "''")
-    return f"'{clean}'"
+# 5. 输出格式
+# SQL_DIALECT: 'postgres' (PostgreSQL/openGauss) 或 'sqlite'
+# OUTPUT_MODE (格式说明见 common/sql_emitter.py):
+# 'insert':   一行一条 INSERT (旧格式)
+# 'batch':    多行 VALUES，每条语句最多 BATCH_SIZE 行
+# 'copy':     COPY ... FROM STDIN 数据块 (只有 postgres，导入最快)
+# 'prepared': PREPARE 一次参数化 INSERT，每行 EXECUTE (只有 postgres)
+SQL_DIALECT = 'postgres'
+OUTPUT_MODE = 'insert'
+BATCH_SIZE = 1000
+# batch / copy 模式下每年结束时都会落盘一次，所以每年的 SQL 片段互相独立
+
+# 多进程生成：先在主进程里按顺序分配 ID (必须串行，保证 ID 确定)，
+# 每处理完一年就把这一年的行交给进程池渲染成 SQL 片段，最后按年份顺序拼接。
+# 只有渲染是并行的，读原始数据 / 去重 / 分配 ID 仍在主进程里，加速上限就是渲染占的那部分时间。
+# 输出和串行完全一致；1 表示不开进程池
+PARALLEL_WORKERS = 1
 
-def resolve_country(iso_code):
-    if not iso_code: return "'us'" 
-    code = COUNTRY_MAP.get(iso_code, iso_code.lower())
-    return f"'{code}'"
+# 直接导入数据库 (不生成 SQL 文件)，后端见 common/db_loader.py：
+# - 'postgres': PostgreSQL/openGauss，需要 psycopg2，连接串从环境变量 FILMDB_DSN 读
+#   例如 FILMDB_DSN="host=localhost dbname=filmdb user=postgres"；每批 commit 一次
+# - 'sqlite': 本地 SQLite 库 SQLITE_DB (不存在时用 filmdb.sql 初始化)，整次导入一个事务
+# 需要同时打开 DELTA_MODE：每批提交后保存 ID 登记表，中途失败后重跑不会重复插入 / 重复分配 ID
+LOAD_TO_DB = False
+LOAD_TARGET = 'postgres'
+DB_DSN = os.getenv("FILMDB_DSN")
+SQLITE_DB = '../clean_sql/filmdb.sqlite'
+LOAD_METHOD = 'copy'            # postgres: 'copy' / 'executemany' / 'prepared'
+LOAD_BATCH_SIZE = 5000          # 每批行数
 
+# 6. 策略
+# 每部电影导入哪些演职员 (演员数 / 幕后职位) 和人员补全共用 common/credit_depth.py 的配置
+# 去重匹配：归一化 (重音/大小写/标点/复姓拆分) 后精确匹配。
+# FUZZY_MATCH 打开时人员再按三元组相似度模糊匹配 (只接受出生年份已知且相同的)，每一条都打印并记进批次清单；电影只做精确匹配
+FUZZY_MATCH = False
+FUZZY_THRESHOLD = 0.8
+# 国家代码按 filmdb.sql 的 countries 表 + common/country_resolver.py 的别名表自动映射，
+# 映射不到的电影不输出，记到这份报告里
+UNMAPPED_COUNTRY_REPORT = '../clean_sql/unmapped_countries.json'
+# 输出前对照 filmdb.sql 一次性检查整批数据 (外键 / 主键 / 唯一约束 / 长度 / born = 0)，问题写进报告；
+# STRICT_VALIDATION 时有 error 级别的问题就不输出 SQL 文件、不更新登记表
+VALIDATE_OUTPUT = True
+STRICT_VALIDATION = True
+VALIDATION_REPORT = '../clean_sql/validation_report.json'
+
+# --- 🛠️ 辅助函数 ---
 def split_name(fullname):
     """拆分姓名，用于比对"""
     if not fullname: return None, None
@@ -103,214 +110,520 @@ def get_gender_char(tmdb_gender):
     if tmdb_gender == 2: return 'M'
     return '?'
 
+# --- ✍️ SQL 输出 ---
+class YearRecorder:
+    """
+    和 SqlWriter 接口一样，但不直接写文件：把 generate_rows 的调用按年份记录下来，
+    每年结束时交给 on_year(ops) (多进程模式下提交给进程池渲染)。
+    """
+
+    def __init__(self, on_year):
+        self.on_year = on_year
+        self.ops = []
+
+    def comment(self, text):
+        self.ops.append(("comment", text))
+
+    def statement(self, sql):
+        self.ops.append(("statement", sql))
+
+    def add(self, table, row):
+        self.ops.append(("add", table, row))
+
+    def end_movie(self):
+        self.ops.append(("end_movie",))
+
+    def end_year(self):
+        if self.ops:
+            self.on_year(self.ops)
+        self.ops = []
+
+    def close(self):
+        self.end_year()
+
+def render_ops(ops, mode, batch_size, dialect):
+    """在子进程里把一年的调用记录重放给 SqlWriter，返回 (SQL 文本, 清单批次)"""
+    buf = io.StringIO()
+    writer = SqlWriter(buf, mode, batch_size, dialect=dialect)
+    for name, *args in ops:
+        getattr(writer, name)(*args)
+    writer.close()
+    return buf.getvalue(), writer.manifest.batches
+
 # --- 📚 查重字典构建 ---
 def load_existing_data():
-    """读取 CSV 构建内存查找表"""
+    """
+    从 filmdb.sql 的 SQLite 索引构建人员 / 电影解析器 (索引只在 dump 变化时重建)。
+    解析器按归一化全名 / 标题匹配，开启 FUZZY_MATCH 时人员再做三元组模糊匹配。
+    """
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    p_path = os.path.join(current_dir, EXISTING_PEOPLE_CSV)
-    m_path = os.path.join(current_dir, EXISTING_MOVIES_CSV)
-    
-    # key: (first_name, surname) -> value: peopleid
-    existing_people = {}
-    # key: (title, year) -> value: movieid
-    existing_movies = {}
+    dump_path = os.path.normpath(os.path.join(current_dir, DUMP_FILE))
 
-    print("📚 正在加载旧数据库索引...")
+    if not os.path.exists(dump_path):
+        print(f"⚠️ 未找到 {DUMP_FILE}，将无法去重人员和电影！")
+        return PeopleResolver(FUZZY_THRESHOLD, FUZZY_MATCH), MovieResolver()
 
-    # 1. 加载人
-    if os.path.exists(p_path):
-        with open(p_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) < 3: continue
-                # 假设 CSV 无表头，或是跳过表头逻辑 (这里简单判定如果ID不是数字就跳过)
-                if not row[0].isdigit(): continue
-                
-                pid = int(row[0])
-                first = row[1].strip()
-                surname = row[2].strip()
-                # 存入字典 (注意：为了匹配宽容度，可以转小写对比，这里先保持原样)
-                existing_people[(first, surname)] = pid
-    else:
-        print("⚠️ 未找到 existing_people.csv，将无法去重人员！")
-
-    # 2. 加载电影
-    if os.path.exists(m_path):
-        with open(m_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) < 3: continue
-                if not row[0].isdigit(): continue
-                
-                mid = int(row[0])
-                title = row[1].strip()
-                year = int(row[2]) if row[2].isdigit() else 0
-                existing_movies[(title, year)] = mid
-    else:
-        print("⚠️ 未找到 existing_movies.csv，将无法去重电影！")
+    print("📚 正在加载旧数据库索引...")
+    conn = open_index(dump_path)
+    existing_people, existing_movies = build_resolvers(conn, FUZZY_THRESHOLD, FUZZY_MATCH)
+    conn.close()
         
     print(f"✅ 索引加载完毕: 现有人员 {len(existing_people)}, 现有电影 {len(existing_movies)}")
     return existing_people, existing_movies
 
-# --- 🚀 主程序 ---
-def main():
+# --- 🌍 国家代码 ---
+def load_countries():
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(current_dir, OUTPUT_SQL)
-    people_path = os.path.join(current_dir, PEOPLE_FILE)
+    countries = load_country_resolver(os.path.join(current_dir, DUMP_FILE))
+    if countries.lookup is None:
+        print(f"⚠️ 未找到 {DUMP_FILE}，国家代码直接转小写，无法检查是否存在！")
+    return countries
 
-    # 1. 加载辅助数据
-    people_details = {}
+def write_unmapped_report(countries):
+    """把映射不到的国家代码写成报告 (没有的话删掉旧报告)"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    report_path = os.path.join(current_dir, UNMAPPED_COUNTRY_REPORT)
+    report = countries.report()
+    if not report:
+        if os.path.exists(report_path): os.remove(report_path)
+        return
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump([{"code": code, "movies": n, "example": example} for code, n, example in report],
+                  f, ensure_ascii=False, indent=2)
+    print(f"⚠️ {len(report)} 个国家代码映射不到 countries 表，相关电影已跳过，详见 {UNMAPPED_COUNTRY_REPORT}:")
+    for code, n, example in report:
+        print(f"    {code}: {n} 部 (例如 {example})")
+
+# --- 🎂 人员详情 ---
+def load_people_details():
+    """读取 people_info_enricher 的结果: {"tmdb_id": {"born": ..., "died": ...}}"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    store_path = os.path.join(current_dir, PEOPLE_STORE)
+    people_path = os.path.join(current_dir, PEOPLE_FILE)
+    
+    if os.path.exists(store_path):
+        with PeopleStore(store_path) as store:
+            return store.load_map()
     if os.path.exists(people_path):
         with open(people_path, 'r', encoding='utf-8') as f:
-            people_details = json.load(f)
+            return json.load(f)
+    return {}
+
+# --- 🔢 ID 登记表 ---
+def load_id_registry():
+    """
+    增量模式下从磁盘读取 TMDB -> DB 的 ID 登记表；否则用一个只在内存里的空表。
+    新 ID 的起点取 配置值 / 原库最大 ID + 1 / 上次运行的高水位 三者中最大的。
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    dump_path = os.path.normpath(os.path.join(current_dir, DUMP_FILE))
+    next_movie_id, next_people_id = NEXT_MOVIE_ID_START, NEXT_PEOPLE_ID_START
+    if os.path.exists(dump_path):
+        conn = open_index(dump_path)
+        max_movie, = conn.execute("SELECT COALESCE(MAX(movieid), 0) FROM movies").fetchone()
+        max_people, = conn.execute("SELECT COALESCE(MAX(peopleid), 0) FROM people").fetchone()
+        conn.close()
+        next_movie_id = max(next_movie_id, max_movie + 1)
+        next_people_id = max(next_people_id, max_people + 1)
+
+    path = os.path.join(current_dir, REGISTRY_FILE) if DELTA_MODE else None
+    registry = IdRegistry(path, next_movie_id, next_people_id)
+    if DELTA_MODE:
+        print(f"🔢 ID 登记表: 已登记电影 {len(registry.movies)}, 人员 {len(registry.people)} "
+              f"(下一个 movieid {registry.next_movie_id}, peopleid {registry.next_people_id})")
+    return registry
+
+# --- 🧾 精简记录 ---
+def intern_name(name):
+    return sys.intern(name) if isinstance(name, str) else name
+
+def movie_plan(m, year):
+    """
+    从一条原始电影记录里只取生成 SQL 用得到的字段，得到一个精简的元组：
+    (tmdb_id, title, 年份, runtime, 国家代码, ((tmdb_pid, 姓名, gender, 角色), ...))
+    run_pipeline.py 在共享扫描时先收集这些记录，等人员详情补全后再生成 SQL，不用重新解析原始文件。
+    """
+    r_date = m.get('release_date', '')
+    r_year = int(r_date.split('-')[0]) if r_date else year
+    countries = m.get('origin_country', [])
+    c_code = countries[0] if countries else 'US'
+
+    credits = m.get('credits', {})
+    crew = credits.get('crew', [])
+    directors = credits.get('directors', []) 
+    if not directors: directors = [x for x in crew if x.get('job') == 'Director']
+    cast = credits.get('cast', [])[:credit_depth.MAX_CAST]
+
+    # 全量演职员时同一个人会出现在很多电影里：名字 intern 成同一个对象，精简记录只多占一个引用
+    people = tuple((p.get('id'), intern_name(p.get('name')), p.get('gender'), 'D') for p in directors) \
+        + tuple((p.get('id'), intern_name(p.get('name')), p.get('gender'), 'A') for p in cast) \
+        + tuple((p.get('id'), intern_name(p.get('name')), p.get('gender'), credit_depth.crew_role(p.get('job')))
+                for p in crew if credit_depth.crew_role(p.get('job')))
+    return (m.get('id'), m.get('title'), r_year, m.get('runtime', 0), c_code, people)
+
+def canonical_order(plans):
+    """同一年内按 TMDB ID 排序 (没有 ID 的排最后，保持原顺序)"""
+    for _, group in itertools.groupby(plans, key=lambda item: item[0]):
+        yield from sorted(group, key=lambda item: (item[1][0] is None, item[1][0] or 0))
+
+def iter_plans():
+    """单独运行时：逐年流式读取原始数据，产出 (year, 精简记录)"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    raw_dir = os.path.join(current_dir, RAW_DATA_DIR)
+    for year, m in iter_movies_by_year(raw_dir, range(START_YEAR, END_YEAR + 1)):
+        yield year, movie_plan(m, year)
+
+def resolve_person(db_people_map, first, surname, born):
+    with metrics.timer("generate.dedup.person"):
+        return db_people_map.resolve(first, surname, born)
+
+# --- 🚀 主程序 ---
+def generate_rows(writer, people_details, db_people_map, db_movie_map, registry, countries, plans=None):
+    """
+    遍历电影的精简记录 (默认直接读原始数据)，去重后把三张表的行交给 writer (SqlWriter / DbLoader)，返回统计。
+    registry 记录 TMDB ID -> DB ID；增量模式下已登记且内容没变的电影直接跳过，
+    内容变了的电影/人员输出 UPDATE (电影的 credits 先删后重新插入)。
+    countries 是 CountryResolver，国家代码映射不到的电影跳过并记进它的报告。
+    """
+    if plans is None:
+        plans = iter_plans()
+    if CANONICAL_ORDER:
+        plans = canonical_order(plans)
+    started = time.perf_counter()
+    
+    stats = {"skipped_movies": 0, "new_movies": 0, "old_people_used": 0, "new_people_added": 0,
+             "unchanged_movies": 0, "updated_movies": 0, "updated_people": 0,
+             "unmapped_country_movies": 0}
+
+    current_year = None
+    for year, plan in plans:
+        if year != current_year:
+            if current_year is not None:
+                writer.end_year()
+            current_year = year
+            print(f"  📂 处理 {year} ...")
+
+        tmdb_m_id, title, r_year, runtime, c_code, people = plan
+
+        known_movie = registry.movie(tmdb_m_id) if tmdb_m_id else None
+
+        # --- 🛑 电影去重检查 ---
+        # 如果 (标题, 年份) 已经在现有数据库里，直接跳过整部电影
+        # (或者你可以选择只更新credits，但通常直接跳过更安全)
+        with metrics.timer("generate.dedup.movie"):
+            existing_movie = db_movie_map.resolve(title, r_year) if known_movie is None else None
+        if existing_movie is not None:
+            stats["skipped_movies"] += 1
+            # print(f"    跳过已存在电影: {title}")
+            continue
+
+        country = countries.resolve(c_code, example=title)
+        if country is None:
+            stats["unmapped_country_movies"] += 1
+            continue
+
+        # --- 处理人员 (先解析出每个人的 DB ID，再决定这部电影要不要输出) ---
+        # 本片内部去重
+        movie_people_processed = set()
+        movie_credits = []          # [(peopleid, role, 需要插入的 people 行 或 None)]
+
+        for tmdb_p_id, p_name, p_gender, role_code in people:
+            if not tmdb_p_id: continue
+            tmdb_p_id_str = str(tmdb_p_id)
+
+            first, surname = split_name(p_name)
+            if first is None: continue # 名字有问题
+
+            # 补全生日 (模糊匹配时也用来排除同名不同人)
+            detail = people_details.get(tmdb_p_id_str, {})
+            born = detail.get('born')
+            died = detail.get('died')
+
+            # NULL 处理 (born强制填0, died允许NULL)
+            born_val = 0 if born is None else int(born)
+            died_val = None if died is None else int(died)
+            gender = get_gender_char(p_gender)
+
+            # --- 🛑 人员去重核心逻辑 ---
+            final_people_id = None
+            new_person_row = None
+            known_person = registry.person(tmdb_p_id)
+
+            # 1. 检查登记表 (本次运行或以前的运行里遇到过他)
+            if known_person is not None:
+                final_people_id, old_hash, origin = known_person
+                # 我们自己插入的人，信息有变化 (比如后来补到了生日) 就更新
+                if origin == 'new':
+                    row = (final_people_id, first, surname, born_val, died_val, gender)
+                    new_hash = content_hash(row)
+                    if new_hash != old_hash:
+                        writer.statement(update_sql("people", row))
+                        registry.set_person(tmdb_p_id, final_people_id, new_hash, key=(first, surname, born))
+                        stats["updated_people"] += 1
+
+            # 2. 检查旧数据库 (是否是老演员)
+            elif (existing_id := resolve_person(db_people_map, first, surname, born)) is not None:
+                final_people_id = existing_id
+                # 记录到登记表，下次遇到直接用
+                registry.set_person(tmdb_p_id, final_people_id, None, origin='dump')
+                stats["old_people_used"] += 1
+
+            # 3. 确实是新人
+            else:
+                final_people_id = registry.allocate_person()
+                # 更新一下解析器，防止这批数据里有两个不同 TMDB_ID 但名字一样的人(少见但防万一)
+                db_people_map.add(final_people_id, first, surname, born)
+
+                # 注意 surname 为空时写 '' 而不是 NULL (safe_str 已经保证)
+                new_person_row = (final_people_id, first, surname, born_val, died_val, gender)
+                registry.set_person(tmdb_p_id, final_people_id, content_hash(new_person_row), key=(first, surname, born))
+                stats["new_people_added"] += 1
+
+            movie_credits.append((final_people_id, role_code, new_person_row))
+
+        # --- 电影本身：新电影 / 内容有变化 / 没变化 ---
+        credit_keys = [[pid, role] for pid, role, _ in movie_credits]
+        movie_hash = content_hash([title, country, r_year, runtime, credit_keys])
+        
+        if known_movie is not None:
+            movie_id, old_hash, _ = known_movie
+            if old_hash == movie_hash:
+                stats["unchanged_movies"] += 1
+                continue
+            writer.comment(f"Movie (updated): {title} (ID: {movie_id})")
+            writer.statement(update_sql("movies", (movie_id, title, country, r_year, runtime)))
+            writer.statement(delete_sql("credits", "movieid", movie_id))
+            stats["updated_movies"] += 1
+        else:
+            # 是新电影，分配新 ID
+            movie_id = registry.allocate_movie()
+            stats["new_movies"] += 1
+
+            # 写入 Movies 表
+            writer.comment(f"Movie: {title} (ID: {movie_id})")
+            writer.add("movies", (movie_id, title, country, r_year, runtime))
+        
+        if tmdb_m_id:
+            registry.set_movie(tmdb_m_id, movie_id, movie_hash)
+
+        for final_people_id, role_code, new_person_row in movie_credits:
+            # --- 只有新人，才生成 INSERT INTO people ---
+            if new_person_row is not None:
+                writer.add("people", new_person_row)
+
+            # --- 写入 Credits (不管新人旧人，只要参演了这部新电影就要写) ---
+            # 联合主键防重
+            unique_key = (final_people_id, role_code)
+            if unique_key not in movie_people_processed:
+                writer.add("credits", (movie_id, final_people_id, role_code))
+                movie_people_processed.add(unique_key)
+
+        writer.end_movie()
+
+    metrics.observe("generate.rows", time.perf_counter() - started)
+    for key, value in stats.items():
+        metrics.incr(f"generate.{key}", value)
+    return stats
+
+def generate_parallel(sql, manifest, people_details, db_people_map, db_movie_map, registry, countries, plans=None,
+                      validator=None):
+    """
+    两阶段生成：主进程串行跑 generate_rows (去重 + 分配 ID)，每年的结果交给进程池渲染，
+    渲染好的片段按年份顺序写进 sql，批次记进 manifest。ID 分配和串行完全一样，所以输出逐字节一致。
+    validator (BatchValidator) 不为 None 时套在记录器外面收集行。
+    """
+    import concurrent.futures       # 默认串行生成，用不到进程池时不导入
+    pending = collections.deque()
+
+    def drain(wait=False):
+        # 按提交顺序写出已经渲染完的片段
+        while pending and (wait or pending[0].done()):
+            text, batches = pending.popleft().result()
+            sql.write(text)
+            manifest.batches.extend(batches)
+
+    with concurrent.futures.ProcessPoolExecutor(PARALLEL_WORKERS) as pool:
+        def on_year(ops):
+            pending.append(pool.submit(render_ops, ops, OUTPUT_MODE, BATCH_SIZE, SQL_DIALECT))
+            drain()
+
+        recorder = YearRecorder(on_year)
+        if validator is not None:
+            recorder = validator.attach(recorder)
+        stats = generate_rows(recorder, people_details, db_people_map, db_movie_map, registry, countries, plans)
+        recorder.close()
+        drain(wait=True)
+    return stats
+
+def report_fuzzy_matches(db_people_map):
+    """打印本次所有的人员模糊匹配 (需要人工复核)，返回写进批次清单的列表"""
+    matches = [{"query": q, "matched": m, "score": score, "peopleid": pid}
+               for q, m, score, pid in db_people_map.fuzzy_matches]
+    if matches:
+        print(f"🔎 人员模糊匹配 {len(matches)} 条 (请人工复核):")
+        for item in matches:
+            print(f"    {item['query']} -> {item['matched']} (peopleid {item['peopleid']}, 相似度 {item['score']})")
+    return matches
+
+def save_manifest(manifest, fuzzy_matches=()):
+    """写出批次清单 (附带人员模糊匹配记录)，和上一次的清单比较一下变化了多少"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    manifest_path = os.path.join(current_dir, MANIFEST_FILE)
+    old = load_manifest(manifest_path) if os.path.exists(manifest_path) else None
+    data = write_manifest(manifest_path, manifest, output=OUTPUT_SQL, mode=OUTPUT_MODE,
+                          fuzzy_matches=list(fuzzy_matches))
+    print(f"🧾 批次清单: {len(manifest.batches)} 个批次, 摘要 {data['digest'][:12]} -> {MANIFEST_FILE}")
+    if old is not None:
+        if old.get("digest") == data["digest"]:
+            print("  与上次输出完全一致")
+        else:
+            diff = diff_manifests(old, data)
+            print(f"  与上次相比: 未变 {diff['unchanged']} 批, 新增/变化 {len(diff['changed'])} 批, 消失 {diff['removed']} 批")
+            if not DELTA_MODE:
+                print("  (没开 DELTA_MODE：ID 按位置分配，前面多一部电影后面的批次都会跟着变)")
+
+def validate_batch(validator, registry):
+    """对照 filmdb.sql 检查整批数据并写报告 (没问题时删掉旧报告)，返回 error 级别的问题行数"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    dump_path = os.path.normpath(os.path.join(current_dir, DUMP_FILE))
+    report_path = os.path.join(current_dir, VALIDATION_REPORT)
+    if not os.path.exists(dump_path):
+        print(f"⚠️ 未找到 {DUMP_FILE}，跳过输出校验")
+        return 0
+
+    with metrics.timer("generate.validate"):
+        conn = open_index(dump_path)
+        state = load_dump_state(conn)
+        conn.close()
+        # 增量模式下以前运行插入的行也算已存在 (只用于外键)
+        known_movies = {db_id for db_id, _, _ in registry.movies.values()}
+        known_people = {db_id for db_id, _, _ in registry.people.values()}
+        problems = validator.check(state, known_movies, known_people)
+
+    errors = sum(p["count"] for p in problems if p["severity"] == "error")
+    metrics.incr("generate.validation_errors", errors)
+    if not problems:
+        if os.path.exists(report_path): os.remove(report_path)
+        print("🔍 输出校验通过")
+        return 0
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(problems, f, ensure_ascii=False, indent=2)
+    print(f"🔍 输出校验发现 {len(problems)} 类问题，详见 {VALIDATION_REPORT}:")
+    for p in problems:
+        icon = "❌" if p["severity"] == "error" else "⚠️"
+        print(f"    {icon} {p['table']}: {p['check']} — {p['count']} 行 (例如 {p['examples'][0]})")
+    return errors
+
+def print_stats(stats):
+    print("-" * 30)
+    print("📊 统计结果:")
+    print(f"  跳过已存电影: {stats['skipped_movies']}")
+    print(f"  新增电影:     {stats['new_movies']}")
+    print(f"  复用原有演员: {stats['old_people_used']} 次")
+    print(f"  新增演员:     {stats['new_people_added']} 人")
+    if stats["unmapped_country_movies"]:
+        print(f"  国家未映射:   {stats['unmapped_country_movies']} 部 (已跳过)")
+    if DELTA_MODE:
+        print(f"  未变化电影:   {stats['unchanged_movies']}")
+        print(f"  更新电影:     {stats['updated_movies']}")
+        print(f"  更新演员:     {stats['updated_people']} 人")
+
+def main(plans=None):
+    """plans: 共享扫描收集好的 (year, 精简记录)，为 None 时自己读原始数据"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    output_path = os.path.join(current_dir, OUTPUT_SQL)
+    # 输出目录 (clean_sql/) 不进版本库，新检出的仓库里第一次运行时才创建
+    for path in (OUTPUT_SQL, MANIFEST_FILE, VALIDATION_REPORT, UNMAPPED_COUNTRY_REPORT):
+        os.makedirs(os.path.dirname(os.path.join(current_dir, path)), exist_ok=True)
+    # 1. 加载辅助数据
+    with metrics.timer("generate.load_people"):
+        people_details = load_people_details()
             
     # 2. 加载查重字典
-    db_people_map, db_movie_map = load_existing_data()
-    
-    # 3. 初始化 ID 计数器 (全局)
-    curr_movie_id = NEXT_MOVIE_ID_START
-    curr_people_id = NEXT_PEOPLE_ID_START
+    with metrics.timer("generate.load_dump"):
+        db_people_map, db_movie_map = load_existing_data()
+        registry = load_id_registry()
+        # 以前的运行插入的人不在原库索引里，补进解析器：同名的新 TMDB 人员要复用同一个 peopleid (和同一次运行里一样)
+        for pid, first, surname, born in registry.inserted_people():
+            db_people_map.add(pid, first, surname, born)
+        countries = load_countries()
     
-    # TMDB ID -> DB ID 的本次运行映射 (防止本次生成的数据内部重复)
-    tmdb_to_db_people_cache = {} 
+    # 3a. 直接入库 (不经过 SQL 文件)
+    if LOAD_TO_DB:
+        from common.db_loader import DbLoader, SqliteLoader
+        # 直接入库是按批提交的：中途失败时已经提交的电影只有持久化的登记表记得，
+        # 没有它重跑会把这些电影再插一遍、再分配一遍同样的 ID
+        if not DELTA_MODE:
+            print("❌ LOAD_TO_DB 需要同时打开 DELTA_MODE (持久化的 ID 登记表)，否则中途失败后无法安全重跑")
+            return
+        # 每次提交后都保存登记表：中途失败时已经提交的行对应的 ID 不会在重跑时被重新分配
+        on_commit = lambda: registry.save(note="db")
+        if LOAD_TARGET == 'sqlite':
+            print(f"🚚 正在导入 SQLite 库 {SQLITE_DB} (executemany, 单个事务)")
+            dump_path = os.path.normpath(os.path.join(current_dir, DUMP_FILE))
+            loader = SqliteLoader(os.path.join(current_dir, SQLITE_DB),
+                                  dump_path if os.path.exists(dump_path) else None, LOAD_BATCH_SIZE, on_commit)
+        elif not DB_DSN:
+            print("❌ LOAD_TO_DB 需要设置环境变量 FILMDB_DSN")
+            return
+        else:
+            print(f"🚚 正在直接导入数据库 (方式: {LOAD_METHOD}, 每批 {LOAD_BATCH_SIZE} 行)")
+            loader = DbLoader(DB_DSN, batch_size=LOAD_BATCH_SIZE, method=LOAD_METHOD, on_commit=on_commit)
+        # 登记表落后于目标库 (别人也往库里写过，或者登记表被删了) 时，从库里的最大 ID 之后继续分配
+        if registry.reserve(*loader.max_ids()):
+            print(f"  ⚠️ 目标库里的 ID 比登记表新，从 movieid {registry.next_movie_id} / "
+                  f"peopleid {registry.next_people_id} 开始分配")
+        try:
+            stats = generate_rows(loader, people_details, db_people_map, db_movie_map, registry, countries, plans)
+        except BaseException:
+            # 丢掉还没提交的行 (可能只有半部电影)，登记表只保留已经提交的部分
+            loader.abort()
+            raise
+        loader.close()
+        registry.save(note="db")
+        print_stats(stats)
+        report_fuzzy_matches(db_people_map)
+        write_unmapped_report(countries)
+        print("✅ 导入完毕")
+        return
     
+    # 3b. 生成 SQL 文件
     print(f"✍️ 正在生成去重后的 SQL -> {OUTPUT_SQL}")
     
-    with open(output_path, 'w', encoding='utf-8') as sql:
+    # 先写临时文件，校验通过才换成正式输出
+    tmp_path = output_path + '.tmp'
+    validator = BatchValidator() if VALIDATE_OUTPUT else None
+    with open(tmp_path, 'w', encoding='utf-8') as sql:
         sql.write("BEGIN;\n\n")
-        
-        stats = {"skipped_movies": 0, "new_movies": 0, "old_people_used": 0, "new_people_added": 0}
-
-        for year in range(START_YEAR, END_YEAR + 1):
-            file_name = MOVIE_FILE_PATTERN.format(year)
-            file_path = os.path.join(current_dir, file_name)
-            if not os.path.exists(file_path): continue
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                movies_data = json.load(f)
-                
-            print(f"  📂 处理 {year} ...")
-            
-            for m in movies_data:
-                title = m.get('title')
-                r_date = m.get('release_date', '')
-                r_year = int(r_date.split('-')[0]) if r_date else year
-                
-                # --- 🛑 电影去重检查 ---
-                # 如果 (标题, 年份) 已经在现有数据库里，直接跳过整部电影
-                # (或者你可以选择只更新credits，但通常直接跳过更安全)
-                if (title, r_year) in db_movie_map:
-                    stats["skipped_movies"] += 1
-                    # print(f"    跳过已存在电影: {title}")
-                    continue
-
-                # 是新电影，分配新 ID
-                new_movie_id = curr_movie_id
-                curr_movie_id += 1
-                stats["new_movies"] += 1
-                
-                runtime = m.get('runtime', 0)
-                countries = m.get('origin_country', [])
-                c_code = countries[0] if countries else 'US'
-                
-                # 写入 Movies 表
-                sql.write(f"-- Movie: {title} (ID: {new_movie_id})\n")
-                sql.write(
-                    f"INSERT INTO movies (movieid, title, country, year_released, runtime) "
-                    f"VALUES ({new_movie_id}, {safe_str(title)}, {resolve_country(c_code)}, {r_year}, {runtime});\n"
-                )
-                
-                # --- 处理人员 ---
-                credits = m.get('credits', {})
-                directors = credits.get('directors', []) 
-                if not directors: directors = [x for x in credits.get('crew', []) if x.get('job') == 'Director']
-                cast = credits.get('cast', [])[:MAX_CAST_COUNT]
-                
-                person_list = []
-                for p in directors: person_list.append((p, 'D'))
-                for p in cast: person_list.append((p, 'A'))
-                
-                # 本片内部去重
-                movie_people_processed = set()
-                
-                for person, role_code in person_list:
-                    tmdb_p_id = person.get('id')
-                    if not tmdb_p_id: continue
-                    tmdb_p_id_str = str(tmdb_p_id)
-                    
-                    p_name = person.get('name')
-                    first, surname = split_name(p_name)
-                    if first is None: continue # 名字有问题
-                    
-                    # --- 🛑 人员去重核心逻辑 ---
-                    final_people_id = None
-                    is_new_person_to_insert = False
-                    
-                    # 1. 检查本次运行缓存 (是否刚才在这批 JSON 里遇到过他)
-                    if tmdb_p_id in tmdb_to_db_people_cache:
-                        final_people_id = tmdb_to_db_people_cache[tmdb_p_id]
-                    
-                    # 2. 检查旧数据库 (是否是老演员)
-                    elif (first, surname) in db_people_map:
-                        final_people_id = db_people_map[(first, surname)]
-                        # 记录到缓存，下次遇到直接用
-                        tmdb_to_db_people_cache[tmdb_p_id] = final_people_id
-                        stats["old_people_used"] += 1
-                        
-                    # 3. 确实是新人
-                    else:
-                        final_people_id = curr_people_id
-                        tmdb_to_db_people_cache[tmdb_p_id] = final_people_id
-                        # 更新一下 db_map，防止这批数据里有两个不同 TMDB_ID 但名字一样的人(少见但防万一)
-                        db_people_map[(first, surname)] = final_people_id
-                        
-                        curr_people_id += 1
-                        is_new_person_to_insert = True
-                        stats["new_people_added"] += 1
-
-                    # --- 只有新人，才生成 INSERT INTO people ---
-                    if is_new_person_to_insert:
-                        # 补全生日
-                        detail = people_details.get(tmdb_p_id_str, {})
-                        born = detail.get('born')
-                        died = detail.get('died')
-                        
-                        # NULL 处理 (born强制填0, died允许NULL)
-                        born_val = 0 if born is None else int(born)
-                        died_val = 'NULL' if died is None else int(died)
-                        
-                        gender = get_gender_char(person.get('gender'))
-                        
-                        # 注意 surname 为空时，SQL里要写 ''
-                        surname_sql = "''" if surname == "" else safe_str(surname)
-
-                        sql.write(
-                            f"INSERT INTO people (peopleid, first_name, surname, born, died, gender) "
-                            f"VALUES ({final_people_id}, {safe_str(first)}, {surname_sql}, {born_val}, {died_val}, '{gender}');\n"
-                        )
-                    
-                    # --- 写入 Credits (不管新人旧人，只要参演了这部新电影就要写) ---
-                    # 联合主键防重
-                    unique_key = (final_people_id, role_code)
-                    if unique_key not in movie_people_processed:
-                        sql.write(
-                            f"INSERT INTO credits (movieid, peopleid, credited_as) "
-                            f"VALUES ({new_movie_id}, {final_people_id}, '{role_code}');\n"
-                        )
-                        movie_people_processed.add(unique_key)
-
-                sql.write("\n")
+        manifest = BatchManifest()
+        if PARALLEL_WORKERS > 1:
+            stats = generate_parallel(sql, manifest, people_details, db_people_map, db_movie_map, registry, countries, plans,
+                                      validator)
+        else:
+            writer = SqlWriter(sql, OUTPUT_MODE, BATCH_SIZE, manifest, SQL_DIALECT)
+            if validator is not None:
+                writer = validator.attach(writer)
+            stats = generate_rows(writer, people_details, db_people_map, db_movie_map, registry, countries, plans)
+            writer.close()
         
         # 结尾：还是保留 ROLLBACK 供测试，或者改 COMMIT
         sql.write("\n-- COMMIT; \nROLLBACK;\n") 
-        
-        print("-" * 30)
-        print("📊 统计结果:")
-        print(f"  跳过已存电影: {stats['skipped_movies']}")
-        print(f"  新增电影:     {stats['new_movies']}")
-        print(f"  复用原有演员: {stats['old_people_used']} 次")
-        print(f"  新增演员:     {stats['new_people_added']} 人")
-        print(f"✅ SQL 生成完毕: {OUTPUT_SQL}")
+
+    print_stats(stats)
+    fuzzy_matches = report_fuzzy_matches(db_people_map)
+    write_unmapped_report(countries)
+    if validator is not None and validate_batch(validator, registry) and STRICT_VALIDATION:
+        print(f"❌ 输出校验未通过，没有生成 {OUTPUT_SQL}，登记表也没有更新 (草稿留在 {OUTPUT_SQL}.tmp)")
+        return
+    os.replace(tmp_path, output_path)
+    
+    # SQL 写完才登记，保证登记表和已经生成的脚本一致
+    run_id = registry.save(note=OUTPUT_SQL)
+    save_manifest(manifest, fuzzy_matches)
+    if run_id is not None:
+        print(f"🔢 已登记为第 {run_id} 次运行")
+    print(f"✅ SQL 生成完毕: {OUTPUT_SQL}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    metrics.write_report("sql_generator")
@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# 和各个脚本一样，把仓库根目录放进 sys.path，测试里直接 from common... 导入
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+FIXTURE_YEAR = 2019
+RETRY_AFTER = 0.05
+
+
+@pytest.fixture(scope="session")
+def synthetic_raw_dir(tmp_path_factory):
+    """一年 250 部合成电影 (benchmark/synthetic.py，内容由 ID 决定)，整个测试会话共用"""
+    from benchmark.make_fixtures import write_fixtures
+    raw_dir = str(tmp_path_factory.mktemp("raw_data"))
+    write_fixtures(raw_dir, scale=1, years=range(FIXTURE_YEAR, FIXTURE_YEAR + 1))
+    return raw_dir
+
+
+@pytest.fixture
+def generator(synthetic_raw_dir, tmp_path, monkeypatch):
+    """把 sql_generator 的输入输出都指到临时目录 (测试结束后自动还原配置)，返回模块本身"""
+    from sql_generator import sql_generator
+    out_dir = tmp_path / "clean_sql"
+    settings = {
+        "RAW_DATA_DIR": synthetic_raw_dir,
+        "PEOPLE_STORE": str(tmp_path / "people_details.sqlite"),
+        "PEOPLE_FILE": str(tmp_path / "people_details_map.json"),
+        "START_YEAR": FIXTURE_YEAR, "END_YEAR": FIXTURE_YEAR,
+        "OUTPUT_SQL": str(out_dir / "out.sql"),
+        "MANIFEST_FILE": str(out_dir / "out.manifest.json"),
+        "UNMAPPED_COUNTRY_REPORT": str(out_dir / "unmapped_countries.json"),
+        "VALIDATION_REPORT": str(out_dir / "validation_report.json"),
+        "REGISTRY_FILE": str(out_dir / "id_registry.sqlite"),
+        "SQLITE_DB": str(out_dir / "filmdb.sqlite"),
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(sql_generator, name, value)
+    return sql_generator
+
+
+@pytest.fixture(scope="session")
+def dump_sqlite(tmp_path_factory):
+    """filmdb.sql 建好的 SQLite 库 (整个会话只建一次，用的时候复制一份)"""
+    from common.db_loader import SqliteLoader
+    from common.filmdb_dump import DEFAULT_DUMP_PATH
+    path = str(tmp_path_factory.mktemp("dump") / "filmdb.sqlite")
+    SqliteLoader._initialize(path, DEFAULT_DUMP_PATH)
+    return path
+
+
+@pytest.fixture
+def mock_tmdb():
+    """在后台线程里起一个 mock TMDB (端口随机)，返回 (state, base_url)；state.script 决定接下来的状态码"""
+    from benchmark.mock_tmdb import MockState, serve
+    from common import metrics
+    state = MockState(latency=0, jitter=0, retry_after=RETRY_AFTER)
+    server = serve(0, state)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    metrics.METRICS.reset()
+    yield state, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
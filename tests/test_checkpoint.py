@@ -0,0 +1,59 @@
+import json
+import os
+
+from common.checkpoint import CheckpointJournal
+
+
+def write(path, *ids):
+    with CheckpointJournal(path) as journal:
+        for i in ids:
+            journal.append({"id": i, "title": f"Movie {i}"})
+
+
+def test_reopen_recovers_completed_ids(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write(path, 1, 2, 3)
+    journal = CheckpointJournal(path)
+    assert len(journal) == 3 and 2 in journal and 4 not in journal
+    assert [m["id"] for m in journal.records([3, 4, 1])] == [3, 1]
+    journal.close()
+
+
+def test_half_written_last_line_is_truncated(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write(path, 1, 2)
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b'{"id": 3, "title": "Cut o')     # 崩溃时写了一半
+    journal = CheckpointJournal(path)
+    assert len(journal) == 2 and 3 not in journal
+    assert os.path.getsize(path) == size
+    # 截掉之后接着追加，文件里每一行都完整
+    journal.append({"id": 3, "title": "Movie 3"})
+    journal.close()
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == [1, 2, 3]
+
+
+def test_corrupt_line_stops_recovery(tmp_path):
+    # 换行符已经写出但内容坏了：从这一行开始都不可信
+    path = str(tmp_path / "journal.jsonl")
+    write(path, 1)
+    with open(path, "ab") as f:
+        f.write(b'{"id": 2, "tit\n{"id": 3}\n')
+    journal = CheckpointJournal(path)
+    assert list(journal.records([1, 2, 3])) == [{"id": 1, "title": "Movie 1"}]
+    journal.remove()
+    assert not os.path.exists(path)
+
+
+def test_non_ascii_offsets(tmp_path):
+    # 偏移按字节算，多字节字符不能把后面的记录读歪
+    path = str(tmp_path / "journal.jsonl")
+    with CheckpointJournal(path) as journal:
+        journal.append({"id": 1, "title": "千と千尋の神隠し"})
+        journal.append({"id": 2, "title": "Amélie"})
+        assert [m["title"] for m in journal.records([2, 1])] == ["Amélie", "千と千尋の神隠し"]
+    journal = CheckpointJournal(path)
+    assert [m["title"] for m in journal.records([2])] == ["Amélie"]
+    journal.close()
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+import cli
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["check-countries", "--set", "NOPE=1"], "check-countries: country_checking.check_countries 没有配置项 NOPE"),
+    (["run-all", "--set", "generate.NOPE=1"], "generate: sql_generator.sql_generator 没有配置项 NOPE"),
+    (["check-countries", "--set", "generate.OUTPUT_MODE=copy"], "check-countries 不会运行 generate"),
+    (["check-countries", "--set", "NOPE"], "配置项的格式应为 NAME=VALUE"),
+])
+def test_bad_settings_are_usage_errors(argv, message, capsys):
+    with pytest.raises(SystemExit) as exc:
+        cli.main(argv + ["--no-report"])
+    assert exc.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_bad_config_section_is_usage_error(tmp_path, capsys):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"check-countries": {"BOGUS": 1}}), encoding="utf-8")
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["check-countries", "--config", str(path), "--no-report"])
+    assert exc.value.code == 2
+    assert "没有配置项 BOGUS" in capsys.readouterr().err
+
+
+def test_settings_reach_the_stage():
+    parser = cli.build_parser()
+    args = cli.parse_args(parser, ["generate", "--mode", "copy", "--set", "OUTPUT_MODE=batch", "--set", "BATCH_SIZE=7"])
+    settings = cli.stage_settings("generate", None, args)
+    # --set 优先于命令行参数
+    assert settings["OUTPUT_MODE"] == "batch"
+    assert settings["BATCH_SIZE"] == 7
+
+
+def test_shared_credit_depth(tmp_path):
+    path = tmp_path / "depth.json"
+    path.write_text(json.dumps({"credits": {"CREW_ROLES": {"Writer": "W"}}}), encoding="utf-8")
+    parser = cli.build_parser()
+    args = cli.parse_args(parser, ["run-all", "--config", str(path), "--set", "credits.MAX_CAST=null"])
+    settings = cli.stage_settings("credits", None, args)
+    assert settings == {"MAX_CAST": None, "CREW_ROLES": {"Writer": "W"}}
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+from common import compact_map
+from common.compact_map import CompactKeyMap, stable_hash
+from common.entity_resolver import PeopleResolver
+
+
+def test_lookup_and_setdefault():
+    m = CompactKeyMap()
+    m.add("ana lima", 1)
+    m.add("bo chen", 2)
+    m.add("ana lima", 3)
+    assert m.get("ana lima") == 1 and m.get("bo chen") == 2 and "zoe" not in m
+    m.add("zoe", 4)                 # 排序之后加的
+    m.add("bo chen", 5)
+    assert m.get("zoe") == 4 and m.get("bo chen") == 2 and len(m) == 3
+
+
+def test_hash_collisions_keep_keys_apart(monkeypatch):
+    # 所有 key 都撞到同一个哈希：只能靠比较 key 区分
+    monkeypatch.setattr(compact_map, "stable_hash", lambda key: 42)
+    m = CompactKeyMap()
+    m.add("ana lima", 1)
+    m.add("bo chen", 2)
+    m.add("ana lima", 3)
+    assert m.get("ana lima") == 1 and m.get("bo chen") == 2
+    assert m.get("zoe") is None
+    m.add("zoe", 4)
+    assert m.get("zoe") == 4 and len(m) == 3
+
+
+def test_colliding_names_are_not_merged(monkeypatch):
+    monkeypatch.setattr(compact_map, "stable_hash", lambda key: 7)
+    people = PeopleResolver()
+    people.add(10, "Ana", "Lima")
+    assert people.resolve("Ana", "Lima") == 10
+    assert people.resolve("Bo", "Chen") is None
+
+
+def test_stable_hash_is_the_same_in_every_process():
+    code = "from common.compact_map import stable_hash; print(stable_hash('zoë o brien'))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(compact_map.__file__))))
+    assert int(out.stdout) == stable_hash("zoë o brien")
@@ -0,0 +1,58 @@
+import pytest
+
+from common.country_resolver import (COUNTRY_ALIASES, DEFAULT_COUNTRY, CountryResolver, compile_country_map,
+                                     load_country_resolver)
+from common.filmdb_dump import DEFAULT_DUMP_PATH, open_index
+
+
+@pytest.fixture(scope="module")
+def db_codes():
+    conn = open_index(DEFAULT_DUMP_PATH)
+    codes = {code for code, in conn.execute("SELECT country_code FROM countries")}
+    conn.close()
+    return codes
+
+
+@pytest.fixture
+def resolver():
+    return load_country_resolver(DEFAULT_DUMP_PATH)
+
+
+def test_every_country_in_the_dump_maps_to_itself(resolver, db_codes):
+    # TMDB 用大写 ISO 代码；表里的每个代码都要能从它的大写形式解析回来
+    for code in db_codes:
+        assert resolver.resolve(code.upper()) == code
+    assert not resolver.unmapped
+
+
+@pytest.mark.parametrize("iso, expected", [("ES", "sp"), ("UK", "gb"), ("GB", "gb"), ("SU", "ru"), ("XC", "cz"),
+                                           ("YU", "rs"), ("DD", "de"), ("BU", "mm"), ("ZR", "cd"), ("us", "us")])
+def test_aliases_and_case(resolver, iso, expected):
+    assert resolver.resolve(iso) == expected
+
+
+def test_alias_targets_exist_in_the_dump(db_codes):
+    assert set(COUNTRY_ALIASES.values()) <= db_codes
+
+
+def test_unmapped_codes_are_reported_not_guessed(resolver, db_codes):
+    assert "ps" not in db_codes
+    assert resolver.resolve("PS", example="Promise #203") is None
+    assert resolver.resolve("PS", example="Other") is None
+    assert resolver.report() == [("PS", 2, "Promise #203")]
+    assert resolver.kind("PS") is None and resolver.kind("FR") == "exact" and resolver.kind("ES") == "alias"
+
+
+def test_missing_country_defaults(resolver):
+    assert resolver.resolve(None) == resolver.resolve("") == DEFAULT_COUNTRY
+
+
+def test_alias_to_unknown_target_is_ignored():
+    lookup = compile_country_map({"fr"}, {"ES": "sp"})
+    assert lookup == {"FR": "fr"}
+
+
+def test_without_dump_falls_back_to_lowercase(tmp_path):
+    resolver = load_country_resolver(str(tmp_path / "missing.sql"))
+    assert isinstance(resolver, CountryResolver) and resolver.lookup is None
+    assert resolver.resolve("FR") == "fr" and resolver.resolve("ES") == "sp"
@@ -0,0 +1,80 @@
+import pytest
+
+from common import credit_depth
+from common.config import configure
+from data_getter import getter
+from people_info_enricher import people_info_enricher as enricher
+from sql_generator import sql_generator
+
+ROLES = {"Writer": "W", "Producer": "P"}
+
+MOVIE = {
+    "id": 1, "title": "Example", "release_date": "2019-05-01", "runtime": 100, "origin_country": ["FR"],
+    "credits": {
+        "cast": [{"id": 100 + i, "name": f"Actor {i}", "gender": 2} for i in range(12)],
+        "crew": [
+            {"id": 200, "name": "Director", "gender": 1, "job": "Director"},
+            {"id": 201, "name": "Writer", "gender": 1, "job": "Writer"},
+            {"id": 202, "name": "Producer", "gender": 2, "job": "Producer"},
+            {"id": 203, "name": "Editor", "gender": 2, "job": "Editor"},
+        ],
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def restore_depth():
+    saved = credit_depth.MAX_CAST, credit_depth.CREW_ROLES, getter.MAX_CAST, getter.CREW_JOBS
+    yield
+    credit_depth.MAX_CAST, credit_depth.CREW_ROLES, getter.MAX_CAST, getter.CREW_JOBS = saved
+
+
+def enriched_ids(movie):
+    ids = set()
+    enricher.collect_person_ids(movie, ids)
+    return ids
+
+
+def imported(movie):
+    return {(pid, role) for pid, _, _, role in sql_generator.movie_plan(movie, 2019)[5]}
+
+
+@pytest.mark.parametrize("max_cast, roles", [(4, {}), (2, ROLES), (None, ROLES), (20, {"Writer": "W"})])
+def test_enrich_and_generate_agree(max_cast, roles):
+    configure(credit_depth, MAX_CAST=max_cast, CREW_ROLES=roles)
+    # 原始数据经过 getter 清洗之后，补全的人就是要导入的人
+    movie = getter.clean_data(MOVIE)
+    assert enriched_ids(movie) == {pid for pid, _ in imported(movie)}
+    assert len([1 for _, role in imported(movie) if role == "A"]) == min(max_cast or 12, 12)
+    assert {pid for pid, role in imported(movie) if role not in "AD"} == {
+        p["id"] for p in MOVIE["credits"]["crew"] if p["job"] in roles}
+
+
+def test_harvest_covers_import_depth():
+    configure(credit_depth, MAX_CAST=20, CREW_ROLES=ROLES)
+    configure(getter, MAX_CAST=10, CREW_JOBS=("Editor",))
+    assert credit_depth.harvest_depth(getter.MAX_CAST, getter.CREW_JOBS) == (20, {"Editor", "Writer", "Producer"})
+    credits = getter.clean_data(MOVIE)["credits"]
+    assert len(credits["cast"]) == 12
+    assert sorted(p["job"] for p in credits["crew"]) == ["Editor", "Producer", "Writer"]
+
+
+def test_director_is_not_a_crew_role():
+    configure(credit_depth, CREW_ROLES={"Director": "X", "Writer": "W"})
+    assert credit_depth.crew_role("Director") is None
+    assert credit_depth.crew_role("Writer") == "W"
+    assert credit_depth.crew_role(None) is None
+
+
+def test_describe_reports_effective_depth():
+    assert credit_depth.describe() == "[导演] [前4位主演]"
+    configure(credit_depth, MAX_CAST=None, CREW_ROLES=ROLES)
+    assert credit_depth.describe() == "[导演] [全部演员] [Producer/Writer]"
+
+
+def test_enricher_banner_follows_depth(tmp_path, monkeypatch, capsys):
+    configure(credit_depth, MAX_CAST=10)
+    monkeypatch.setattr(enricher, "RAW_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(enricher, "enrich", lambda ids: None)
+    enricher.main()
+    assert "[导演] [前10位主演]" in capsys.readouterr().out
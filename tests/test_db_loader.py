@@ -0,0 +1,198 @@
+import os
+import shutil
+import sqlite3
+import uuid
+
+import pytest
+
+from common import db_loader
+from common.db_loader import DbLoader, SqliteLoader
+from common.sql_format import TABLE_ORDER
+
+SCHEMA = (
+    "CREATE TABLE movies (movieid int PRIMARY KEY, title varchar(100) NOT NULL, country char(2) NOT NULL,"
+    " year_released int NOT NULL, runtime int, UNIQUE (title, country, year_released))",
+    "CREATE TABLE people (peopleid int PRIMARY KEY, first_name varchar(30), surname varchar(30) NOT NULL,"
+    " born int NOT NULL, died int, gender char(1))",
+    "CREATE TABLE credits (movieid int NOT NULL REFERENCES movies(movieid),"
+    " peopleid int NOT NULL REFERENCES people(peopleid), credited_as char(1) NOT NULL,"
+    " PRIMARY KEY (movieid, peopleid, credited_as))",
+)
+
+
+def movie_rows(n, first_id=1):
+    """n 部电影，每部一个导演，人员 ID 和电影 ID 相同"""
+    for mid in range(first_id, first_id + n):
+        yield ("movies", (mid, f"Title {mid}", "us", 2019, 90))
+        yield ("people", (mid, "First", f"Surname {mid}", 1970, None, "F"))
+        yield ("credits", (mid, mid, "D"))
+
+
+def feed(loader, rows):
+    for i, (table, row) in enumerate(rows):
+        loader.add(table, row)
+        if table == "credits":
+            loader.end_movie()
+
+
+def counts(conn):
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLE_ORDER}
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    path = str(tmp_path / "filmdb.sqlite")
+    conn = sqlite3.connect(path)
+    for ddl in SCHEMA:
+        conn.execute(ddl)
+    conn.commit()
+    conn.close()
+    return path
+
+
+# --- SqliteLoader ---
+def test_sqlite_loader_commits_on_close(sqlite_path):
+    commits = []
+    loader = SqliteLoader(sqlite_path, batch_size=2, on_commit=lambda: commits.append(1))
+    feed(loader, movie_rows(5))
+    assert loader.max_ids() == (4, 4)      # 同一个事务里已经落库的批次
+    loader.close()
+    assert counts(sqlite3.connect(sqlite_path)) == {"movies": 5, "people": 5, "credits": 5}
+    assert commits == [1]
+
+
+def test_sqlite_loader_abort_rolls_back(sqlite_path):
+    loader = SqliteLoader(sqlite_path, batch_size=2, on_commit=lambda: pytest.fail("不应提交"))
+    feed(loader, movie_rows(5))
+    loader.add("movies", (99, "Half", "us", 2019, 90))
+    loader.abort()
+    assert counts(sqlite3.connect(sqlite_path)) == {"movies": 0, "people": 0, "credits": 0}
+
+
+def test_sqlite_loader_enforces_foreign_keys(sqlite_path):
+    loader = SqliteLoader(sqlite_path)
+    loader.add("credits", (1, 1, "D"))
+    with pytest.raises(sqlite3.IntegrityError):
+        loader.close()
+    assert counts(sqlite3.connect(sqlite_path))["credits"] == 0
+
+
+# --- 生成器直接入库 ---
+def test_load_requires_delta_mode(generator, monkeypatch):
+    monkeypatch.setattr(generator, "LOAD_TO_DB", True)
+    monkeypatch.setattr(generator, "LOAD_TARGET", "sqlite")
+    generator.main()
+    assert not os.path.exists(generator.SQLITE_DB)
+
+
+def load_settings(generator, monkeypatch, dump_sqlite):
+    os.makedirs(os.path.dirname(generator.SQLITE_DB), exist_ok=True)
+    shutil.copy(dump_sqlite, generator.SQLITE_DB)
+    for name, value in {"LOAD_TO_DB": True, "LOAD_TARGET": "sqlite", "DELTA_MODE": True,
+                        "LOAD_BATCH_SIZE": 300}.items():
+        monkeypatch.setattr(generator, name, value)
+
+
+def test_rerun_after_partial_load(generator, monkeypatch, dump_sqlite):
+    """模拟 DbLoader 那样每批提交、中途失败：重跑不会撞主键，结果和一次跑完一样"""
+    load_settings(generator, monkeypatch, dump_sqlite)
+    base = counts(sqlite3.connect(generator.SQLITE_DB))
+
+    real_write = SqliteLoader._write
+    flushes = []
+
+    def commit_each_batch(self, statements, buffers):
+        if len(flushes) == 2:
+            raise RuntimeError("连接断开")
+        real_write(self, statements, buffers)
+        self.conn.execute("COMMIT")
+        self.conn.execute("BEGIN")
+        flushes.append(1)
+        self._committed()
+
+    monkeypatch.setattr(SqliteLoader, "_write", commit_each_batch)
+    with pytest.raises(RuntimeError):
+        generator.main()
+    partial = counts(sqlite3.connect(generator.SQLITE_DB))
+    assert base["movies"] < partial["movies"]
+
+    monkeypatch.setattr(SqliteLoader, "_write", real_write)
+    generator.main()
+    after_rerun = counts(sqlite3.connect(generator.SQLITE_DB))
+
+    # 再跑一次：登记表里都有，什么也不插
+    generator.main()
+    assert counts(sqlite3.connect(generator.SQLITE_DB)) == after_rerun
+
+    # 和从头一次跑完的结果一致
+    os.remove(generator.REGISTRY_FILE)
+    shutil.copy(dump_sqlite, generator.SQLITE_DB)
+    generator.main()
+    assert counts(sqlite3.connect(generator.SQLITE_DB)) == after_rerun
+
+
+def test_ids_continue_after_target_max(generator, monkeypatch, dump_sqlite):
+    load_settings(generator, monkeypatch, dump_sqlite)
+    conn = sqlite3.connect(generator.SQLITE_DB)
+    conn.execute("INSERT INTO movies VALUES (50000, 'Inserted Elsewhere', 'us', 2001, 90)")
+    conn.execute("INSERT INTO people VALUES (70000, 'Someone', 'Else', 1970, NULL, 'F')")
+    conn.commit()
+    generator.main()
+    new_movies = [r[0] for r in conn.execute("SELECT movieid FROM movies WHERE movieid > 9210 AND movieid != 50000")]
+    new_people = [r[0] for r in conn.execute("SELECT peopleid FROM people WHERE peopleid > 16510 AND peopleid != 70000")]
+    assert new_movies and min(new_movies) == 50001
+    assert new_people and min(new_people) == 70001
+
+
+# --- DbLoader (需要本地 PostgreSQL：FILMDB_TEST_DSN="host=localhost dbname=test user=postgres") ---
+@pytest.fixture
+def pg_dsn():
+    psycopg2 = pytest.importorskip("psycopg2")
+    dsn = os.getenv("FILMDB_TEST_DSN")
+    if not dsn:
+        pytest.skip("没有设置 FILMDB_TEST_DSN")
+    schema = f"loader_test_{uuid.uuid4().hex[:8]}"
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path TO {schema}")
+        for ddl in SCHEMA:
+            cur.execute(ddl)
+    yield f"{dsn} options='-c search_path={schema}'"
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+
+def pg_counts(dsn):
+    import psycopg2
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cur:
+        result = {}
+        for table in TABLE_ORDER:
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            result[table] = cur.fetchone()[0]
+    conn.close()
+    return result
+
+
+@pytest.mark.parametrize("method", DbLoader.METHODS)
+def test_db_loader_methods(pg_dsn, method):
+    commits = []
+    loader = DbLoader(pg_dsn, batch_size=2, method=method, on_commit=lambda: commits.append(1))
+    feed(loader, movie_rows(5))
+    loader.statement("UPDATE movies SET runtime = 120 WHERE movieid = 1")
+    loader.close()
+    assert pg_counts(pg_dsn) == {"movies": 5, "people": 5, "credits": 5}
+    assert len(commits) == loader.batches
+
+
+def test_db_loader_abort_keeps_committed_batches(pg_dsn):
+    loader = DbLoader(pg_dsn, batch_size=2)
+    feed(loader, movie_rows(5))
+    assert loader.max_ids() == (4, 4)
+    loader.add("movies", (99, "Half", "us", 2019, 90))
+    loader.abort()
+    # 已经提交的两批留着，没落库的最后一部和半部电影丢掉
+    assert pg_counts(pg_dsn) == {"movies": 4, "people": 4, "credits": 4}
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from common.tmdb_client import AimdLimiter, TMDBClient
+from people_info_enricher import people_info_enricher as enricher
+from tests.conftest import RETRY_AFTER
+
+
+def test_backoff_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(enricher.random, "uniform", lambda a, b: 1.0)
+    monkeypatch.setattr(enricher, "BACKOFF_BASE", 0.5)
+    assert enricher.backoff_delay(1) == 1.0
+    assert enricher.backoff_delay(1, retry_after=7) == 7
+    assert enricher.backoff_delay(20) == enricher.BACKOFF_MAX
+
+
+def test_fetch_all_backs_off_on_429(mock_tmdb, monkeypatch):
+    state, base_url = mock_tmdb
+    state.script.extend([429, 429, 429])
+    monkeypatch.setattr(enricher, "MAX_WORKERS", 8)
+    monkeypatch.setattr(enricher, "BACKOFF_BASE", 0.001)
+
+    limiters = []
+
+    class RecordingLimiter(AimdLimiter):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.lowest = self.limit
+            limiters.append(self)
+
+        def on_throttle(self):
+            super().on_throttle()
+            self.lowest = min(self.lowest, self.limit)
+
+    monkeypatch.setattr(enricher, "AimdLimiter", RecordingLimiter)
+
+    # 每次请求的 (开始, 结束, 状态)，按人员 ID 记
+    attempts = {}
+    lock = threading.Lock()
+    real_get = enricher.get_person_details_safe
+
+    def recording_get(client, pid):
+        started = time.monotonic()
+        result = real_get(client, pid)
+        with lock:
+            attempts.setdefault(pid, []).append((started, time.monotonic(), result[1]))
+        return result
+
+    monkeypatch.setattr(enricher, "get_person_details_safe", recording_get)
+
+    results = {}
+    with TMDBClient("test-key", base_url=base_url, rate=1000, burst=100) as client:
+        failed = enricher.fetch_all(client, list(range(1, 21)), lambda pid, status, r: results.update({pid: status}))
+
+    assert failed == {} and results == {pid: "ok" for pid in range(1, 21)}
+    # 被 429 时并发上限减半
+    limiter, = limiters
+    assert limiter.lowest <= 4
+    # 被限流的人至少等了 Retry-After 才重试 (退避带 ±20% 抖动)
+    throttled = {pid: tries for pid, tries in attempts.items() if tries[0][2] == "throttled"}
+    assert throttled
+    for tries in throttled.values():
+        assert tries[1][0] - tries[0][1] >= RETRY_AFTER * 0.8
+        assert tries[-1][2] == "ok"
+
+
+@pytest.mark.parametrize("status, expected", [(404, "missing"), (503, "error")])
+def test_person_status(mock_tmdb, status, expected):
+    state, base_url = mock_tmdb
+    state.script.append(status)
+    with TMDBClient("test-key", base_url=base_url, rate=1000, burst=100) as client:
+        assert enricher.get_person_details_safe(client, 7)[1] == expected
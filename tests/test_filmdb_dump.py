@@ -0,0 +1,137 @@
+import os
+import sqlite3
+
+import pytest
+
+from common import filmdb_dump
+from common.filmdb_dump import (DEFAULT_DUMP_PATH, INDEX_TABLES, iter_dump_rows, iter_dump_tables, open_index,
+                                parse_values, sqlite_script)
+
+DUMP = r"""CREATE TABLE alt_titles(titleid int not null,
+  movieid int not null,
+  title varchar(250),
+  primary key(titleid));
+INSERT INTO alt_titles VALUES(1,10,'Plain');
+INSERT INTO alt_titles VALUES(2,10,'C''eravamo tanto amati');
+INSERT INTO alt_titles VALUES(3,11,E'Those Happy Years\n(Anni felici)');
+INSERT INTO alt_titles VALUES(4,12,E'C''eravamo\nWe All Loved');
+INSERT INTO alt_titles VALUES(5,13,E'tab\there, back\\slash, quote\'s');
+INSERT INTO alt_titles VALUES(6,14,'C:\path\no-escape');
+INSERT INTO alt_titles VALUES(7,15,E'');
+INSERT INTO alt_titles VALUES(8,16,NULL);
+"""
+
+EXPECTED = [
+    (1, 10, "Plain"),
+    (2, 10, "C'eravamo tanto amati"),
+    (3, 11, "Those Happy Years\n(Anni felici)"),
+    (4, 12, "C'eravamo\nWe All Loved"),
+    (5, 13, "tab\there, back\\slash, quote's"),
+    (6, 14, "C:\\path\\no-escape"),
+    (7, 15, ""),
+    (8, 16, None),
+]
+
+
+@pytest.fixture
+def dump_path(tmp_path):
+    path = tmp_path / "filmdb.sql"
+    path.write_text(DUMP, encoding="utf-8")
+    return str(path)
+
+
+def test_parse_values_scalars():
+    assert parse_values("1,-2,3.5,NULL,'a,b','it''s'") == [1, -2, 3.5, None, "a,b", "it's"]
+
+
+def test_parse_values_escape_string():
+    assert parse_values(r"1,E'a\nb\\c\'d''e'") == [1, "a\nb\\c'd'e"]
+
+
+def test_iter_dump_rows(dump_path):
+    assert [tuple(row) for _, row in iter_dump_rows(dump_path)] == EXPECTED
+
+
+def test_iter_dump_tables_columns(dump_path):
+    table, columns, row = next(iter_dump_tables(dump_path))
+    assert table == "alt_titles"
+    assert columns == [("titleid", "int"), ("movieid", "int"), ("title", "varchar(250)")]
+    assert tuple(row) == EXPECTED[0]
+
+
+def test_parser_matches_sqlite_script(dump_path):
+    # 流式解析和 SQLite 导入 (SqliteLoader 用的路径) 必须得到一样的值
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(sqlite_script(dump_path))
+    assert conn.execute("SELECT * FROM alt_titles ORDER BY titleid").fetchall() == EXPECTED
+
+
+# --- SQLite 索引 ---
+INDEX_DUMP = """INSERT INTO countries VALUES('us','United States','AMERICA');
+INSERT INTO movies VALUES(1,'Heat','us',1995,170);
+INSERT INTO people VALUES(1,'Michael','Mann',1943,NULL,'M');
+INSERT INTO credits VALUES(1,1,'D');
+INSERT INTO alt_titles VALUES(1,1,'Not indexed');
+"""
+
+
+@pytest.fixture
+def index_dump(tmp_path):
+    path = tmp_path / "filmdb.sql"
+    path.write_text(INDEX_DUMP, encoding="utf-8")
+    return str(path), str(tmp_path / "index.sqlite")
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    real_build = filmdb_dump.build_index
+    monkeypatch.setattr(filmdb_dump, "build_index", lambda *args: (calls.append(args), real_build(*args)))
+    return calls
+
+
+def test_index_is_built_once(index_dump, builds):
+    dump_path, index_path = index_dump
+    conn = open_index(dump_path, index_path)
+    assert conn.execute("SELECT * FROM movies").fetchall() == [(1, "Heat", "us", 1995, 170)]
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'alt_titles'").fetchone() is None
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM movies")     # 只读
+    conn.close()
+    open_index(dump_path, index_path).close()
+    assert len(builds) == 1
+
+
+def test_changed_dump_rebuilds(index_dump, builds):
+    dump_path, index_path = index_dump
+    open_index(dump_path, index_path).close()
+    with open(dump_path, "a", encoding="utf-8") as f:
+        f.write("INSERT INTO movies VALUES(2,'Ronin','us',1998,122);\n")
+    conn = open_index(dump_path, index_path)
+    assert conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0] == 2
+    conn.close()
+    assert len(builds) == 2
+
+
+def test_broken_or_old_index_rebuilds(index_dump, builds, monkeypatch):
+    dump_path, index_path = index_dump
+    with open(index_path, "wb") as f:
+        f.write(b"not a database")
+    open_index(dump_path, index_path).close()
+    assert len(builds) == 1
+    # 索引格式升级 (INDEX_VERSION 变了) 也要重建
+    monkeypatch.setattr(filmdb_dump, "INDEX_VERSION", filmdb_dump.INDEX_VERSION + 1)
+    open_index(dump_path, index_path).close()
+    assert len(builds) == 2
+    assert not os.path.exists(index_path + ".tmp")
+
+
+def test_index_matches_dump(tmp_path):
+    # 真实的 filmdb.sql：索引里每张表的行数和流式解析的一致
+    conn = open_index(DEFAULT_DUMP_PATH, str(tmp_path / "index.sqlite"))
+    parsed = {table: 0 for table in INDEX_TABLES}
+    for table, _ in iter_dump_rows(DEFAULT_DUMP_PATH, INDEX_TABLES):
+        parsed[table] += 1
+    assert {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in INDEX_TABLES} == parsed
+    assert parsed["movies"] and parsed["people"] and parsed["credits"]
+    conn.close()
@@ -0,0 +1,107 @@
+import concurrent.futures
+import os
+
+import pytest
+
+from benchmark.synthetic import movie_ids
+from common.checkpoint import CheckpointJournal
+from common.movie_stream import JSONL_PATTERN, iter_json_lines
+from data_getter import getter
+
+IDS = list(range(1000, 1100))
+
+
+def raw_movie(m_id):
+    return {"id": m_id, "title": f"Movie {m_id}", "release_date": "2019-01-01", "runtime": 90,
+            "origin_country": ["US"], "credits": {"cast": [], "crew": []}}
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    """记录提交了多少个任务、最多同时有多少个没被 harvest_year 取走"""
+
+    def __init__(self):
+        super().__init__(max_workers=4)
+        self.submitted = 0
+        self.consumed = 0
+        self.peak = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        self.peak = max(self.peak, self.submitted - self.consumed)
+        return super().submit(fn, *args)
+
+
+@pytest.fixture
+def harvest(tmp_path, monkeypatch):
+    executor = CountingExecutor()
+    fetched = []
+
+    def get_full_details(client, m_id):
+        fetched.append(m_id)
+        return raw_movie(m_id)
+
+    real_clean = getter.clean_data
+
+    def clean_data(raw):
+        executor.consumed += 1
+        return real_clean(raw)
+
+    monkeypatch.setattr(getter, "get_movies_by_year_paginated", lambda client, ex, year, n: IDS)
+    monkeypatch.setattr(getter, "get_full_details", get_full_details)
+    monkeypatch.setattr(getter, "clean_data", clean_data)
+    monkeypatch.setattr(getter, "CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(getter, "MAX_IN_FLIGHT", 8)
+    yield lambda: getter.harvest_year(None, executor, 2019), executor, fetched
+    executor.shutdown()
+
+
+def test_in_flight_requests_are_capped(harvest):
+    run, executor, fetched = harvest
+    movies, journal = run()
+    assert [m["id"] for m in movies] == IDS
+    assert executor.submitted == len(IDS) and executor.peak <= 8
+    journal.remove()
+
+
+def test_resume_fetches_only_missing(harvest, tmp_path):
+    run, executor, fetched = harvest
+    with CheckpointJournal(str(tmp_path / "raw_movies_data_2019.jsonl")) as journal:
+        for m_id in IDS[::3]:
+            journal.append(getter.clean_data(raw_movie(m_id)))
+    movies, journal = run()
+    assert sorted(fetched) == [m_id for m_id in IDS if m_id not in IDS[::3]]
+    # 结果按排行榜顺序，断点日志里的和新抓的混在一起
+    assert [m["id"] for m in movies] == IDS
+
+
+# --- 整个 main() 对着 mock TMDB 跑 ---
+@pytest.fixture
+def fetch(mock_tmdb, tmp_path, monkeypatch):
+    state, base_url = mock_tmdb
+    raw_dir = tmp_path / "raw_data"
+    for name, value in {"API_KEY": "test-key", "BASE_URL": base_url, "USE_CACHE": False,
+                        "START_YEAR": 2019, "END_YEAR": 2021, "MOVIES_PER_YEAR": 30,
+                        "REQUESTS_PER_SECOND": 1000, "RAW_DATA_DIR": str(raw_dir), "CHECKPOINT_DIR": None}.items():
+        monkeypatch.setattr(getter, name, value)
+    return raw_dir
+
+
+def expected_ids(year):
+    return movie_ids(year, 1)[:30]
+
+
+def test_per_year_shards(fetch):
+    getter.main()
+    for year in (2019, 2020, 2021):
+        with open(fetch / JSONL_PATTERN.format(year), encoding="utf-8") as f:
+            assert [m["id"] for m in iter_json_lines(f)] == expected_ids(year)
+    # 每年的断点日志在分片写完后删掉
+    assert os.listdir(fetch / ".checkpoints") == []
+
+
+def test_single_file_mode(fetch, monkeypatch):
+    monkeypatch.setattr(getter, "PER_YEAR_SHARDS", False)
+    getter.main()
+    assert sorted(os.listdir(fetch)) == [".checkpoints", JSONL_PATTERN.format(2021)]
+    with open(fetch / JSONL_PATTERN.format(2021), encoding="utf-8") as f:
+        assert [m["id"] for m in iter_json_lines(f)] == expected_ids(2019) + expected_ids(2020) + expected_ids(2021)
@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+from common import http_cache
+from common.http_cache import ResponseCache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可控的 time.time()，每次调用前手动拨"""
+    now = [1000.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: now[0])
+    return now
+
+
+def accessed_at(path, *keys):
+    """用另一个连接读已经提交的访问时间"""
+    conn = sqlite3.connect(path)
+    try:
+        return [conn.execute("SELECT accessed_at FROM responses WHERE key = ?", (make_cache_key(k),)).fetchone()[0]
+                for k in keys]
+    finally:
+        conn.close()
+
+
+def test_hits_are_not_committed_one_by_one(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("/a", None, {"v": 1})
+    clock[0] = 2000.0
+    commits = []
+    cache.conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+    for _ in range(50):
+        assert cache.get("/a") == {"v": 1}
+    assert commits == []
+    assert accessed_at(path, "/a") == [1000.0]
+    cache.close()
+    # close() 时写回
+    assert accessed_at(path, "/a") == [2000.0]
+
+
+def test_touches_flush_with_next_put(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("/a", None, {"v": 1})
+    clock[0] = 2000.0
+    cache.get("/a")
+    clock[0] = 3000.0
+    cache.put("/b", None, {"v": 2})
+    assert accessed_at(path, "/a", "/b") == [2000.0, 3000.0]
+    cache.close()
+
+
+def test_put_overrides_pending_touch(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("/a", None, {"v": 1})
+    clock[0] = 2000.0
+    cache.get("/a")
+    clock[0] = 3000.0
+    cache.put("/a", None, {"v": 2})
+    cache.close()
+    assert accessed_at(path, "/a") == [3000.0]
+
+
+def test_flush_threshold(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(http_cache, "TOUCH_FLUSH_EVERY", 3)
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    for key in ("/a", "/b", "/c"):
+        cache.put(key, None, {"k": key})
+    clock[0] = 2000.0
+    cache.get("/a")
+    cache.get("/b")
+    assert accessed_at(path, "/a", "/b") == [1000.0, 1000.0]
+    cache.get("/c")
+    assert accessed_at(path, "/a", "/b", "/c") == [2000.0, 2000.0, 2000.0]
+    cache.close()
+
+
+def test_eviction_sees_pending_touches(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path, max_bytes=10 ** 6)
+    for i, key in enumerate(("/old", "/mid")):
+        clock[0] = 1000.0 + i
+        cache.put(key, None, {"k": key})
+    # /old 刚被读过，淘汰时应该先淘汰 /mid
+    clock[0] = 2000.0
+    cache.get("/old")
+    # 三条大小差不多：放下第三条就超限，淘汰一条后回到上限的 90% 以内
+    cache.max_bytes = cache.total_bytes * 1.25
+    clock[0] = 3000.0
+    cache.put("/new", None, {"k": "/new"})
+    assert cache.get("/mid") is None
+    assert cache.get("/old") == {"k": "/old"}
+    cache.close()
+
+
+def test_expired_entry_is_a_miss(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=100)
+    cache.put("/a", {"page": 1}, {"v": 1})
+    clock[0] = 1050.0
+    assert cache.get("/a", {"page": 1, "api_key": "x"}) == {"v": 1}
+    clock[0] = 1200.0
+    assert cache.get("/a", {"page": 1}) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_key_includes_scheme_and_host(tmp_path):
+    assert make_cache_key("https://api.themoviedb.org/3/movie/1") != make_cache_key("http://127.0.0.1:8000/3/movie/1")
+    assert make_cache_key("https://api.themoviedb.org/3/movie/1") != make_cache_key("http://api.themoviedb.org/3/movie/1")
+    assert make_cache_key("HTTPS://API.themoviedb.org/3/movie/1") == make_cache_key("https://api.themoviedb.org/3/movie/1")
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.put("http://127.0.0.1:8000/3/movie/1", None, {"mock": True})
+    assert cache.get("https://api.themoviedb.org/3/movie/1") is None
+    assert cache.get("http://127.0.0.1:8000/3/movie/1") == {"mock": True}
+    cache.close()
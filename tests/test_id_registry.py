@@ -0,0 +1,71 @@
+import shutil
+import sqlite3
+
+from common.id_registry import IdRegistry
+from common.movie_stream import JSONL_PATTERN, write_json_lines
+from tests.conftest import FIXTURE_YEAR
+
+
+def run_delta(gen, monkeypatch):
+    monkeypatch.setattr(gen, "DELTA_MODE", True)
+    gen.main()
+    with open(gen.OUTPUT_SQL, encoding="utf-8") as f:
+        sql = f.read()
+    return sql, IdRegistry(gen.REGISTRY_FILE, 0, 0)
+
+
+def test_second_run_emits_nothing(generator, monkeypatch):
+    sql, first = run_delta(generator, monkeypatch)
+    assert "INSERT INTO movies" in sql
+    sql, second = run_delta(generator, monkeypatch)
+    assert "INSERT" not in sql and "UPDATE" not in sql
+    # 已发出的 ID 不变，高水位也不动
+    assert second.movies == first.movies and second.people == first.people
+    assert (second.next_movie_id, second.next_people_id) == (first.next_movie_id, first.next_people_id)
+
+
+def test_same_name_person_reuses_id_across_runs(generator, monkeypatch, synthetic_raw_dir, tmp_path):
+    _, first = run_delta(generator, monkeypatch)
+    tmdb_id, (pid, _, origin) = next((k, v) for k, v in first.people.items() if v[2] == "new")
+    first_name, surname, _ = first.person_keys[tmdb_id]
+
+    # 下一年出现一个不同 TMDB ID 的同名人员：原库索引里没有这个人，只能靠登记表里记下的姓名键
+    raw_dir = tmp_path / "raw"
+    shutil.copytree(synthetic_raw_dir, raw_dir)
+    year = FIXTURE_YEAR + 1
+    movie = {"id": 999999999, "title": "Registry Rerun", "original_title": "Registry Rerun",
+             "release_date": f"{year}-05-01", "runtime": 90, "origin_country": ["US"],
+             "credits": {"cast": [{"id": 999999998, "name": f"{first_name} {surname}", "gender": 0}],
+                         "directors": []}}
+    write_json_lines(str(raw_dir / JSONL_PATTERN.format(year)), [movie])
+    monkeypatch.setattr(generator, "RAW_DATA_DIR", str(raw_dir))
+    monkeypatch.setattr(generator, "END_YEAR", year)
+
+    sql, second = run_delta(generator, monkeypatch)
+    assert second.people[999999998][0] == pid
+    assert "INSERT INTO people" not in sql
+
+
+def test_name_keys_persist(tmp_path):
+    path = str(tmp_path / "registry.sqlite")
+    registry = IdRegistry(path, 100, 200)
+    pid = registry.allocate_person()
+    registry.set_person(7, pid, "h", key=("Ana", "Lima", 1980))
+    registry.set_person(8, 5, "h", origin="dump")
+    registry.save()
+    assert IdRegistry(path, 0, 0).inserted_people() == [(pid, "Ana", "Lima", 1980)]
+
+
+def test_old_registry_gains_name_key_column(tmp_path):
+    path = str(tmp_path / "registry.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE people (tmdb_id INTEGER PRIMARY KEY, db_id INTEGER NOT NULL,"
+                 " content_hash TEXT, origin TEXT NOT NULL, run_id INTEGER NOT NULL)")
+    conn.execute("INSERT INTO people VALUES (1, 300, 'h', 'new', 1)")
+    conn.commit()
+    conn.close()
+    registry = IdRegistry(path, 0, 0)
+    assert registry.people[1] == (300, "h", "new") and registry.inserted_people() == []
+    registry.set_person(2, 301, "h", key=("Bo", "Chen", None))
+    registry.save()
+    assert IdRegistry(path, 0, 0).inserted_people() == [(301, "Bo", "Chen", None)]
@@ -0,0 +1,72 @@
+import json
+import threading
+
+import pytest
+
+from common import metrics
+from common.metrics import Metrics
+
+
+def test_histogram_summary():
+    m = Metrics()
+    for value in range(1, 101):
+        m.observe("x", value / 100)
+    summary = m.report()["histograms"]["x"]
+    assert summary["count"] == 100 and summary["max"] == 1.0
+    assert summary["total"] == pytest.approx(50.5) and summary["mean"] == pytest.approx(0.505)
+    assert (summary["p50"], summary["p95"], summary["p99"]) == (0.51, 0.96, 1.0)
+
+
+def test_reservoir_is_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_SAMPLES", 50)
+    m = Metrics()
+    for value in range(1000):
+        m.observe("x", value)
+    hist = m.histograms["x"]
+    assert len(hist.samples) == 50 and hist.count == 1000 and hist.max == 999
+
+
+def test_counters_from_many_threads():
+    m = Metrics()
+
+    def work():
+        for _ in range(1000):
+            m.incr("hits")
+            m.observe("lat", 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report = m.report()
+    assert report["counters"] == {"hits": 8000}
+    assert report["histograms"]["lat"]["count"] == 8000
+
+
+def test_timer_records_on_error():
+    m = Metrics()
+    with pytest.raises(RuntimeError):
+        with m.timer("step"):
+            raise RuntimeError
+    assert m.histograms["step"].count == 1
+
+
+def test_write_report(tmp_path):
+    m = Metrics()
+    m.incr("b", 2)
+    m.incr("a")
+    path = m.write_report("stage", report_dir=str(tmp_path), scale=3)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["name"] == "stage" and data["scale"] == 3
+    assert list(data["counters"].items()) == [("a", 1), ("b", 2)]
+
+
+def test_generator_reports_its_stats(generator):
+    metrics.reset()
+    generator.main()
+    report = metrics.report()
+    counters = report["counters"]
+    assert counters["generate.new_movies"] > 0 and counters["generate.new_people_added"] > 0
+    assert {"generate.load_dump", "generate.rows", "scan.parse"} <= set(report["histograms"])
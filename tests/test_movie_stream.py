@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from benchmark.make_fixtures import write_fixtures
+from common.movie_stream import (JSONL_PATTERN, LEGACY_PATTERN, iter_json_array, iter_movies, iter_movies_by_year,
+                                 write_json_lines)
+
+TRICKY = [
+    {"id": 1, "title": "Brackets ] [ and, commas", "credits": {"cast": [], "crew": []}},
+    {"id": 2, "title": "引号 \" 和 \\ 反斜杠", "runtime": None, "origin_country": ["FR", "BE"]},
+    {"id": 3, "title": "Amélie", "nested": [[1, 2], [], [[3]]], "score": 12345.5},
+    [4, "an array element"],
+    1234567,
+    "plain string",
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 64 * 1024])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_matches_json_load(chunk_size, indent):
+    text = json.dumps(TRICKY, ensure_ascii=False, indent=indent)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]  ", "\n[\n]\n"])
+def test_empty_array(text):
+    assert list(iter_json_array(io.StringIO(text), 2)) == []
+
+
+@pytest.mark.parametrize("cut", [1, 2, 20, 60])
+def test_truncated_array_raises(cut):
+    # 截断在元素中间、或者只少了结尾的 ']'，都要和 json.load 一样报错，不能当成少几条的完整文件
+    text = json.dumps(TRICKY)[:-cut]
+    with pytest.raises(ValueError):
+        json.loads(text)
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), 16))
+
+
+def test_legacy_and_json_lines_files_agree(tmp_path):
+    # 同一批合成数据分别写成旧版 JSON 数组和 JSON Lines，读出来和 json.load 完全一样
+    legacy, lines = tmp_path / "legacy", tmp_path / "lines"
+    write_fixtures(str(legacy), years=range(2019, 2020), legacy=True)
+    write_fixtures(str(lines), years=range(2019, 2020))
+    with open(legacy / LEGACY_PATTERN.format(2019), encoding="utf-8") as f:
+        expected = json.load(f)
+    assert list(iter_movies(str(legacy / LEGACY_PATTERN.format(2019)))) == expected
+    assert list(iter_movies(str(lines / JSONL_PATTERN.format(2019)))) == expected
+    assert [m for _, m in iter_movies_by_year(str(legacy), range(2018, 2021))] == expected
+
+
+def test_write_json_lines_round_trip(tmp_path):
+    path = str(tmp_path / JSONL_PATTERN.format(2019))
+    records = [r for r in TRICKY if isinstance(r, dict)]
+    assert write_json_lines(path, iter(records)) == len(records)
+    assert list(iter_movies(path)) == records
@@ -0,0 +1,71 @@
+"""整批生成的 SQL：batch / COPY / prepared 解析回来的行要和逐行 INSERT 完全一样"""
+import re
+import sqlite3
+
+import pytest
+
+from common.sql_format import TABLE_COLUMNS, TABLE_ORDER
+from tests.test_sql_format import as_text, parse_copy_field
+
+EXECUTE_RE = re.compile(r"^EXECUTE ins_(\w+) ", re.M)
+
+
+def generate(gen, monkeypatch, mode):
+    monkeypatch.setattr(gen, "OUTPUT_MODE", mode)
+    monkeypatch.setattr(gen, "BATCH_SIZE", 100)
+    gen.main()
+    with open(gen.OUTPUT_SQL, encoding="utf-8") as f:
+        return f.read()
+
+
+def statement_rows(sql):
+    """在没有约束的 SQLite 表里执行脚本 (EXECUTE 换成等价的 INSERT)，返回每张表的行"""
+    conn = sqlite3.connect(":memory:")
+    for table in TABLE_ORDER:
+        conn.execute(f"CREATE TABLE {table} ({', '.join(TABLE_COLUMNS[table])})")
+    pending = ""
+    for line in sql.split("\n"):
+        if not pending and (not line.strip() or line in ("BEGIN;", "ROLLBACK;")
+                            or line.startswith(("PREPARE ", "DEALLOCATE ", "--"))):
+            continue
+        pending += line + "\n"
+        if sqlite3.complete_statement(pending):
+            conn.execute(EXECUTE_RE.sub(r"INSERT INTO \1 VALUES ", pending, count=1))
+            pending = ""
+    assert not pending.strip()
+    return {table: conn.execute(f"SELECT * FROM {table}").fetchall() for table in TABLE_ORDER}
+
+
+def copy_rows(sql):
+    rows = {table: [] for table in TABLE_ORDER}
+    table = None
+    for line in sql.split("\n"):
+        if line.startswith("COPY "):
+            table = line.split()[1]
+        elif line == "\\.":
+            table = None
+        elif table is not None:
+            rows[table].append(tuple(parse_copy_field(field) for field in line.split("\t")))
+    return rows
+
+
+def canonical(rows):
+    # batch / COPY 按表攒批次，行的先后和逐行 INSERT 不同；比较的是每张表的行集合 (含重复)
+    return {table: sorted(values, key=repr) for table, values in rows.items()}
+
+
+@pytest.fixture
+def insert_rows(generator, monkeypatch):
+    rows = statement_rows(generate(generator, monkeypatch, "insert"))
+    assert all(rows.values())
+    return rows
+
+
+@pytest.mark.parametrize("mode", ["batch", "prepared"])
+def test_statement_modes_match_insert(generator, monkeypatch, insert_rows, mode):
+    assert canonical(statement_rows(generate(generator, monkeypatch, mode))) == canonical(insert_rows)
+
+
+def test_copy_matches_insert(generator, monkeypatch, insert_rows):
+    expected = {table: [as_text(row) for row in rows] for table, rows in insert_rows.items()}
+    assert canonical(copy_rows(generate(generator, monkeypatch, "copy"))) == canonical(expected)
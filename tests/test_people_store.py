@@ -0,0 +1,54 @@
+import json
+
+from common.people_store import PeopleStore
+
+LEGACY = {
+    "1": {"born": 1929, "died": 2021},
+    "2": {"born": 1961, "died": None},
+    "3": {"born": None, "died": None},
+    "4": None,
+    "5": {"born": None, "died": 1990},
+}
+
+
+def make_store(tmp_path):
+    legacy_path = tmp_path / "people_details_map.json"
+    legacy_path.write_text(json.dumps(LEGACY), encoding="utf-8")
+    store = PeopleStore(str(tmp_path / "people.sqlite"))
+    return store, str(legacy_path)
+
+
+def test_import_marks_empty_entries_failed(tmp_path):
+    store, legacy_path = make_store(tmp_path)
+    assert store.is_empty()
+    assert store.import_json(legacy_path) == (3, 2)
+    assert store.done_ids() == {1, 2, 5}
+    assert set(store.failed()) == {3, 4}
+    assert store.load_map() == {"1": {"born": 1929, "died": 2021}, "2": {"born": 1961, "died": None},
+                                "5": {"born": None, "died": 1990}}
+    assert not store.is_empty()
+    store.close()
+
+
+def test_failed_import_is_retried(tmp_path):
+    store, legacy_path = make_store(tmp_path)
+    store.import_json(legacy_path)
+    # 重新查询后：3 确实没有记录 (ok + null)，4 是 404
+    store.put(3, {"born": None, "died": None})
+    store.put(4, {}, 'missing')
+    store.commit()
+    assert store.failed() == {}
+    assert store.done_ids() == {1, 2, 3, 4, 5}
+    # 已有结论的不会被失败覆盖
+    store.put_failed(3, "timeout")
+    assert store.failed() == {}
+    store.close()
+
+
+def test_store_with_only_failed_rows_is_not_empty(tmp_path):
+    store, legacy_path = make_store(tmp_path)
+    store.put_failed(9, "timeout")
+    store.commit()
+    assert len(store) == 0
+    assert not store.is_empty()
+    store.close()
@@ -0,0 +1,65 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+from common import person_dump
+from common.person_dump import person_years, scan_person_dump
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "person_dump.jsonl")
+
+
+@pytest.fixture(params=["jsonl", "gz"])
+def dump_path(request, tmp_path):
+    """同一份 fixture，分别以 .jsonl 和 .jsonl.gz 给出"""
+    if request.param == "jsonl":
+        return FIXTURE
+    path = str(tmp_path / "person_dump.jsonl.gz")
+    with open(FIXTURE, "rb") as src, gzip.open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    return path
+
+
+def test_hits(dump_path):
+    found = dict(scan_person_dump(dump_path, {1, 12}))
+    assert found == {1: {"born": 1929, "died": 2021}, 12: {"born": 1961, "died": None}}
+
+
+def test_miss(dump_path):
+    assert list(scan_person_dump(dump_path, {999, 7})) == []
+
+
+def test_null_birthday_is_a_hit(dump_path):
+    # birthday 为 null 说明 TMDB 确实没有记录，算命中
+    assert dict(scan_person_dump(dump_path, {123})) == {123: {"born": None, "died": None}}
+
+
+def test_missing_birthday_key_is_not_a_hit(dump_path):
+    # 只有 id / name 的行 (每日导出文件) 留给逐个查询
+    assert list(scan_person_dump(dump_path, {1234})) == []
+
+
+def test_broken_line_is_skipped(dump_path):
+    assert list(scan_person_dump(dump_path, {55, 12})) == [(12, {"born": 1961, "died": None})]
+
+
+def test_id_prefilter(dump_path, monkeypatch):
+    parsed = []
+    real_loads = person_dump.json.loads
+
+    def loads(line):
+        parsed.append(line)
+        return real_loads(line)
+
+    monkeypatch.setattr(person_dump.json, "loads", loads)
+    found = dict(scan_person_dump(dump_path, {12}))
+    assert found == {12: {"born": 1961, "died": None}}
+    # 只有 id 命中的那一行被解析；imdb_id 不会被当成 id，12 也不会误配 123 / 1234 / 12345
+    assert len(parsed) == 1 and b'"id": 12,' in parsed[0]
+
+
+def test_person_years():
+    assert person_years({"birthday": "1929-12-13", "deathday": None}) == {"born": 1929, "died": None}
+    assert person_years({"birthday": "", "deathday": "2021-02-05"}) == {"born": None, "died": 2021}
+    assert person_years({}) == {"born": None, "died": None}
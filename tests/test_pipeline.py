@@ -0,0 +1,41 @@
+import collections
+
+import run_pipeline
+from common import movie_stream
+from common.pipeline import MovieScan
+from country_checking import check_countries
+from tests.conftest import FIXTURE_YEAR
+
+
+def test_every_consumer_sees_every_movie_in_order(synthetic_raw_dir):
+    seen = collections.defaultdict(list)
+    scan = MovieScan(synthetic_raw_dir, range(FIXTURE_YEAR, FIXTURE_YEAR + 1))
+    for name in ("a", "b"):
+        scan.register(lambda year, m, name=name: seen[name].append((year, m["id"])))
+    count = scan.run()
+    assert count == len(seen["a"]) > 0
+    assert seen["a"] == seen["b"]
+
+
+def test_pipeline_parses_once_and_matches_standalone(generator, synthetic_raw_dir, monkeypatch):
+    movies = len(list(movie_stream.iter_movies_by_year(synthetic_raw_dir, [FIXTURE_YEAR])))
+    generator.main()
+    with open(generator.OUTPUT_SQL, "rb") as f:
+        standalone = f.read()
+
+    opened = []
+    real_iter_movies = movie_stream.iter_movies
+    monkeypatch.setattr(movie_stream, "iter_movies", lambda path: (opened.append(path), real_iter_movies(path))[1])
+    for name, value in {"RAW_DATA_DIR": synthetic_raw_dir, "START_YEAR": FIXTURE_YEAR, "END_YEAR": FIXTURE_YEAR,
+                        "ENRICH_PEOPLE": False}.items():
+        monkeypatch.setattr(run_pipeline, name, value)
+    reports = []
+    monkeypatch.setattr(check_countries, "report", lambda stats, examples: reports.append(sum(stats.values())))
+    run_pipeline.main()
+
+    # 三个阶段共用一次扫描：原始文件只打开一次
+    assert len(opened) == 1
+    with open(generator.OUTPUT_SQL, "rb") as f:
+        assert f.read() == standalone
+    # 国家统计也看到了每一部
+    assert reports == [movies]
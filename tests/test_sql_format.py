@@ -0,0 +1,149 @@
+"""sql_format / SqlWriter 的转义：每种方言、每种输出格式的字面量都要能原样读回来"""
+import io
+import re
+import sqlite3
+
+import pytest
+
+from common.sql_emitter import OUTPUT_MODES, SqlWriter
+from common.sql_format import (TABLE_COLUMNS, copy_field, copy_line, insert_sql, sql_literal,
+                               values_tuple)
+
+TRICKY = [
+    "O'Brien",
+    "''",
+    "back\\slash",
+    "trailing\\",
+    "new\nline",
+    "tab\there",
+    "cr\rlf\r\n",
+    "mixed '\\\n\t' end",
+    "\\N",
+    "E'not an escape'",
+    "Zoë 中文",
+    "",
+]
+# 每个值放进 people 的一行 (first_name / surname 是文本，died 是 NULL)
+ROWS = [(i, value, value[::-1], 1950 + i, None, "M") for i, value in enumerate(TRICKY)]
+CASES = [(dialect, mode) for dialect, modes in OUTPUT_MODES.items() for mode in modes]
+
+COPY_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v", "\\": "\\"}
+
+
+def parse_copy_field(field):
+    """按 PostgreSQL COPY text 格式解析一个字段"""
+    if field == "\\N":
+        return None
+    return re.sub(r"\\(.)", lambda m: COPY_ESCAPES.get(m.group(1), m.group(1)), field)
+
+
+def parse_copy_block(text):
+    """把 'COPY people (...) FROM STDIN;' 到 '\\.' 之间的数据行解析成元组"""
+    rows = []
+    inside = False
+    for line in text.split("\n"):
+        if line.startswith("COPY "):
+            inside = True
+        elif line == "\\.":
+            inside = False
+        elif inside:
+            rows.append(tuple(parse_copy_field(field) for field in line.split("\t")))
+    return rows
+
+
+def people_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE people ({', '.join(TABLE_COLUMNS['people'])})")
+    return conn
+
+
+def run_statements(conn, sql):
+    """逐条执行 SQL 脚本 (prepared 模式的 EXECUTE 换成等价的 INSERT)"""
+    pending = ""
+    # 按 \n 切 (不能用 splitlines：字面量里的 \r 也会被当成换行)
+    for line in sql.split("\n"):
+        if not pending and (not line.strip() or line.startswith(("PREPARE ", "DEALLOCATE ", "--"))):
+            continue
+        pending += line + "\n"
+        if sqlite3.complete_statement(pending):
+            conn.execute(pending.replace("EXECUTE ins_people ", "INSERT INTO people VALUES ", 1))
+            pending = ""
+    assert not pending.strip()
+
+
+def emit(dialect, mode):
+    out = io.StringIO()
+    writer = SqlWriter(out, mode=mode, batch_size=5, dialect=dialect)
+    for row in ROWS:
+        writer.add("people", row)
+        writer.end_movie()
+    writer.close()
+    return out.getvalue()
+
+
+def as_text(row):
+    # COPY text 格式里所有字段都是字符串
+    return tuple(None if v is None else str(v) for v in row)
+
+
+@pytest.mark.parametrize("dialect,mode", CASES)
+def test_writer_round_trip(dialect, mode):
+    sql = emit(dialect, mode)
+    if mode == "copy":
+        assert parse_copy_block(sql) == [as_text(row) for row in ROWS]
+    else:
+        conn = people_db()
+        run_statements(conn, sql)
+        assert conn.execute("SELECT * FROM people ORDER BY peopleid").fetchall() == ROWS
+
+
+@pytest.mark.parametrize("dialect", ["postgres", "sqlite"])
+@pytest.mark.parametrize("value", TRICKY + [None])
+def test_literal_round_trip(dialect, value):
+    conn = sqlite3.connect(":memory:")
+    assert conn.execute(f"SELECT {sql_literal(value, dialect)}").fetchone()[0] == value
+
+
+@pytest.mark.parametrize("value", TRICKY + [None])
+def test_copy_field_round_trip(value):
+    field = copy_field(value)
+    # 字段里不能出现真的分隔符 / 换行，否则会切坏整行
+    assert "\t" not in field and "\n" not in field and "\r" not in field
+    assert parse_copy_field(field) == value
+
+
+def test_copy_line_round_trip():
+    for row in ROWS:
+        line = copy_line(row)
+        assert line.endswith("\n")
+        assert tuple(parse_copy_field(f) for f in line[:-1].split("\t")) == as_text(row)
+
+
+def test_values_tuple_round_trip():
+    conn = people_db()
+    for dialect in ("postgres", "sqlite"):
+        conn.execute("DELETE FROM people")
+        for row in ROWS:
+            conn.execute(f"INSERT INTO people VALUES {values_tuple(row, dialect)}")
+        assert conn.execute("SELECT * FROM people ORDER BY peopleid").fetchall() == ROWS
+
+
+def test_parameterized_insert_round_trip():
+    conn = people_db()
+    conn.executemany(insert_sql("people", "qmark"), ROWS)
+    assert conn.execute("SELECT * FROM people ORDER BY peopleid").fetchall() == ROWS
+
+
+def test_nul_is_stripped():
+    value = "a\x00b"
+    conn = sqlite3.connect(":memory:")
+    assert conn.execute(f"SELECT {sql_literal(value)}").fetchone()[0] == "ab"
+    assert parse_copy_field(copy_field(value)) == "ab"
+
+
+def test_non_string_literals():
+    assert sql_literal(True) == "TRUE" and sql_literal(True, "sqlite") == "1"
+    assert sql_literal(False) == "FALSE" and sql_literal(False, "sqlite") == "0"
+    assert sql_literal(3) == "3"
+    assert sql_literal(1.5) == "1.5"
+    assert sql_literal(None, "sqlite") == "NULL"
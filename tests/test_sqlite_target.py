@@ -0,0 +1,47 @@
+import json
+import shutil
+import sqlite3
+
+from common.sql_format import TABLE_ORDER
+
+
+def counts(conn):
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLE_ORDER}
+
+
+def table_rows(conn):
+    return {table: sorted(conn.execute(f"SELECT * FROM {table}"), key=repr) for table in TABLE_ORDER}
+
+
+def test_synthetic_batch_loads_into_sqlite(generator, monkeypatch, dump_sqlite, tmp_path):
+    """合成数据生成 SQLite 方言的脚本，跑进 filmdb.sql 建的库；再用直接入库跑一遍，两边结果一样"""
+    monkeypatch.setattr(generator, "SQL_DIALECT", "sqlite")
+    generator.main()
+    with open(generator.MANIFEST_FILE, encoding="utf-8") as f:
+        generated = {table: 0 for table in TABLE_ORDER}
+        for batch in json.load(f)["batches"]:
+            generated[batch["table"]] += batch["rows"]
+    assert all(generated.values())
+
+    base = counts(sqlite3.connect(dump_sqlite))
+    expected = {table: base[table] + generated[table] for table in TABLE_ORDER}
+
+    # 1. 执行生成的脚本 (结尾的 ROLLBACK 换成 COMMIT)
+    script_db = str(tmp_path / "script.sqlite")
+    shutil.copy(dump_sqlite, script_db)
+    with open(generator.OUTPUT_SQL, encoding="utf-8") as f:
+        script = f.read().replace("\nROLLBACK;", "\nCOMMIT;")
+    conn = sqlite3.connect(script_db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(script)
+    assert counts(conn) == expected
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+    # 2. 直接入库 (SqliteLoader)
+    shutil.copy(dump_sqlite, generator.SQLITE_DB)
+    for name, value in {"LOAD_TO_DB": True, "LOAD_TARGET": "sqlite", "DELTA_MODE": True}.items():
+        monkeypatch.setattr(generator, name, value)
+    generator.main()
+    loaded = sqlite3.connect(generator.SQLITE_DB)
+    assert counts(loaded) == expected
+    assert table_rows(loaded) == table_rows(conn)
@@ -0,0 +1,15 @@
+from benchmark.synthetic import movie_ids, movie_record
+
+
+def test_titles_unique_per_year_and_country():
+    # movies 表的唯一约束是 (title, country, year_released)
+    keys = []
+    for year in (2019, 2020):
+        for mid in movie_ids(year, scale=2):
+            m = movie_record(mid, scale=2)
+            keys.append((m["title"], m["origin_country"][0], int(m["release_date"][:4])))
+    assert len(keys) == len(set(keys)) == 1000
+
+
+def test_records_are_deterministic():
+    assert movie_record(2019000) == movie_record(2019000)
@@ -0,0 +1,147 @@
+import threading
+
+import pytest
+
+from benchmark.synthetic import person_record
+from common import metrics, tmdb_client
+from common.http_cache import ResponseCache
+from common.tmdb_client import AimdLimiter, TMDBClient
+from tests.conftest import RETRY_AFTER
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """记录 get_json 的退避等待 (不真的睡)；mock 服务器线程里的 sleep 不算"""
+    recorded = []
+    caller = threading.current_thread()
+    real_sleep = tmdb_client.time.sleep
+
+    def sleep(seconds):
+        if threading.current_thread() is caller:
+            recorded.append(seconds)
+        else:
+            real_sleep(seconds)
+
+    monkeypatch.setattr(tmdb_client.time, "sleep", sleep)
+    return recorded
+
+
+def make_client(base_url, **kwargs):
+    return TMDBClient("test-key", base_url=base_url, rate=1000, burst=100, **kwargs)
+
+
+def status_counts(state):
+    with state.lock:
+        return dict(state.stats)
+
+
+def test_429_pauses_bucket_then_succeeds(mock_tmdb, monkeypatch):
+    state, base_url = mock_tmdb
+    state.script.extend([429, 429])
+    with make_client(base_url) as client:
+        pauses = []
+        real_pause = client.bucket.pause
+        monkeypatch.setattr(client.bucket, "pause", lambda seconds: (pauses.append(seconds), real_pause(seconds)))
+        assert client.get_json("/person/7") == person_record(7)
+
+    # 两次 429 都按 Retry-After 暂停整个桶，第三次成功；429 不走指数退避
+    assert pauses == [RETRY_AFTER, RETRY_AFTER]
+    assert status_counts(state) == {429: 2, 200: 1}
+    assert "http.backoff" not in metrics.report()["histograms"]
+    assert metrics.report()["counters"]["http.person.{id}.status.429"] == 2
+
+
+def test_5xx_backs_off_exponentially(mock_tmdb, sleeps):
+    state, base_url = mock_tmdb
+    state.script.extend([500, 503, 502])
+    with make_client(base_url) as client:
+        assert client.get_json("/person/7") == person_record(7)
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert status_counts(state) == {500: 1, 503: 1, 502: 1, 200: 1}
+
+
+def test_retries_exhausted(mock_tmdb, sleeps):
+    state, base_url = mock_tmdb
+    state.script.extend([503] * 10)
+    with make_client(base_url, max_retries=2) as client:
+        assert client.get_json("/person/7") is None
+    # 第一次 + 2 次重试
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert status_counts(state) == {503: 3}
+
+
+def test_404_is_not_retried(mock_tmdb, sleeps):
+    state, base_url = mock_tmdb
+    with make_client(base_url) as client:
+        assert client.get_json("/tv/7") is None
+    assert sleeps == []
+    assert status_counts(state) == {404: 1}
+
+
+def test_fetch_reports_retry_after(mock_tmdb):
+    state, base_url = mock_tmdb
+    state.script.extend([429, 503])
+    with make_client(base_url) as client:
+        first, second, third = (client.fetch("/person/7") for _ in range(3))
+    assert (first.status, first.retry_after) == (429, RETRY_AFTER)
+    assert (second.status, second.ok) == (503, False)
+    assert third.ok and third.data == person_record(7)
+
+
+
+def test_cache_is_keyed_by_host(mock_tmdb, tmp_path):
+    """同一个缓存文件换了 base_url (mock -> 正式 API) 时，同一路径不能命中对方的响应"""
+    state, base_url = mock_tmdb
+    path = str(tmp_path / "cache.sqlite")
+    with make_client(base_url, cache=ResponseCache(path)) as client:
+        assert client.get_json("/person/7") == person_record(7)
+    other = base_url.replace("127.0.0.1", "localhost")
+    with make_client(other, cache=ResponseCache(path)) as client:
+        assert client.get_json("/person/7") == person_record(7)
+        assert (client.cache.hits, client.cache.misses) == (0, 1)
+    with make_client(base_url, cache=ResponseCache(path)) as client:
+        client.get_json("/person/7")
+        assert client.cache.hits == 1
+    assert status_counts(state)[200] == 2
+
+def test_aimd_grows_and_shrinks():
+    limiter = AimdLimiter(8, minimum=2, maximum=16, cooldown=60)
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    # cooldown 内再被 429 不重复减半
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    # 加法增长：大约每轮 (limit 次成功) +1
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.limit == 4 and 4.9 < limiter.value < 5
+    limiter.on_success()
+    assert limiter.limit == 5
+    for _ in range(200):
+        limiter.on_success()
+    assert limiter.limit == 16
+
+
+def test_aimd_respects_minimum():
+    limiter = AimdLimiter(4, minimum=2, cooldown=0)
+    for _ in range(5):
+        limiter.on_throttle()
+    assert limiter.limit == 2
+    assert limiter.maximum == 4
+
+
+def test_aimd_follows_mock_responses(mock_tmdb):
+    """按 mock 返回的状态码驱动 limiter，和 people_info_enricher 里的用法一致"""
+    state, base_url = mock_tmdb
+    state.script.extend([429, 429, 429])
+    limiter = AimdLimiter(8, minimum=1, cooldown=0)
+    with make_client(base_url) as client:
+        for pid in range(10):
+            res = client.fetch(f"/person/{pid}")
+            if res.status == 429:
+                limiter.on_throttle()
+            elif res.ok:
+                limiter.on_success()
+    # 8 -> 4 -> 2 -> 1，之后 7 次成功慢慢涨回来
+    assert limiter.limit >= 2 and limiter.value < 8
+    assert status_counts(state) == {429: 3, 200: 7}
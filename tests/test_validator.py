@@ -0,0 +1,123 @@
+import os
+
+from common.validator import BatchValidator
+
+
+class NullWriter:
+    def comment(self, text):
+        pass
+
+    def add(self, table, row):
+        pass
+
+    def end_movie(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# 原库：一个国家、一部电影、一个人
+STATE = {
+    "countries": {"us", "fr"},
+    "movies": {("movieid",): {(1,)}, ("title", "country", "year_released"): {("Heat", "us", 1995)}},
+    "people": {("peopleid",): {(1,)}, ("surname", "first_name"): {("Mann", "Michael")}},
+    "credits": {("movieid", "peopleid", "credited_as"): {(1, 1, "D")}},
+}
+
+
+def validate(rows, **known):
+    validator = BatchValidator(NullWriter())
+    for table, row in rows:
+        validator.add(table, row)
+    return {(p["check"], p["table"]): p for p in validator.check(STATE, **known)}
+
+
+def errors(problems):
+    return {key for key, p in problems.items() if p["severity"] == "error"}
+
+
+def test_clean_batch():
+    problems = validate([
+        ("movies", (2, "Ronin", "fr", 1998, 122)),
+        ("people", (2, "Robert", "De Niro", 1943, None, "M")),
+        ("credits", (2, 2, "A")),
+        ("credits", (2, 1, "D")),               # 原库里的人
+    ])
+    assert errors(problems) == set()
+
+
+def test_in_batch_duplicates():
+    problems = validate([
+        ("movies", (2, "Ronin", "fr", 1998, 122)),
+        ("movies", (2, "Ronin 2", "fr", 1998, 122)),
+        ("people", (3, "Robert", "De Niro", 1943, None, "M")),
+        ("people", (4, "Robert", "De Niro", 1943, None, "M")),
+        ("people", (5, None, "Cher", 1946, None, "F")),
+        ("people", (6, None, "Cher", 1946, None, "F")),     # first_name 为 NULL 不参与唯一约束
+        ("credits", (2, 3, "A")),
+        ("credits", (2, 3, "A")),
+    ])
+    assert errors(problems) == {
+        ("unique(movieid) 批内重复", "movies"),
+        ("unique(surname, first_name) 批内重复", "people"),
+        ("unique(movieid, peopleid, credited_as) 批内重复", "credits"),
+    }
+    dup = problems[("unique(surname, first_name) 批内重复", "people")]
+    assert dup["count"] == 2 and dup["examples"][0] == (3, "Robert", "De Niro", 1943, None, "M")
+
+
+def test_conflicts_with_dump():
+    problems = validate([
+        ("movies", (1, "Heat", "us", 1995, 170)),
+        ("people", (7, "Michael", "Mann", 1943, None, "M")),
+    ])
+    assert errors(problems) == {("unique(movieid) 原库已存在", "movies"),
+                                ("unique(title, country, year_released) 原库已存在", "movies"),
+                                ("unique(surname, first_name) 原库已存在", "people")}
+
+
+def test_dangling_credits():
+    problems = validate([
+        ("movies", (2, "Ronin", "fr", 1998, 122)),
+        ("credits", (2, 99, "A")),
+        ("credits", (98, 1, "A")),
+        ("credits", (97, 96, "D")),
+    ])
+    assert errors(problems) == {("peopleid -> people", "credits"), ("movieid -> movies", "credits")}
+    assert problems[("peopleid -> people", "credits")]["count"] == 2
+    assert problems[("movieid -> movies", "credits")]["examples"] == [(98, 1, "A"), (97, 96, "D")]
+
+
+def test_earlier_runs_satisfy_foreign_keys():
+    problems = validate([("credits", (50, 60, "A"))], known_movie_ids={50}, known_people_ids={60})
+    assert errors(problems) == set()
+
+
+def test_columns_and_quality():
+    problems = validate([
+        ("movies", (2, "x" * 101, "zz", 1998, None)),
+        ("people", (3, "Ana", None, 0, None, "F")),
+        ("people", (4, "Bo", "Chen", 1990, 1980, "M")),
+    ])
+    assert errors(problems) == {("length(title) <= 100", "movies"), ("country -> countries", "movies"),
+                                ("surname not null", "people")}
+    assert problems[("born = 0 (生日未知)", "people")]["severity"] == "warning"
+    assert problems[("died < born", "people")]["severity"] == "warning"
+
+
+def test_strict_validation_blocks_output(generator, monkeypatch):
+    # 生成时混进一条悬空的 credits：不输出 SQL，登记表也不更新
+    real_generate_rows = generator.generate_rows
+
+    def with_dangling_credit(writer, *args):
+        stats = real_generate_rows(writer, *args)
+        writer.add("credits", (1, 10 ** 9, "A"))
+        return stats
+
+    monkeypatch.setattr(generator, "generate_rows", with_dangling_credit)
+    monkeypatch.setattr(generator, "DELTA_MODE", True)
+    generator.main()
+    assert not os.path.exists(generator.OUTPUT_SQL)
+    assert os.path.exists(generator.OUTPUT_SQL + ".tmp")
+    assert not os.path.exists(generator.REGISTRY_FILE)